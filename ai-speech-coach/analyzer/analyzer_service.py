@@ -1,20 +1,31 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import logging
-from datetime import datetime
-import nltk
-from nltk.tokenize import word_tokenize
 import asyncio
+import hashlib
+import json
+from datetime import datetime
+import numpy as np
+from collections import Counter
 
 # Import analyzer components
-from analyzer.filler_words import FillerWordAnalyzer, count_words
+from analyzer.filler_words import FillerWordAnalyzer
 from analyzer.pace import PaceAnalyzer
 from analyzer.vocabulary import VocabularyAnalyzer
+from analyzer.tokenizer import TokenStream
+from analyzer.executor import AnalyzerExecutor
+from analyzer.session_state import SessionAccumulator
+from analyzer.result_cache import AnalysisResultCache, analysis_cache_key
+from analyzer.instrumentation import stage_timings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Download NLTK data (uncomment when first running)
-# nltk.download('punkt')
+# Bump when analysis logic changes so cached results from older code are not reused
+ANALYSIS_VERSION = 1
+
+# Score penalties per pace category
+CONFIDENCE_PACE_PENALTY = {"too_slow": 15, "slow": 5, "fast": 5, "too_fast": 15}
+CLARITY_PACE_PENALTY = {"too_slow": 10, "slow": 5, "fast": 10, "too_fast": 20}
 
 
 class SpeechAnalyzerService:
@@ -22,38 +33,112 @@ class SpeechAnalyzerService:
     Service for analyzing speech transcripts and providing feedback.
     """
     
-    def __init__(self):
-        """Initialize the speech analyzer service with all component analyzers."""
-        self.filler_word_analyzer = FillerWordAnalyzer()
-        self.pace_analyzer = PaceAnalyzer()
-        self.vocabulary_analyzer = VocabularyAnalyzer()
-        logger.info("SpeechAnalyzerService initialized with all analyzer components")
+    def __init__(self, executor_backend: Optional[str] = None, max_workers: Optional[int] = None,
+                 filler_word_analyzer: Optional[FillerWordAnalyzer] = None,
+                 pace_analyzer: Optional[PaceAnalyzer] = None,
+                 vocabulary_analyzer: Optional[VocabularyAnalyzer] = None,
+                 result_cache: Optional[AnalysisResultCache] = None):
+        """
+        Initialize the speech analyzer service with all component analyzers.
+        
+        Args:
+            executor_backend: Where analysis runs: "inline", "thread" or "process"
+                (defaults to the ANALYZER_EXECUTOR environment variable, then "thread")
+            max_workers: Maximum number of executor workers
+            filler_word_analyzer: Optional shared analyzer instance (see AnalyzerRegistry)
+            pace_analyzer: Optional shared analyzer instance
+            vocabulary_analyzer: Optional shared analyzer instance
+            result_cache: Optional cache of results keyed by transcript content;
+                repeated transcripts are then answered without re-analyzing
+        """
+        self.filler_word_analyzer = filler_word_analyzer or FillerWordAnalyzer()
+        self.pace_analyzer = pace_analyzer or PaceAnalyzer()
+        self.vocabulary_analyzer = vocabulary_analyzer or VocabularyAnalyzer()
+        self.executor = AnalyzerExecutor(executor_backend, max_workers)
+        self.result_cache = result_cache
+        self.config_version = self._config_version()
+        logger.info(f"SpeechAnalyzerService initialized with all analyzer components ({self.executor.backend} executor)")
     
-    async def analyze_transcript(self, transcript_segments: List[Dict]) -> Dict:
+    async def analyze_transcript(self, transcript_segments: List[Dict], use_cache: bool = True) -> Dict:
         """
         Analyze transcript segments and provide comprehensive feedback.
         
+        The CPU-bound analysis runs on the configured executor so the event
+        loop stays free to serve other requests. With a result cache,
+        transcripts that were analyzed before are answered from the cache.
+        
+        Args:
+            transcript_segments: List of transcript segments to analyze
+            use_cache: Whether to use the result cache; batch callers such as
+                the end-of-day job pass False so one-off full-day transcripts
+                don't evict the webhook chunks that are actually repeated
+            
+        Returns:
+            Dictionary containing analysis results
+        """
+        if self.result_cache is None or not use_cache:
+            return await self.executor.run(self, "analyze_transcript_sync", transcript_segments)
+        
+        key = analysis_cache_key(transcript_segments, self.config_version)
+        result = await self.result_cache.get_async(key)
+        if result is None:
+            result = await self.executor.run(self, "analyze_transcript_sync", transcript_segments)
+            await self.result_cache.put_async(key, result)
+        return result
+    
+    async def analyze_session_chunk(self, transcript_segments: List[Dict]) -> Tuple[Dict, SessionAccumulator]:
+        """
+        Analyze a chunk of a session and build its mergeable session state.
+        
+        Args:
+            transcript_segments: New transcript segments for the session
+            
+        Returns:
+            Tuple of the chunk's analysis results and an accumulator for the
+            chunk, to be merged into the session's running state
+        """
+        if self.result_cache is None:
+            return await self.executor.run(self, "analyze_session_chunk_sync", transcript_segments)
+        
+        key = analysis_cache_key(transcript_segments, self.config_version, kind="session_chunk")
+        cached = await self.result_cache.get_async(key)
+        if cached is not None:
+            result, accumulator_data = cached
+            return result, SessionAccumulator.from_dict(accumulator_data)
+        
+        result, accumulator = await self.executor.run(self, "analyze_session_chunk_sync", transcript_segments)
+        await self.result_cache.put_async(key, [result, accumulator.to_dict()])
+        return result, accumulator
+    
+    def analyze_session_chunk_sync(self, transcript_segments: List[Dict]) -> Tuple[Dict, SessionAccumulator]:
+        """Analyze a chunk of a session on the calling thread."""
+        accumulator = SessionAccumulator()
+        result = self.analyze_transcript_sync(transcript_segments, accumulator)
+        return result, accumulator
+    
+    def analyze_transcript_sync(self, transcript_segments: List[Dict], 
+                                accumulator: Optional[SessionAccumulator] = None) -> Dict:
+        """
+        Analyze transcript segments on the calling thread.
+        
+        Each stage is timed with stage_timings when stage timing is enabled.
+        
         Args:
             transcript_segments: List of transcript segments to analyze
+            accumulator: Optional session accumulator to fold these segments into
             
         Returns:
             Dictionary containing analysis results
         """
+        with stage_timings.stage("analyze_transcript"):
+            return self._analyze_transcript(transcript_segments, accumulator)
+    
+    def _analyze_transcript(self, transcript_segments: List[Dict], 
+                            accumulator: Optional[SessionAccumulator]) -> Dict:
+        """Body of analyze_transcript_sync."""
         if not transcript_segments:
             logger.warning("No transcript segments provided for analysis")
-            return {
-                "metrics": {
-                    "filler_words": {},
-                    "total_filler_count": 0,
-                    "words_per_minute": 0,
-                    "total_words": 0,
-                    "speaking_time_seconds": 0,
-                    "vocabulary_diversity": 0,
-                    "confidence_score": 0,
-                    "clarity_score": 0
-                },
-                "suggestions": []
-            }
+            return self._empty_result()
         
         logger.info(f"Analyzing {len(transcript_segments)} transcript segments")
         
@@ -62,49 +147,307 @@ class SpeechAnalyzerService:
         
         if not user_segments:
             logger.warning("No user speech segments found in transcript")
-            return {
-                "metrics": {
-                    "filler_words": {},
-                    "total_filler_count": 0,
-                    "words_per_minute": 0,
-                    "total_words": 0,
-                    "speaking_time_seconds": 0,
-                    "vocabulary_diversity": 0,
-                    "confidence_score": 0,
-                    "clarity_score": 0
-                },
-                "suggestions": []
-            }
+            return self._empty_result()
         
-        # Combine all user speech for aggregate analysis
-        combined_text = " ".join([s.get("text_content", "") for s in user_segments])
+        # Tokenize all user speech once; every analyzer consumes the same stream
+        with stage_timings.stage("tokenize"):
+            stream = TokenStream.from_segments(user_segments)
         
         # Count total words
-        total_words = count_words(combined_text)
+        total_words = stream.word_count
         
         # Calculate total speaking time
-        total_speaking_time = 0.0
-        for segment in user_segments:
-            start_time = segment.get("start_time")
-            end_time = segment.get("end_time")
+        with stage_timings.stage("speaking_time"):
+            total_speaking_time = 0.0
+            for segment in user_segments:
+                start_time = segment.get("start_time")
+                end_time = segment.get("end_time")
+                
+                if isinstance(start_time, datetime) and isinstance(end_time, datetime):
+                    duration = (end_time - start_time).total_seconds()
+                else:
+                    # Handle case where start/end might be float values
+                    duration = float(end_time) - float(start_time)
+                
+                total_speaking_time += duration
+        
+        # Run analyses over the shared token stream
+        filler_analysis = self._analyze_filler_words(stream)
+        pace_analysis = self._analyze_pace(user_segments, stream)
+        vocabulary_analysis = self._analyze_vocabulary(stream)
+        
+        if accumulator is not None:
+            with stage_timings.stage("session_state"):
+                accumulator.filler_counts = dict(filler_analysis["filler_words"])
+                accumulator.total_fillers = filler_analysis["total_filler_count"]
+                accumulator.word_count = total_words
+                accumulator.speaking_seconds = total_speaking_time
+                accumulator.segment_count = len(user_segments)
+                accumulator.add_segment_paces(pace_analysis["segment_paces"])
+                accumulator.vocabulary = Counter(
+                    self.vocabulary_analyzer.content_words(stream.vocabulary_tokens))
+        
+        return self._build_result(
+            filler_analysis,
+            pace_analysis,
+            vocabulary_analysis,
+            total_words,
+            total_speaking_time,
+            self._calculate_confidence_score(filler_analysis, pace_analysis, vocabulary_analysis),
+            self._calculate_clarity_score(pace_analysis)
+        )
+    
+    def summarize_session(self, accumulator: SessionAccumulator) -> Dict:
+        """
+        Calculate cumulative metrics from a session's running state.
+        
+        Runs in time independent of how much of the session has been seen,
+        apart from picking the top words from the vocabulary counter.
+        
+        Args:
+            accumulator: The session's accumulator
             
-            if isinstance(start_time, datetime) and isinstance(end_time, datetime):
-                duration = (end_time - start_time).total_seconds()
-            else:
-                # Handle case where start/end might be float values
-                duration = float(end_time) - float(start_time)
+        Returns:
+            Metrics dictionary in the same shape as analyze_transcript's metrics
+        """
+        if accumulator.segment_count == 0:
+            return self._empty_result()["metrics"]
+        
+        filler_analysis = {
+            "filler_percentage": self.filler_word_analyzer.get_filler_percentage(
+                accumulator.total_fillers, accumulator.word_count)
+        }
+        
+        avg_wpm = self.pace_analyzer.calculate_words_per_minute(
+            accumulator.word_count, accumulator.speaking_seconds)
+        pace_analysis = {
+            "avg_wpm": avg_wpm,
+            "pace_variability": accumulator.pace_variability,
+            "pace_category": self.pace_analyzer.categorize_pace(avg_wpm)
+        }
+        
+        vocabulary_total = sum(accumulator.vocabulary.values())
+        vocabulary_analysis = {
+            "diversity_score": len(accumulator.vocabulary) / vocabulary_total if vocabulary_total else 0.0,
+            "unique_word_count": len(accumulator.vocabulary),
+            "total_word_count": vocabulary_total,
+            "top_words": accumulator.vocabulary.most_common(5)
+        }
+        
+        return {
+            "filler_words": dict(accumulator.filler_counts),
+            "total_filler_count": accumulator.total_fillers,
+            "words_per_minute": avg_wpm,
+            "pace_variability": pace_analysis["pace_variability"],
+            "total_words": accumulator.word_count,
+            "speaking_time_seconds": accumulator.speaking_seconds,
+            "vocabulary_diversity": vocabulary_analysis["diversity_score"],
+            "vocabulary_metrics": {
+                "top_words": vocabulary_analysis["top_words"],
+                "unique_word_count": vocabulary_analysis["unique_word_count"],
+                "total_word_count": vocabulary_total
+            },
+            "confidence_score": self._calculate_confidence_score(filler_analysis, pace_analysis, vocabulary_analysis),
+            "clarity_score": self._calculate_clarity_score(pace_analysis)
+        }
+    
+    def finalize_accumulator(self, accumulator: SessionAccumulator) -> Dict:
+        """
+        Build a full analysis result (metrics and suggestions) from accumulated totals.
+        
+        Used to score a day of speech from its rollup without re-reading or
+        re-analyzing the text, so suggestions carry no example sentences.
+        
+        Args:
+            accumulator: Totals of the segments to score
             
-            total_speaking_time += duration
+        Returns:
+            Dictionary in the same shape as analyze_transcript's result
+        """
+        if accumulator.segment_count == 0:
+            return self._empty_result()
         
-        # Run analyses in parallel using asyncio tasks
-        analyses = await asyncio.gather(
-            self._analyze_filler_words(combined_text),
-            self._analyze_pace(user_segments),
-            self._analyze_vocabulary(combined_text)
-        )
+        metrics = self.summarize_session(accumulator)
+        avg_wpm = metrics["words_per_minute"]
+        
+        suggestions = []
+        suggestions.extend(self.filler_word_analyzer.generate_improvement_suggestions(
+            metrics["filler_words"], metrics["total_filler_count"]))
+        suggestions.extend(self.pace_analyzer.generate_improvement_suggestions({
+            "avg_wpm": avg_wpm,
+            "pace_variability": metrics["pace_variability"],
+            "pace_category": self.pace_analyzer.categorize_pace(avg_wpm)
+        }))
+        suggestions.extend(self.vocabulary_analyzer.generate_improvement_suggestions({
+            "diversity_score": metrics["vocabulary_diversity"],
+            "top_words": metrics["vocabulary_metrics"]["top_words"],
+            "total_word_count": metrics["vocabulary_metrics"]["total_word_count"]
+        }))
         
-        filler_analysis, pace_analysis, vocabulary_analysis = analyses
+        return {
+            "metrics": metrics,
+            "suggestions": suggestions
+        }
+    
+    async def analyze_many(self, transcripts: Dict[Any, List[Dict]], use_cache: bool = True) -> Dict[Any, Dict]:
+        """
+        Analyze many transcripts (e.g. one per user) in bulk.
+        
+        With the process backend the transcripts are split into one chunk per
+        worker and the chunks are analyzed concurrently, so throughput scales
+        with cores. Other backends can't analyze in parallel, so they get a
+        single chunk.
+        Transcripts found in the result cache are not re-analyzed.
         
+        Args:
+            transcripts: Transcript segments keyed by an identifier such as the user ID
+            use_cache: Whether to use the result cache (see analyze_transcript)
+            
+        Returns:
+            Analysis results keyed like the input, each identical to what
+            analyze_transcript returns for that transcript, or an error entry
+            (see analyze_many_sync) for transcripts that failed
+        """
+        if not transcripts:
+            return {}
+        
+        results = {}
+        cache_keys = {}
+        use_cache = use_cache and self.result_cache is not None
+        if use_cache:
+            for key, transcript_segments in transcripts.items():
+                cache_keys[key] = analysis_cache_key(transcript_segments, self.config_version)
+                cached = await self.result_cache.get_async(cache_keys[key])
+                if cached is not None:
+                    results[key] = cached
+        
+        keys = [key for key in transcripts if key not in results]
+        if not keys:
+            return {key: results[key] for key in transcripts}
+        
+        chunk_count = min(len(keys), self.executor.parallelism)
+        chunk_size = -(-len(keys) // chunk_count)
+        chunks = [
+            {key: transcripts[key] for key in keys[i:i + chunk_size]}
+            for i in range(0, len(keys), chunk_size)
+        ]
+        
+        chunk_results = await asyncio.gather(*[
+            self.executor.run(self, "analyze_many_sync", chunk) for chunk in chunks
+        ])
+        
+        for chunk_result in chunk_results:
+            for key, result in chunk_result.items():
+                results[key] = result
+                if use_cache and "error" not in result:
+                    await self.result_cache.put_async(cache_keys[key], result)
+        return {key: results[key] for key in transcripts}
+    
+    def analyze_many_sync(self, transcripts: Dict[Any, List[Dict]]) -> Dict[Any, Dict]:
+        """
+        Analyze many transcripts on the calling thread.
+        
+        Segment paces are computed with NumPy across all transcripts at once;
+        tokenization, filler matching and vocabulary analysis reuse the
+        service's analyzers. A transcript that fails to analyze (e.g. a
+        segment without timestamps) doesn't affect the others: its result is
+        an error entry of the form {"error": "<message>"}.
+        
+        Args:
+            transcripts: Transcript segments keyed by an identifier such as the user ID
+            
+        Returns:
+            Analysis results keyed like the input
+        """
+        with stage_timings.stage("analyze_many"):
+            return self._analyze_many(transcripts)
+    
+    def _analyze_many(self, transcripts: Dict[Any, List[Dict]]) -> Dict[Any, Dict]:
+        """Body of analyze_many_sync."""
+        results = {}
+        keys = []
+        batches = []
+        streams = []
+        batch_durations = []
+        
+        for key, transcript_segments in transcripts.items():
+            try:
+                user_segments = [s for s in transcript_segments or [] if s.get("is_user_speaking", False)]
+                if not user_segments:
+                    results[key] = self._empty_result()
+                    continue
+                
+                # Validate timestamps per transcript so one bad segment only fails its own key
+                with stage_timings.stage("pace.durations"):
+                    durations = self.pace_analyzer.segment_durations(user_segments)
+                with stage_timings.stage("tokenize"):
+                    stream = TokenStream.from_segments(user_segments)
+            except Exception as e:
+                results[key] = self._error_result(key, e)
+                continue
+            
+            keys.append(key)
+            batches.append(user_segments)
+            streams.append(stream)
+            batch_durations.append(durations)
+        
+        logger.info(f"Analyzing {len(keys)} transcripts in bulk ({len(transcripts) - len(keys)} without user speech or invalid)")
+        
+        if keys:
+            with stage_timings.stage("pace.analyze_batches"):
+                pace_results = self.pace_analyzer.analyze_segment_batches(
+                    batches, [stream.segment_word_counts for stream in streams],
+                    np.concatenate(batch_durations))
+            
+            for index, key in enumerate(keys):
+                try:
+                    filler_analysis = self._analyze_filler_words(streams[index])
+                    vocabulary_analysis = self._analyze_vocabulary(streams[index])
+                    with stage_timings.stage("pace.suggestions"):
+                        pace_suggestions = self.pace_analyzer.generate_improvement_suggestions(pace_results[index])
+                    pace_analysis = {**pace_results[index], "suggestions": pace_suggestions}
+                    # Sequential sum keeps the float result identical to the single-call path
+                    total_speaking_time = float(np.cumsum(batch_durations[index])[-1])
+                    
+                    results[key] = self._build_result(
+                        filler_analysis,
+                        pace_analysis,
+                        vocabulary_analysis,
+                        streams[index].word_count,
+                        total_speaking_time,
+                        self._calculate_confidence_score(filler_analysis, pace_analysis, vocabulary_analysis),
+                        self._calculate_clarity_score(pace_analysis)
+                    )
+                except Exception as e:
+                    results[key] = self._error_result(key, e)
+        
+        return {key: results[key] for key in transcripts}
+    
+    def _error_result(self, key: Any, error: Exception) -> Dict:
+        """Result entry for a transcript that failed in analyze_many."""
+        logger.error(f"Error analyzing transcript {key}: {str(error)}")
+        return {"error": f"{type(error).__name__}: {error}"}
+    
+    def _empty_result(self) -> Dict:
+        """Result returned when there is no user speech to analyze."""
+        return {
+            "metrics": {
+                "filler_words": {},
+                "total_filler_count": 0,
+                "words_per_minute": 0,
+                "total_words": 0,
+                "speaking_time_seconds": 0,
+                "vocabulary_diversity": 0,
+                "confidence_score": 0,
+                "clarity_score": 0
+            },
+            "suggestions": []
+        }
+    
+    def _build_result(self, filler_analysis: Dict, pace_analysis: Dict, vocabulary_analysis: Dict, 
+                      total_words: int, total_speaking_time: float, 
+                      confidence_score: float, clarity_score: float) -> Dict:
+        """Combine analyzer outputs into the metrics and suggestions payload."""
         # Generate all improvement suggestions
         suggestions = []
         suggestions.extend(filler_analysis.get("suggestions", []))
@@ -124,8 +467,8 @@ class SpeechAnalyzerService:
                 "unique_word_count": vocabulary_analysis.get("unique_word_count", 0),
                 "total_word_count": vocabulary_analysis.get("total_word_count", 0)
             },
-            "confidence_score": self._calculate_confidence_score(filler_analysis, pace_analysis, vocabulary_analysis),
-            "clarity_score": self._calculate_clarity_score(pace_analysis)
+            "confidence_score": confidence_score,
+            "clarity_score": clarity_score
         }
         
         # Add vocabulary suggestions
@@ -136,18 +479,20 @@ class SpeechAnalyzerService:
             "suggestions": suggestions
         }
     
-    async def _analyze_filler_words(self, text: str) -> Dict:
-        """Analyze filler words in the text."""
-        filler_words, total_fillers = self.filler_word_analyzer.analyze_text(text)
-        total_words = count_words(text)
+    def _analyze_filler_words(self, stream: TokenStream) -> Dict:
+        """Analyze filler words in the token stream."""
+        with stage_timings.stage("filler_words.match"):
+            filler_words, total_fillers = self.filler_word_analyzer.analyze_stream(stream)
+        total_words = stream.word_count
         
         # Calculate percentage
         filler_percentage = self.filler_word_analyzer.get_filler_percentage(
             total_fillers, total_words)
         
         # Generate suggestions
-        suggestions = self.filler_word_analyzer.generate_improvement_suggestions(
-            filler_words, total_fillers, text)
+        with stage_timings.stage("filler_words.suggestions"):
+            suggestions = self.filler_word_analyzer.generate_improvement_suggestions(
+                filler_words, total_fillers, stream.text, stream=stream)
         
         return {
             "filler_words": filler_words,
@@ -156,21 +501,24 @@ class SpeechAnalyzerService:
             "suggestions": suggestions
         }
     
-    async def _analyze_pace(self, segments: List[Dict]) -> Dict:
+    def _analyze_pace(self, segments: List[Dict], stream: TokenStream) -> Dict:
         """Analyze speaking pace from segments."""
-        pace_analysis = self.pace_analyzer.analyze_segments(segments)
+        with stage_timings.stage("pace.analyze"):
+            pace_analysis = self.pace_analyzer.analyze_segments(
+                segments, word_counts=stream.segment_word_counts)
         
         # Generate suggestions
-        suggestions = self.pace_analyzer.generate_improvement_suggestions(pace_analysis)
+        with stage_timings.stage("pace.suggestions"):
+            suggestions = self.pace_analyzer.generate_improvement_suggestions(pace_analysis)
         
         return {
             **pace_analysis,
             "suggestions": suggestions
         }
     
-    async def _analyze_vocabulary(self, text: str) -> Dict:
+    def _analyze_vocabulary(self, stream: TokenStream) -> Dict:
         """Analyze vocabulary diversity and usage."""
-        if not text:
+        if not stream.text:
             return {
                 "diversity_score": 0.0,
                 "unique_word_count": 0,
@@ -180,10 +528,14 @@ class SpeechAnalyzerService:
             }
         
         # Get basic analysis
-        analysis = self.vocabulary_analyzer.analyze_text(text)
+        with stage_timings.stage("vocabulary.tokenize"):
+            tokens = stream.vocabulary_tokens
+        with stage_timings.stage("vocabulary.analyze"):
+            analysis = self.vocabulary_analyzer.analyze_tokens(tokens)
         
         # Generate suggestions
-        suggestions = self.vocabulary_analyzer.generate_improvement_suggestions(analysis, text)
+        with stage_timings.stage("vocabulary.suggestions"):
+            suggestions = self.vocabulary_analyzer.generate_improvement_suggestions(analysis, stream.text, stream=stream)
         
         # Combine results
         return {
@@ -191,6 +543,25 @@ class SpeechAnalyzerService:
             "suggestions": suggestions
         }
     
+    def _config_version(self) -> str:
+        """Hash of the analysis version and analyzer configuration, used in cache keys."""
+        config = {
+            "version": ANALYSIS_VERSION,
+            "filler_words": list(self.filler_word_analyzer.filler_words.keys()),
+            "pace_ranges": self.pace_analyzer.pace_ranges,
+            "stopwords": sorted(self.vocabulary_analyzer.stopwords)
+        }
+        payload = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    
+    def warm_up(self) -> None:
+        """Start the executor ahead of the first request."""
+        self.executor.warm_up(self)
+    
+    def shutdown(self) -> None:
+        """Shut down the executor."""
+        self.executor.shutdown()
+    
     def _calculate_confidence_score(self, filler_analysis: Dict, pace_analysis: Dict, vocabulary_analysis: Dict = None) -> float:
         """Calculate a confidence score based on various metrics."""
         filler_percentage = filler_analysis.get("filler_percentage", 0)
@@ -205,14 +576,7 @@ class SpeechAnalyzerService:
             score -= min(30, filler_percentage * 3)
         
         # Adjust based on pace
-        if pace_category == "too_slow":
-            score -= 15
-        elif pace_category == "slow":
-            score -= 5
-        elif pace_category == "fast":
-            score -= 5
-        elif pace_category == "too_fast":
-            score -= 15
+        score -= CONFIDENCE_PACE_PENALTY.get(pace_category, 0)
         
         # Adjust based on vocabulary diversity
         if vocabulary_analysis:
@@ -238,14 +602,7 @@ class SpeechAnalyzerService:
         score = 100
         
         # Adjust based on pace
-        if pace_category == "too_slow":
-            score -= 10
-        elif pace_category == "slow":
-            score -= 5
-        elif pace_category == "fast":
-            score -= 10
-        elif pace_category == "too_fast":
-            score -= 20
+        score -= CLARITY_PACE_PENALTY.get(pace_category, 0)
         
         # Adjust based on pace variability
         if pace_variability > 30:
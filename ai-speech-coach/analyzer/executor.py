@@ -0,0 +1,190 @@
+from typing import Any, Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from analyzer.instrumentation import stage_timings
+
+logger = logging.getLogger(__name__)
+
+# Supported executor backends
+EXECUTOR_BACKENDS = ("inline", "thread", "process")
+
+# Service preloaded in each worker process by the process pool initializer
+_worker_service = None
+
+# Seconds each warm-up task holds its worker, so the tasks spread over all workers
+WARM_UP_TASK_SECONDS = 0.05
+
+# Longest warm_up waits for every worker to start
+WARM_UP_TIMEOUT_SECONDS = 60
+
+
+def _init_worker(filler_word_analyzer, pace_analyzer, vocabulary_analyzer, timing_enabled=False):
+    """Install the owning service's analyzers once per worker process."""
+    global _worker_service
+    from analyzer.analyzer_service import SpeechAnalyzerService
+
+    stage_timings.enabled = timing_enabled
+    _worker_service = SpeechAnalyzerService(
+        executor_backend="inline",
+        filler_word_analyzer=filler_word_analyzer,
+        pace_analyzer=pace_analyzer,
+        vocabulary_analyzer=vocabulary_analyzer
+    )
+    logger.info(f"Preloaded analyzers in worker process {os.getpid()}")
+
+
+def _worker_pid(hold_seconds: float) -> int:
+    """Warm-up task: keep the worker busy briefly and report which process it is."""
+    time.sleep(hold_seconds)
+    return os.getpid()
+
+
+def _run_in_worker(method_name: str, *args) -> Any:
+    """
+    Call a synchronous method on the worker's preloaded service.
+
+    Returns the result together with the stage timings recorded for it, so
+    the parent process can fold them into its own histograms.
+    """
+    result = getattr(_worker_service, method_name)(*args)
+    return result, stage_timings.drain()
+
+
+class AnalyzerExecutor:
+    """
+    Runs CPU-bound analysis off the asyncio event loop.
+
+    Backends:
+    - inline: run on the calling thread (blocks the event loop, useful for scripts and tests)
+    - thread: run in a thread pool so the event loop keeps serving requests.
+      Analysis is pure Python, so threads don't run analyses in parallel.
+    - process: run in a process pool whose workers preload the analyzers,
+      so concurrent transcripts are analyzed in parallel across cores
+
+    The backend and pool size default to the ANALYZER_EXECUTOR and
+    ANALYZER_MAX_WORKERS environment variables. The pool is created lazily on
+    first use. A process pool is bound to the service it is first used with:
+    its workers get copies of that service's analyzers (so custom filler
+    words or pace ranges carry over), and it can't run another service.
+    """
+
+    def __init__(self, backend: Optional[str] = None, max_workers: Optional[int] = None):
+        """
+        Initialize the executor.
+
+        Args:
+            backend: One of "inline", "thread" or "process"
+            max_workers: Maximum number of worker threads or processes
+        """
+        self.backend = (backend or os.getenv("ANALYZER_EXECUTOR", "thread")).lower()
+        if self.backend not in EXECUTOR_BACKENDS:
+            raise ValueError(f"Unknown analyzer executor backend: {self.backend}")
+
+        env_workers = os.getenv("ANALYZER_MAX_WORKERS")
+        self.max_workers = max_workers or (int(env_workers) if env_workers else None)
+        self._executor: Optional[Executor] = None
+        self._bound_service: Any = None
+
+    @property
+    def worker_count(self) -> int:
+        """Number of pool workers."""
+        if self.backend == "inline":
+            return 1
+        return self.max_workers or os.cpu_count() or 1
+
+    @property
+    def parallelism(self) -> int:
+        """Number of analyses that actually run at the same time on separate cores."""
+        return self.worker_count if self.backend == "process" else 1
+
+    def _get_executor(self, service: Any) -> Optional[Executor]:
+        """Create the underlying pool on first use."""
+        if self.backend == "inline":
+            return None
+
+        if self.backend == "process" and self._bound_service is not None and service is not self._bound_service:
+            raise ValueError("This process executor already runs another service's analyzers")
+
+        if self._executor is None:
+            if self.backend == "thread":
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="analyzer")
+            else:
+                # Spawn avoids forking a process that is running an event loop
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(service.filler_word_analyzer, service.pace_analyzer,
+                              service.vocabulary_analyzer, stage_timings.enabled)
+                )
+                self._bound_service = service
+            logger.info(f"Started {self.backend} analyzer executor (max_workers={self.max_workers})")
+
+        return self._executor
+
+    async def run(self, service: Any, method_name: str, *args) -> Any:
+        """
+        Run a synchronous service method on the configured backend.
+
+        In process mode the method runs on the worker's copy of the service,
+        so arguments and results must be picklable.
+
+        Args:
+            service: Service whose method to run
+            method_name: Name of the synchronous method to call
+            *args: Arguments for the method
+
+        Returns:
+            The method's return value
+        """
+        executor = self._get_executor(service)
+
+        if executor is None:
+            return getattr(service, method_name)(*args)
+
+        loop = asyncio.get_running_loop()
+        if self.backend == "process":
+            result, worker_timings = await loop.run_in_executor(executor, _run_in_worker, method_name, *args)
+            if worker_timings:
+                stage_timings.merge(worker_timings)
+            return result
+        return await loop.run_in_executor(executor, getattr(service, method_name), *args)
+
+    def warm_up(self, service: Any) -> set:
+        """
+        Start the pool, and in process mode make every worker preload the service's analyzers.
+        
+        One worker can take several of a round of tasks, so rounds are
+        submitted until every worker process has reported its pid (a worker
+        runs the initializer before its first task).
+        
+        Returns:
+            Pids of the warmed-up worker processes (empty for other backends)
+        """
+        executor = self._get_executor(service)
+        pids = set()
+        if self.backend != "process":
+            return pids
+        
+        deadline = time.monotonic() + WARM_UP_TIMEOUT_SECONDS
+        while len(pids) < self.worker_count:
+            if time.monotonic() > deadline:
+                logger.warning(f"Only {len(pids)} of {self.worker_count} analyzer workers started during warm-up")
+                break
+            futures = [executor.submit(_worker_pid, WARM_UP_TASK_SECONDS) for _ in range(self.worker_count)]
+            pids.update(future.result() for future in futures)
+        return pids
+
+    def shutdown(self) -> None:
+        """Shut down the underlying pool, waiting for running analyses."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._bound_service = None
+            logger.info(f"Stopped {self.backend} analyzer executor")
@@ -0,0 +1,212 @@
+import re
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import logging
+
+from analyzer.tokenizer import TokenStream, LEXICAL_PATTERN, TOKEN_PHRASE, split_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class FillerMatch(NamedTuple):
+    """A filler word or phrase found in a token stream."""
+    filler: str
+    start: int
+    end: int
+    start_token: int
+    end_token: int
+
+
+class _TrieNode:
+    __slots__ = ("children", "filler", "priority")
+
+    def __init__(self):
+        # Root children are keyed by word, deeper children by (separator, word)
+        self.children = {}
+        self.filler = None
+        self.priority = None
+
+
+class FillerMatcher:
+    """
+    Token-level trie matcher for single- and multi-word filler phrases.
+
+    Matching walks the lexical tokens of a TokenStream once. It reproduces the
+    semantics of the alternation regex the analyzer used before
+    (``\\bum\\b|\\buh\\b|\\byou know\\b|...``): matches are non-overlapping,
+    scanned left to right, and when several fillers match at the same token
+    the one listed first wins. The cost per token is bounded by the length of
+    the longest phrase rather than by the size of the lexicon.
+    """
+
+    def __init__(self, filler_words: List[str]):
+        """
+        Build the trie from filler words and phrases.
+
+        Args:
+            filler_words: Filler words in priority order
+        """
+        self.filler_words = list(filler_words)
+        self.root = _TrieNode()
+        self.max_length = 0
+
+        # Fallback regex for lexicons the trie cannot represent exactly,
+        # compiled on first use since large lexicons make it expensive
+        self._pattern = None
+        self.use_regex = False
+
+        for priority, filler in enumerate(self.filler_words):
+            filler_lower = filler.lower()
+            if not TOKEN_PHRASE.fullmatch(filler_lower):
+                logger.warning(f"Filler '{filler}' can't be matched on tokens, using regex matching")
+                self.use_regex = True
+                break
+            self._insert(filler_lower, priority)
+
+    @property
+    def pattern(self) -> Optional[re.Pattern]:
+        """The equivalent alternation regex, compiled on first use."""
+        if self._pattern is None and self.filler_words:
+            self._pattern = re.compile(
+                "|".join(r"\b" + re.escape(word) + r"\b" for word in self.filler_words),
+                re.IGNORECASE
+            )
+        return self._pattern
+
+    def _insert(self, filler: str, priority: int) -> None:
+        """Insert a lowercased filler phrase into the trie."""
+        words = LEXICAL_PATTERN.findall(filler)
+        separators = re.split(r"\w+", filler)[1:-1]
+
+        node = self.root.children.setdefault(words[0], _TrieNode())
+        for separator, word in zip(separators, words[1:]):
+            node = node.children.setdefault((separator, word), _TrieNode())
+
+        # Keep the earliest priority when the same phrase is listed twice
+        if node.priority is None:
+            node.filler = filler
+            node.priority = priority
+        self.max_length = max(self.max_length, len(words))
+
+    def find(self, stream: TokenStream) -> List[FillerMatch]:
+        """
+        Find all filler matches in a token stream.
+
+        Args:
+            stream: Token stream to scan
+
+        Returns:
+            List of matches in text order
+        """
+        if not self.filler_words or not stream.words:
+            return []
+
+        if self.use_regex:
+            return self._find_regex(stream)
+
+        starts = stream.starts
+        ends = stream.ends
+        return [
+            FillerMatch(filler, starts[start_token], ends[end_token], start_token, end_token)
+            for filler, start_token, end_token in self._scan(stream.words, stream.separators)
+        ]
+
+    def count_text(self, text: str) -> Tuple[Dict[str, int], int]:
+        """
+        Count fillers in a piece of text without building a TokenStream.
+
+        Only the tokens and separators are extracted, so this is the cheap
+        path for callers that need counts but no positions or examples.
+
+        Args:
+            text: The text to scan
+
+        Returns:
+            Tuple of filler counts and total filler count
+        """
+        if not self.filler_words or not text:
+            return {}, 0
+
+        if self.use_regex:
+            filler_count = {}
+            for match in self.pattern.findall(text.lower()):
+                match = match.lower()
+                filler_count[match] = filler_count.get(match, 0) + 1
+            return filler_count, sum(filler_count.values())
+
+        words, separators = split_tokens(text)
+        filler_count = {}
+        total = 0
+        for filler, _, _ in self._scan(words, separators):
+            filler_count[filler] = filler_count.get(filler, 0) + 1
+            total += 1
+        return filler_count, total
+
+    def _scan(self, words: List[str], separators: List[str]) -> List[Tuple[str, int, int]]:
+        """
+        Walk the trie over lexical tokens.
+
+        Args:
+            words: Lowercased lexical tokens
+            separators: Text between consecutive tokens
+
+        Returns:
+            List of (filler, start_token, end_token) in text order
+        """
+        root_children = self.root.children
+        n = len(words)
+
+        matches = []
+        i = 0
+        while i < n:
+            node = root_children.get(words[i])
+            if node is None:
+                i += 1
+                continue
+
+            best = node if node.priority is not None else None
+            best_end = i
+            j = i
+            while node.children and j + 1 < n:
+                node = node.children.get((separators[j], words[j + 1]))
+                if node is None:
+                    break
+                j += 1
+                if node.priority is not None and (best is None or node.priority < best.priority):
+                    best = node
+                    best_end = j
+
+            if best is None:
+                i += 1
+                continue
+
+            matches.append((best.filler, i, best_end))
+            i = best_end + 1
+
+        return matches
+
+    def _find_regex(self, stream: TokenStream) -> List[FillerMatch]:
+        """Find matches with the alternation regex and map them onto tokens."""
+        matches = []
+        for match in self.pattern.finditer(stream.lower_text):
+            start_token = bisect_left(stream.starts, match.start())
+            end_token = max(start_token, bisect_left(stream.ends, match.end()))
+            matches.append(FillerMatch(
+                match.group().lower(), match.start(), match.end(), start_token, end_token))
+        return matches
+
+    @staticmethod
+    def count(matches: List[FillerMatch]) -> Tuple[Dict[str, int], int]:
+        """
+        Count matches per filler.
+
+        Args:
+            matches: Matches returned by find
+
+        Returns:
+            Tuple of filler counts and total filler count
+        """
+        filler_count = {}
+        for match in matches:
+            filler_count[match.filler] = filler_count.get(match.filler, 0) + 1
+        return filler_count, len(matches)
@@ -1,7 +1,9 @@
-import re
 from typing import Dict, List, Tuple
 import logging
 
+from analyzer.tokenizer import TokenStream, word_pattern
+from analyzer.filler_matcher import FillerMatcher, FillerMatch
+
 logger = logging.getLogger(__name__)
 
 class FillerWordAnalyzer:
@@ -40,9 +42,9 @@ class FillerWordAnalyzer:
         if custom_fillers:
             self.filler_words.update(custom_fillers)
         
-        # Prepare regex pattern for detecting filler words
-        filler_list = "|".join(r"\b" + re.escape(word) + r"\b" for word in self.filler_words.keys())
-        self.filler_pattern = re.compile(filler_list, re.IGNORECASE)
+        # Token-level trie used for matching; equivalent to an alternation
+        # regex over the filler words (see FillerMatcher.pattern)
+        self.matcher = FillerMatcher(list(self.filler_words.keys()))
         
         logger.info(f"FillerWordAnalyzer initialized with {len(self.filler_words)} filler words")
     
@@ -61,23 +63,45 @@ class FillerWordAnalyzer:
         if not text:
             return {}, 0
         
-        # Convert text to lowercase for case-insensitive matching
-        text_lower = text.lower()
+        # Counting needs no offsets or sentence index, so skip the TokenStream
+        filler_count, total_fillers = self.matcher.count_text(text)
         
-        # Find all filler word matches
-        matches = self.filler_pattern.findall(text_lower)
+        logger.debug(f"Found {total_fillers} filler words in text")
+        return filler_count, total_fillers
+    
+    def analyze_stream(self, stream: TokenStream) -> Tuple[Dict[str, int], int]:
+        """
+        Analyze a shared token stream for filler words.
         
-        # Count occurrences of each filler word
-        filler_count = {}
-        for match in matches:
-            match = match.lower()
-            filler_count[match] = filler_count.get(match, 0) + 1
+        Args:
+            stream: Token stream built by the analyzer service
+            
+        Returns:
+            Tuple containing:
+                - Dictionary of filler words and their counts
+                - Total count of filler words
+        """
+        if not stream.text:
+            return {}, 0
         
-        total_fillers = sum(filler_count.values())
+        # Count occurrences of each filler word
+        filler_count, total_fillers = FillerMatcher.count(self.find_matches(stream))
         
         logger.debug(f"Found {total_fillers} filler words in text")
         return filler_count, total_fillers
     
+    def find_matches(self, stream: TokenStream) -> List[FillerMatch]:
+        """
+        Find the position of every filler word in a token stream.
+        
+        Args:
+            stream: Token stream to scan
+            
+        Returns:
+            List of matches with character offsets and token indices
+        """
+        return self.matcher.find(stream)
+    
     def get_filler_percentage(self, filler_count: int, total_words: int) -> float:
         """
         Calculate the percentage of filler words in the text.
@@ -96,7 +120,8 @@ class FillerWordAnalyzer:
     
     def generate_improvement_suggestions(self, filler_analysis: Dict[str, int], 
                                          total_fillers: int, 
-                                         text: str = None) -> List[Dict]:
+                                         text: str = None,
+                                         stream: TokenStream = None) -> List[Dict]:
         """
         Generate improvement suggestions based on filler word analysis.
         
@@ -104,6 +129,8 @@ class FillerWordAnalyzer:
             filler_analysis: Dictionary of filler words and their counts
             total_fillers: Total count of filler words
             text: Optional original text for contextual examples
+            stream: Optional token stream of the text; its sentence index is
+                used to find examples without rescanning the text
             
         Returns:
             List of improvement suggestions
@@ -128,22 +155,18 @@ class FillerWordAnalyzer:
         }
         
         # If we have the original text, try to find an example
-        if text:
-            # Use regex to find the most common filler word in context
-            pattern = re.compile(r"[^.!?]*\b" + re.escape(most_common_filler) + r"\b[^.!?]*[.!?]", 
-                                 re.IGNORECASE)
-            examples = pattern.findall(text)
+        if stream is None and text:
+            stream = TokenStream.from_text(text)
+        
+        if stream is not None and stream.text:
+            # Look up the first sentence using the most common filler word
+            example = stream.find_example_sentence(most_common_filler)
             
-            if examples:
-                # Use the first example
-                example = examples[0].strip()
+            if example:
                 suggestion["example_text"] = example
                 
                 # Create improved example by replacing with a pause
-                improved = re.sub(r"\b" + re.escape(most_common_filler) + r"\b", 
-                                  "[pause]", 
-                                  example, 
-                                  flags=re.IGNORECASE)
+                improved = word_pattern(most_common_filler).sub("[pause]", example)
                 suggestion["improved_example"] = improved
         
         suggestions.append(suggestion)
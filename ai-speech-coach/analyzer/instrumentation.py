@@ -0,0 +1,174 @@
+from typing import Any, Dict, Optional
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket is unbounded
+BUCKET_BOUNDS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0]
+
+# Shared no-op context returned while timing is disabled
+_NULL_TIMER = nullcontext()
+
+
+class _StageTimer:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: "StageTimings", name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.timings.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        self.count += data["count"]
+        self.total += data["total_seconds"]
+        self.min = min(self.min, data["min_seconds"])
+        self.max = max(self.max, data["max_seconds"])
+        for index, count in enumerate(data["buckets"]):
+            self.buckets[index] += count
+
+    def percentile(self, fraction: float) -> float:
+        """Approximate percentile: the upper bound of the bucket that contains it."""
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "min_seconds": self.min if self.count else 0.0,
+            "max_seconds": self.max,
+            "p50_seconds": self.percentile(0.5),
+            "p95_seconds": self.percentile(0.95),
+            "buckets": list(self.buckets)
+        }
+
+
+class StageTimings:
+    """
+    In-process histograms of how long each analysis stage takes.
+
+    Code under measurement wraps each stage in ``with stage_timings.stage(name):``.
+    While disabled, stage() returns a shared no-op context manager, so the
+    cost is a method call. When enabled, each stage's duration is added to a
+    histogram with fixed buckets (BUCKET_BOUNDS), and snapshot() returns the
+    histograms for the /health/analyzer-timings endpoint or offline scripts.
+
+    Enabled when the ANALYZER_STAGE_TIMING environment variable is "true" or
+    "1", or with enable().
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        """
+        Initialize empty histograms.
+
+        Args:
+            enabled: Whether to record timings (defaults to ANALYZER_STAGE_TIMING)
+        """
+        if enabled is None:
+            enabled = os.getenv("ANALYZER_STAGE_TIMING", "false").lower() in ("1", "true")
+        self.enabled = enabled
+        self._histograms: Dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def stage(self, name: str):
+        """
+        Context manager timing one stage.
+
+        Args:
+            name: Stage name, e.g. "filler_words.match"
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add one duration to a stage's histogram."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram()
+            histogram.add(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current histograms keyed by stage name."""
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())}
+
+    def drain(self) -> Dict[str, Dict[str, Any]]:
+        """Return the current histograms and reset them."""
+        with self._lock:
+            data = {name: histogram.to_dict() for name, histogram in self._histograms.items()}
+            self._histograms = {}
+        return data
+
+    def merge(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """Fold histograms from drain() (e.g. from a worker process) into these."""
+        with self._lock:
+            for name, histogram_data in data.items():
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = _Histogram()
+                histogram.merge(histogram_data)
+
+    def reset(self) -> None:
+        """Clear all histograms."""
+        with self._lock:
+            self._histograms = {}
+
+    def report(self) -> str:
+        """Plain-text table of the histograms, slowest stages first."""
+        rows = sorted(self.snapshot().items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+        lines = [f"{'stage':<32} {'count':>8} {'total (s)':>10} {'mean (ms)':>10} {'p95 (ms)':>9} {'max (ms)':>9}"]
+        for name, data in rows:
+            lines.append(
+                f"{name:<32} {data['count']:>8} {data['total_seconds']:>10.3f} "
+                f"{data['mean_seconds'] * 1000:>10.3f} {data['p95_seconds'] * 1000:>9.2f} "
+                f"{data['max_seconds'] * 1000:>9.2f}"
+            )
+        return "\n".join(lines)
+
+
+# Timings shared by everything in this process
+stage_timings = StageTimings()
@@ -53,12 +53,14 @@ class PaceAnalyzer:
         
         return round(wpm, 1)
     
-    def analyze_segments(self, segments: List[Dict]) -> Dict:
+    def analyze_segments(self, segments: List[Dict], word_counts: List[int] = None) -> Dict:
         """
         Analyze speech pace across multiple segments.
         
         Args:
             segments: List of speech segments with text, start_time, and end_time
+            word_counts: Optional precomputed word count for each segment
+                (e.g. TokenStream.segment_word_counts); counted from the text if omitted
             
         Returns:
             Dictionary containing pace metrics
@@ -76,11 +78,12 @@ class PaceAnalyzer:
         segment_paces = []
         
         # Calculate pace for each segment
-        for segment in segments:
-            text = segment.get("text_content", "")
-            
+        for index, segment in enumerate(segments):
             # Calculate word count for this segment
-            words = len(text.split())
+            if word_counts is not None:
+                words = word_counts[index]
+            else:
+                words = len(segment.get("text_content", "").split())
             total_words += words
             
             # Calculate duration in seconds
@@ -115,20 +118,139 @@ class PaceAnalyzer:
         else:
             pace_variability = 0.0
         
-        # Determine pace category
-        pace_category = "optimal"
-        for category, (min_pace, max_pace) in self.pace_ranges.items():
-            if min_pace <= avg_wpm < max_pace:
-                pace_category = category
-                break
-        
         return {
             "avg_wpm": avg_wpm,
             "pace_variability": pace_variability,
-            "pace_category": pace_category,
+            "pace_category": self.categorize_pace(avg_wpm),
             "segment_paces": segment_paces
         }
     
+    def categorize_pace(self, avg_wpm: float) -> str:
+        """
+        Determine the pace category for a words-per-minute rate.
+        
+        Args:
+            avg_wpm: Average words per minute
+            
+        Returns:
+            Name of the matching pace range
+        """
+        for category, (min_pace, max_pace) in self.pace_ranges.items():
+            if min_pace <= avg_wpm < max_pace:
+                return category
+        return "optimal"
+    
+    def segment_durations(self, segments: List[Dict]) -> np.ndarray:
+        """
+        Calculate the duration of each segment in seconds.
+        
+        Float timestamps are subtracted as one vectorized operation; datetime
+        timestamps use timedelta arithmetic, matching analyze_segments exactly.
+        Missing or invalid timestamps raise the same errors as analyze_segments.
+        
+        Args:
+            segments: List of speech segments with start_time and end_time
+            
+        Returns:
+            Array of durations in seconds
+        """
+        start_times = [s.get("start_time") for s in segments]
+        end_times = [s.get("end_time") for s in segments]
+        
+        if any(isinstance(t, datetime) for t in start_times):
+            return np.array([
+                (end - start).total_seconds()
+                if isinstance(start, datetime) and isinstance(end, datetime)
+                else float(end) - float(start)
+                for start, end in zip(start_times, end_times)
+            ], dtype=float)
+        
+        durations = np.asarray(end_times, dtype=float) - np.asarray(start_times, dtype=float)
+        if np.isnan(durations).any():
+            # NumPy turns None into nan; redo the subtraction per segment so
+            # invalid timestamps raise exactly like analyze_segments
+            return np.array([
+                float(end) - float(start) for start, end in zip(start_times, end_times)
+            ], dtype=float)
+        return durations
+    
+    def analyze_segment_batches(self, batches: List[List[Dict]], 
+                                word_counts: List[List[int]], 
+                                durations: np.ndarray = None) -> List[Dict]:
+        """
+        Analyze speech pace for many independent segment lists at once.
+        
+        Per-segment durations and words-per-minute rates are computed with
+        NumPy over all batches together. Each result is identical to calling
+        analyze_segments on that batch alone.
+        
+        Args:
+            batches: One list of speech segments per transcript
+            word_counts: Word count of each segment, per batch
+            durations: Optional precomputed durations for the flattened segments
+            
+        Returns:
+            List of pace analysis dictionaries, one per batch
+        """
+        flat_segments = [segment for batch in batches for segment in batch]
+        if durations is None:
+            durations = self.segment_durations(flat_segments)
+        words = np.fromiter((count for counts in word_counts for count in counts),
+                            dtype=np.int64, count=len(flat_segments))
+        
+        # Per-segment rates for every segment with a positive duration
+        positive = durations > 0
+        rates = words[positive] / (durations[positive] / 60.0)
+        rounded_rates = [round(rate, 1) for rate in rates.tolist()]
+        
+        duration_list = durations.tolist()
+        word_list = words.tolist()
+        positive_counts = np.cumsum(positive)
+        
+        results = []
+        offset = 0
+        for batch in batches:
+            end = offset + len(batch)
+            if not batch:
+                results.append(self.analyze_segments([]))
+                continue
+            
+            # Index range of this batch's rates within rounded_rates
+            rate_start = int(positive_counts[offset - 1]) if offset > 0 else 0
+            rate_end = int(positive_counts[end - 1])
+            
+            segment_paces = []
+            rate_index = rate_start
+            for index in range(offset, end):
+                if positive[index]:
+                    segment_paces.append({
+                        "segment_id": flat_segments[index].get("segment_id", None),
+                        "wpm": rounded_rates[rate_index],
+                        "duration_seconds": duration_list[index],
+                        "word_count": word_list[index]
+                    })
+                    rate_index += 1
+            
+            # Sequential sum keeps the float result identical to the per-segment loop
+            total_seconds = float(np.cumsum(durations[offset:end])[-1])
+            total_words = sum(word_list[offset:end])
+            avg_wpm = self.calculate_words_per_minute(total_words, total_seconds)
+            
+            if rate_end - rate_start > 1:
+                pace_variability = float(np.std(rounded_rates[rate_start:rate_end]))
+            else:
+                pace_variability = 0.0
+            
+            results.append({
+                "avg_wpm": avg_wpm,
+                "pace_variability": pace_variability,
+                "pace_category": self.categorize_pace(avg_wpm),
+                "segment_paces": segment_paces
+            })
+            offset = end
+        
+        return results
+    
     def generate_improvement_suggestions(self, pace_analysis: Dict) -> List[Dict]:
         """
         Generate improvement suggestions based on pace analysis.
@@ -0,0 +1,124 @@
+from typing import Any, Callable, Dict, Optional
+import logging
+import threading
+import time
+from collections import Counter
+
+from analyzer.filler_words import FillerWordAnalyzer
+from analyzer.pace import PaceAnalyzer
+from analyzer.vocabulary import VocabularyAnalyzer
+from analyzer.result_cache import AnalysisResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyzerRegistry:
+    """
+    Process-wide provider of analyzer instances.
+
+    Each analyzer (and the SpeechAnalyzerService built on top of them) is
+    constructed once per process and shared by the FastAPI routers, the
+    end-of-day job and the MCP tools. Construction and lookup counters show
+    whether anything is still being built on the request path: after
+    warm_up, constructions_after_warm_up should stay at zero.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self.construction_counts: Counter = Counter()
+        self.construction_seconds: Dict[str, float] = {}
+        self.lookup_counts: Counter = Counter()
+        self.constructions_after_warm_up = 0
+        self.warmed_up = False
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Return the named instance, building it on first use."""
+        self.lookup_counts[name] += 1
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                start = time.perf_counter()
+                instance = factory()
+                self.construction_seconds[name] = time.perf_counter() - start
+                self.construction_counts[name] += 1
+                if self.warmed_up:
+                    self.constructions_after_warm_up += 1
+                    logger.warning(f"Analyzer '{name}' was constructed after warm-up")
+                self._instances[name] = instance
+        return instance
+
+    def filler_word_analyzer(self) -> FillerWordAnalyzer:
+        """Get the shared filler word analyzer."""
+        return self._get("filler_word_analyzer", FillerWordAnalyzer)
+
+    def pace_analyzer(self) -> PaceAnalyzer:
+        """Get the shared pace analyzer."""
+        return self._get("pace_analyzer", PaceAnalyzer)
+
+    def vocabulary_analyzer(self) -> VocabularyAnalyzer:
+        """Get the shared vocabulary analyzer."""
+        return self._get("vocabulary_analyzer", VocabularyAnalyzer)
+
+    def result_cache(self) -> AnalysisResultCache:
+        """Get the shared analysis result cache."""
+        return self._get("result_cache", AnalysisResultCache)
+
+    def speech_analyzer_service(self):
+        """Get the shared speech analyzer service, built from the shared analyzers."""
+        from analyzer.analyzer_service import SpeechAnalyzerService
+
+        return self._get("speech_analyzer_service", lambda: SpeechAnalyzerService(
+            filler_word_analyzer=self.filler_word_analyzer(),
+            pace_analyzer=self.pace_analyzer(),
+            vocabulary_analyzer=self.vocabulary_analyzer(),
+            result_cache=self.result_cache()
+        ))
+
+    def warm_up(self) -> None:
+        """Build every analyzer and start the service's executor ahead of the first request."""
+        self.speech_analyzer_service().warm_up()
+        self.warmed_up = True
+        logger.info(f"Analyzer registry warmed up: {dict(self.construction_counts)}")
+
+    def shutdown(self) -> None:
+        """Shut down the service's executor if it was built."""
+        service = self._instances.get("speech_analyzer_service")
+        if service is not None:
+            service.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        """Construction and lookup counters, and result cache metrics, for monitoring."""
+        cache = self._instances.get("result_cache")
+        return {
+            "warmed_up": self.warmed_up,
+            "constructions": dict(self.construction_counts),
+            "construction_seconds": dict(self.construction_seconds),
+            "lookups": dict(self.lookup_counts),
+            "constructions_after_warm_up": self.constructions_after_warm_up,
+            "result_cache": cache.stats() if cache is not None else None
+        }
+
+
+# Registry shared by everything in this process
+analyzer_registry = AnalyzerRegistry()
+
+
+def get_analyzer_registry() -> AnalyzerRegistry:
+    """Dependency for getting the process-wide analyzer registry."""
+    return analyzer_registry
+
+
+def get_analyzer_service():
+    """Dependency for getting the shared SpeechAnalyzerService."""
+    return analyzer_registry.speech_analyzer_service()
+
+
+def get_filler_word_analyzer() -> FillerWordAnalyzer:
+    """Dependency for getting the shared FillerWordAnalyzer."""
+    return analyzer_registry.filler_word_analyzer()
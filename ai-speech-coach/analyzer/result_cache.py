@@ -0,0 +1,222 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Segment fields that influence analysis results
+CACHE_KEY_FIELDS = ("text_content", "is_user_speaking", "start_time", "end_time")
+
+
+def analysis_cache_key(segments: List[Dict], config_version: str, kind: str = "transcript") -> str:
+    """
+    Stable content hash of transcript segments and analyzer configuration.
+
+    Only the fields the analyzers read are hashed, so byte-identical
+    transcripts (e.g. a retried webhook) map to the same key regardless of
+    extra fields or dictionary order.
+
+    Args:
+        segments: Transcript segments in the analyzer's internal format
+        config_version: Version of the analyzer configuration
+            (see SpeechAnalyzerService.config_version)
+        kind: What is cached under the key, e.g. "transcript" or "session_chunk"
+
+    Returns:
+        Hex digest usable as a cache key
+    """
+    normalized = [[s.get(field) for field in CACHE_KEY_FIELDS] for s in segments or []]
+    payload = json.dumps([kind, config_version, normalized], default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisResultCache:
+    """
+    Bounded cache of analysis results keyed by content hash.
+
+    The in-memory tier holds at most max_entries results with LRU eviction and
+    drops entries older than the TTL. When a cache directory is configured,
+    results are also written there as JSON so other worker processes (or the
+    same process after a restart) can reuse them; disk entries expire on the
+    same TTL.
+
+    Defaults come from the ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_TTL_SECONDS and ANALYSIS_CACHE_DIR environment variables.
+    A max_entries of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 cache_dir: Optional[str] = None):
+        """
+        Initialize the result cache.
+
+        Args:
+            max_entries: Maximum number of results kept in memory
+            ttl_seconds: Age after which a cached result is discarded
+            cache_dir: Optional directory for the shared on-disk tier
+        """
+        self.max_entries = (max_entries if max_entries is not None
+                            else int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 1024)))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", 3600))
+        self.cache_dir = cache_dir or os.getenv("ANALYSIS_CACHE_DIR")
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached result.
+
+        Args:
+            key: Key from analysis_cache_key
+
+        Returns:
+            A copy of the cached result, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        value = self._get_memory(key)
+        if value is None and self.cache_dir:
+            value = self._load(key)
+            if value is not None:
+                self.disk_hits += 1
+                self._put_memory(key, value)
+
+        return self._count(value)
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Cache a result.
+
+        Args:
+            key: Key from analysis_cache_key
+            value: JSON-serializable analysis result
+        """
+        if not self.enabled:
+            return
+        self._put_memory(key, copy.deepcopy(value))
+        if self.cache_dir:
+            self._save(key, value)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """Like get, but reads the disk tier in a thread so the event loop isn't blocked."""
+        if not self.enabled:
+            return None
+
+        value = self._get_memory(key)
+        if value is None and self.cache_dir:
+            value = await asyncio.to_thread(self._load, key)
+            if value is not None:
+                self.disk_hits += 1
+                self._put_memory(key, value)
+
+        return self._count(value)
+
+    async def put_async(self, key: str, value: Any) -> None:
+        """Like put, but writes the disk tier in a thread so the event loop isn't blocked."""
+        if not self.enabled:
+            return
+        self._put_memory(key, copy.deepcopy(value))
+        if self.cache_dir:
+            await asyncio.to_thread(self._save, key, value)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def _count(self, value: Optional[Any]) -> Optional[Any]:
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Callers get their own copy so they can't modify the cached result
+        return copy.deepcopy(value)
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key: str, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _save(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(value, f, default=str)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error writing analysis cache entry {key}: {str(e)}")
+
+    def _load(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return _restore_top_words(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading analysis cache entry {key}: {str(e)}")
+            return None
+
+
+def _restore_top_words(value: Any) -> Any:
+    """JSON turns the (word, count) tuples of vocabulary top_words into lists; turn them back."""
+    results = value if isinstance(value, list) else [value]
+    for result in results:
+        metrics = result.get("metrics") if isinstance(result, dict) else None
+        if metrics and "vocabulary_metrics" in metrics:
+            vocabulary_metrics = metrics["vocabulary_metrics"]
+            vocabulary_metrics["top_words"] = [tuple(item) for item in vocabulary_metrics.get("top_words", [])]
+    return value
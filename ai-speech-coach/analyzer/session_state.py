@@ -0,0 +1,388 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_fingerprint(segments: List[Dict]) -> str:
+    """
+    Stable fingerprint of a chunk of transcript segments.
+
+    Webhook retries deliver the same segments again, so the fingerprint is
+    used to recognise chunks that were already merged into a session.
+
+    Args:
+        segments: Segments in the analyzer's internal format
+
+    Returns:
+        Hex digest identifying the chunk
+    """
+    normalized = [
+        [s.get("text_content"), s.get("speaker_identification"), s.get("is_user_speaking"),
+         s.get("start_time"), s.get("end_time")]
+        for s in segments
+    ]
+    payload = json.dumps(normalized, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class SessionAccumulator:
+    """
+    Mergeable running totals for one speaking session.
+
+    Holds everything needed to report cumulative session metrics without
+    re-analyzing earlier chunks: filler counts, word and duration totals,
+    running moments of segment WPM (for variability) and the vocabulary
+    counter. Two accumulators can be merged, so each webhook call builds one
+    for its own chunk and folds it into the session's accumulator. The
+    fingerprints of merged chunks are kept so a retried chunk is only
+    counted once.
+    """
+
+    def __init__(self):
+        """Initialize an empty accumulator."""
+        self.filler_counts: Dict[str, int] = {}
+        self.total_fillers = 0
+        self.word_count = 0
+        self.speaking_seconds = 0.0
+        self.segment_count = 0
+        self.vocabulary: Counter = Counter()
+        self.chunk_ids: set = set()
+
+        # Running moments of segment WPM (count, mean, sum of squared deviations)
+        self.pace_count = 0
+        self.pace_mean = 0.0
+        self.pace_m2 = 0.0
+
+    def add_segment_paces(self, segment_paces: List[Dict]) -> None:
+        """Update the running WPM moments with per-segment paces."""
+        for pace in segment_paces:
+            self.pace_count += 1
+            delta = pace["wpm"] - self.pace_mean
+            self.pace_mean += delta / self.pace_count
+            self.pace_m2 += delta * (pace["wpm"] - self.pace_mean)
+
+    def merge(self, other: "SessionAccumulator") -> "SessionAccumulator":
+        """
+        Fold another accumulator into this one.
+
+        Args:
+            other: Accumulator for later segments of the same session
+
+        Returns:
+            This accumulator, for chaining
+        """
+        for filler, count in other.filler_counts.items():
+            self.filler_counts[filler] = self.filler_counts.get(filler, 0) + count
+        self.total_fillers += other.total_fillers
+        self.word_count += other.word_count
+        self.speaking_seconds += other.speaking_seconds
+        self.segment_count += other.segment_count
+        self.vocabulary.update(other.vocabulary)
+        self.chunk_ids.update(other.chunk_ids)
+
+        # Combine WPM moments with the parallel variance formula
+        count = self.pace_count + other.pace_count
+        if count:
+            delta = other.pace_mean - self.pace_mean
+            self.pace_mean += delta * other.pace_count / count
+            self.pace_m2 += other.pace_m2 + delta * delta * self.pace_count * other.pace_count / count
+        self.pace_count = count
+
+        return self
+
+    @property
+    def pace_variability(self) -> float:
+        """Population standard deviation of segment WPM, as np.std computes it."""
+        if self.pace_count <= 1:
+            return 0.0
+        return math.sqrt(max(self.pace_m2, 0.0) / self.pace_count)
+
+    @property
+    def pace_sum(self) -> float:
+        """Sum of segment WPM."""
+        return self.pace_mean * self.pace_count
+
+    @property
+    def pace_sum_squares(self) -> float:
+        """Sum of squared segment WPM."""
+        return self.pace_m2 + self.pace_count * self.pace_mean * self.pace_mean
+
+    def set_pace_sums(self, count: int, total: float, total_squares: float) -> None:
+        """Set the WPM moments from a count, sum and sum of squares (e.g. from a database row)."""
+        self.pace_count = count
+        self.pace_mean = total / count if count else 0.0
+        self.pace_m2 = max(total_squares - total * self.pace_mean, 0.0) if count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the accumulator to JSON-compatible data."""
+        return {
+            "filler_counts": self.filler_counts,
+            "total_fillers": self.total_fillers,
+            "word_count": self.word_count,
+            "speaking_seconds": self.speaking_seconds,
+            "segment_count": self.segment_count,
+            "vocabulary": dict(self.vocabulary),
+            "chunk_ids": sorted(self.chunk_ids),
+            "pace_count": self.pace_count,
+            "pace_mean": self.pace_mean,
+            "pace_m2": self.pace_m2
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionAccumulator":
+        """Rebuild an accumulator from to_dict output."""
+        accumulator = cls()
+        accumulator.filler_counts = dict(data.get("filler_counts", {}))
+        accumulator.total_fillers = data.get("total_fillers", 0)
+        accumulator.word_count = data.get("word_count", 0)
+        accumulator.speaking_seconds = data.get("speaking_seconds", 0.0)
+        accumulator.segment_count = data.get("segment_count", 0)
+        accumulator.vocabulary = Counter(data.get("vocabulary", {}))
+        accumulator.chunk_ids = set(data.get("chunk_ids", []))
+        accumulator.pace_count = data.get("pace_count", 0)
+        accumulator.pace_mean = data.get("pace_mean", 0.0)
+        accumulator.pace_m2 = data.get("pace_m2", 0.0)
+        return accumulator
+
+
+class SessionStore:
+    """
+    In-memory store of session accumulators with TTL eviction.
+
+    Sessions idle for longer than the TTL are evicted, and the store holds at
+    most max_sessions (least recently used first out). When a persistence
+    directory is configured, each merged chunk is appended to the session's
+    log file (one JSON line per chunk) by a background writer thread, so a
+    session can be picked up again after eviction or a restart without
+    rewriting its whole state or blocking the event loop. Evicted sessions
+    are read back on the same thread, after any appends still queued for
+    them; get_async and merge_async wait for that read without blocking the
+    event loop.
+
+    Defaults come from the SESSION_STATE_TTL_SECONDS, SESSION_STATE_MAX_SESSIONS
+    and SESSION_STATE_DIR environment variables.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_sessions: Optional[int] = None,
+                 persist_dir: Optional[str] = None):
+        """
+        Initialize the session store.
+
+        Args:
+            ttl_seconds: Idle time after which a session is evicted
+            max_sessions: Maximum number of sessions kept in memory
+            persist_dir: Optional directory to persist accumulators to
+        """
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SESSION_STATE_TTL_SECONDS", 1800))
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_STATE_MAX_SESSIONS", 10000))
+        self.persist_dir = persist_dir or os.getenv("SESSION_STATE_DIR")
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+        if self.persist_dir:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            # A single writer thread keeps appends to a session file in order
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-state")
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_key: str) -> Optional[SessionAccumulator]:
+        """
+        Get a session's accumulator if it hasn't expired.
+
+        Args:
+            session_key: Session identifier
+
+        Returns:
+            The accumulator, or None if the session is unknown or expired
+        """
+        accumulator = self._get_memory(session_key)
+        if accumulator is not None:
+            return accumulator
+
+        accumulator = self._load(session_key)
+        if accumulator is not None:
+            self._put(session_key, accumulator)
+        return accumulator
+
+    async def get_async(self, session_key: str) -> Optional[SessionAccumulator]:
+        """Like get, but an evicted session's log is read without blocking the event loop."""
+        accumulator = self._get_memory(session_key)
+        if accumulator is not None or not self.persist_dir:
+            return accumulator
+
+        if self._writer is not None:
+            loaded = await asyncio.wrap_future(self._writer.submit(self._read, session_key))
+        else:
+            loaded = await asyncio.to_thread(self._read, session_key)
+
+        # Another request for the session may have put it back while this one waited
+        accumulator = self._get_memory(session_key)
+        if accumulator is not None:
+            return accumulator
+        if loaded is not None:
+            self._put(session_key, loaded)
+        return loaded
+
+    def merge(self, session_key: str, delta: SessionAccumulator,
+              chunk_id: Optional[str] = None) -> SessionAccumulator:
+        """
+        Fold a chunk's accumulator into the session's running state.
+
+        Args:
+            session_key: Session identifier
+            delta: Accumulator built from the new segments only
+            chunk_id: Optional fingerprint of the chunk (see chunk_fingerprint);
+                a chunk that was already merged is skipped
+
+        Returns:
+            The session's cumulative accumulator
+        """
+        return self._merge_into(session_key, self.get(session_key), delta, chunk_id)
+
+    async def merge_async(self, session_key: str, delta: SessionAccumulator,
+                          chunk_id: Optional[str] = None) -> SessionAccumulator:
+        """Like merge, but an evicted session's log is read without blocking the event loop."""
+        return self._merge_into(session_key, await self.get_async(session_key), delta, chunk_id)
+
+    def _merge_into(self, session_key: str, accumulator: Optional[SessionAccumulator],
+                    delta: SessionAccumulator, chunk_id: Optional[str]) -> SessionAccumulator:
+        if accumulator is None:
+            accumulator = SessionAccumulator()
+
+        if chunk_id is not None:
+            if chunk_id in accumulator.chunk_ids:
+                logger.info(f"Skipping already merged chunk {chunk_id} for session {session_key}")
+                self._put(session_key, accumulator)
+                return accumulator
+            delta.chunk_ids.add(chunk_id)
+
+        accumulator.merge(delta)
+
+        self._put(session_key, accumulator)
+        self._save(session_key, delta)
+        return accumulator
+
+    def discard(self, session_key: str) -> None:
+        """Forget a session, including its persisted copy."""
+        self._sessions.pop(session_key, None)
+        path = self._path(session_key)
+        if path and self._writer is not None:
+            self._writer.submit(self._remove_file, path)
+        elif path:
+            self._remove_file(path)
+
+    def flush(self) -> None:
+        """Wait until every pending write has reached disk."""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def close(self) -> None:
+        """Flush pending writes and stop the writer thread."""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def evict_expired(self) -> int:
+        """
+        Evict sessions idle for longer than the TTL.
+
+        Returns:
+            Number of sessions evicted
+        """
+        cutoff = time.monotonic() - self.ttl_seconds
+        evicted = 0
+        # Entries are kept in access order, so expired ones are at the front
+        while self._sessions:
+            session_key, (_, last_access) = next(iter(self._sessions.items()))
+            if last_access > cutoff:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+
+        if evicted:
+            logger.info(f"Evicted {evicted} idle analysis sessions")
+        return evicted
+
+    def _get_memory(self, session_key: str) -> Optional[SessionAccumulator]:
+        self.evict_expired()
+        entry = self._sessions.get(session_key)
+        if entry is None:
+            return None
+        self._sessions[session_key] = (entry[0], time.monotonic())
+        self._sessions.move_to_end(session_key)
+        return entry[0]
+
+    def _put(self, session_key: str, accumulator: SessionAccumulator) -> None:
+        self._sessions[session_key] = (accumulator, time.monotonic())
+        self._sessions.move_to_end(session_key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _path(self, session_key: str) -> Optional[str]:
+        if not self.persist_dir:
+            return None
+        safe_key = re.sub(r"[^A-Za-z0-9_.-]", "_", session_key)
+        return os.path.join(self.persist_dir, f"{safe_key}.jsonl")
+
+    def _save(self, session_key: str, delta: SessionAccumulator) -> None:
+        """Queue the chunk's accumulator for appending to the session log."""
+        path = self._path(session_key)
+        if not path or self._writer is None:
+            return
+        # Serialize now so the writer thread never touches live accumulators
+        line = json.dumps(delta.to_dict()) + "\n"
+        self._writer.submit(self._append, session_key, path, line)
+
+    @staticmethod
+    def _append(session_key: str, path: str, line: str) -> None:
+        try:
+            with open(path, "a") as f:
+                f.write(line)
+        except OSError as e:
+            logger.error(f"Error persisting session state for {session_key}: {str(e)}")
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _load(self, session_key: str) -> Optional[SessionAccumulator]:
+        if not self.persist_dir:
+            return None
+        if self._writer is not None:
+            # Read on the writer thread, after appends still queued from before the eviction
+            return self._writer.submit(self._read, session_key).result()
+        return self._read(session_key)
+
+    def _read(self, session_key: str) -> Optional[SessionAccumulator]:
+        path = self._path(session_key)
+        if not os.path.exists(path):
+            return None
+
+        # Persisted sessions expire on the same TTL as in-memory ones
+        if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+            os.remove(path)
+            return None
+
+        try:
+            accumulator = SessionAccumulator()
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        accumulator.merge(SessionAccumulator.from_dict(json.loads(line)))
+            return accumulator
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading session state for {session_key}: {str(e)}")
+            return None
@@ -0,0 +1,297 @@
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import logging
+from nltk.tokenize import word_tokenize
+
+logger = logging.getLogger(__name__)
+
+# Whitespace-delimited words are what the analyzers count as "words"
+WORD_PATTERN = re.compile(r"\S+")
+
+# Runs of word characters, i.e. the units a \b...\b regex would match on
+LEXICAL_PATTERN = re.compile(r"\w+")
+
+# Capturing form of LEXICAL_PATTERN, so re.split keeps the words between separators
+LEXICAL_SPLIT_PATTERN = re.compile(r"(\w+)")
+
+# Sentence terminators used when looking for example sentences
+SENTENCE_TERMINATORS = re.compile(r"[.!?]")
+
+# Phrases that can be looked up on lexical tokens: word runs separated by non-word characters
+TOKEN_PHRASE = re.compile(r"\w+(?:\W+\w+)*")
+
+
+@lru_cache(maxsize=1024)
+def word_pattern(word: str) -> re.Pattern:
+    """Compiled, cached case-insensitive pattern matching a whole word or phrase."""
+    return re.compile(r"\b" + re.escape(word) + r"\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def sentence_pattern(word: str) -> re.Pattern:
+    """Compiled, cached pattern matching a terminated sentence that contains a word or phrase."""
+    return re.compile(r"[^.!?]*\b" + re.escape(word) + r"\b[^.!?]*[.!?]", re.IGNORECASE)
+
+
+def split_tokens(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Split text into lowercased lexical tokens and the separators between them.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        Tuple of (words, separators) where separators[i] is the text between
+        words[i] and words[i + 1]
+    """
+    parts = LEXICAL_SPLIT_PATTERN.split(text)
+    original_words = parts[1::2]
+    if not original_words:
+        return [], []
+    # Lowercase all words in one call; "\x00" is never part of a token
+    words = "\x00".join(original_words).lower().split("\x00")
+    return words, parts[2:-1:2]
+
+
+class Token(NamedTuple):
+    """A single lexical token with its position in the combined text."""
+    text: str
+    start: int
+    end: int
+    segment_index: int
+    sentence_index: int
+
+
+class TokenStream:
+    """
+    Shared tokenization of a transcript, built once and consumed by every analyzer.
+
+    The stream keeps the combined text of all segments (joined by a single space,
+    exactly as the analyzer service used to build it) together with:
+
+    - whitespace word counts, overall and per segment
+    - lowercased lexical tokens (runs of word characters) with character offsets
+      and the separator text between consecutive tokens
+    - lazily built sentence boundaries based on '.', '!' and '?', and the
+      segment and sentence membership of each token
+    - a lazily computed NLTK token list for vocabulary analysis
+
+    Filler matching only needs the tokens and their offsets, so callers that
+    never ask for example sentences don't pay for the sentence index.
+    """
+
+    def __init__(self, texts: List[str]):
+        """
+        Tokenize a list of segment texts.
+
+        Args:
+            texts: Text content of each segment, in order
+        """
+        self.text = " ".join(texts)
+        self.lower_text = self.text.lower()
+
+        # Character offsets where each segment starts in the combined text
+        self.segment_offsets: List[int] = []
+        self.segment_word_counts: List[int] = []
+
+        offset = 0
+        for text in texts:
+            self.segment_offsets.append(offset)
+            self.segment_word_counts.append(len(text.split()))
+            offset += len(text) + 1
+
+        self.word_count = sum(self.segment_word_counts)
+
+        # Lexical tokens in parallel lists for compact storage. Splitting the
+        # combined text keeps the work in C: the parts alternate separator,
+        # word, separator, ... and their running lengths give the offsets.
+        # Segments are joined by a space, so no token spans two segments.
+        parts = LEXICAL_SPLIT_PATTERN.split(self.text)
+        original_words = parts[1::2]
+        offsets = list(accumulate(map(len, parts)))
+        self.words: List[str] = (
+            "\x00".join(original_words).lower().split("\x00") if original_words else []
+        )
+        self.separators: List[str] = parts[2:-1:2]
+        self.ends: List[int] = offsets[1::2]
+        self.starts: List[int] = offsets[0:2 * len(self.words):2]
+
+        # Token index where each segment's lexical tokens begin
+        self.segment_token_offsets: List[int] = [
+            bisect_left(self.starts, offset) for offset in self.segment_offsets
+        ]
+
+        # Sentence and membership indexes are only needed for example
+        # lookups, so they are built on first use
+        self._sentence_spans: Optional[List[Tuple[int, int]]] = None
+        self._sentence_terminated: Optional[List[bool]] = None
+        self._sentence_ids: Optional[List[int]] = None
+        self._segment_ids: Optional[List[int]] = None
+        self._vocabulary_tokens: Optional[List[str]] = None
+        self._word_positions: Optional[Dict[str, List[int]]] = None
+
+        logger.debug(f"Tokenized {len(texts)} segments into {len(self.words)} lexical tokens")
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict]) -> "TokenStream":
+        """
+        Build a token stream from transcript segments.
+
+        Args:
+            segments: List of segments with a text_content field
+
+        Returns:
+            TokenStream over the segments' combined text
+        """
+        return cls([s.get("text_content", "") for s in segments])
+
+    @classmethod
+    def from_text(cls, text: str) -> "TokenStream":
+        """
+        Build a token stream from a single piece of text.
+
+        Args:
+            text: The text to tokenize
+
+        Returns:
+            TokenStream over the text
+        """
+        return cls([text or ""])
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _build_sentence_index(self) -> None:
+        """Split the text into sentences and assign each token to one."""
+        # Sentence spans as (start, end) offsets; end is exclusive and includes the terminator
+        spans: List[Tuple[int, int]] = []
+        terminated: List[bool] = []
+        start = 0
+        for match in SENTENCE_TERMINATORS.finditer(self.text):
+            spans.append((start, match.end()))
+            terminated.append(True)
+            start = match.end()
+        if start < len(self.text):
+            spans.append((start, len(self.text)))
+            terminated.append(False)
+
+        sentence_starts = [span[0] for span in spans]
+        self._sentence_spans = spans
+        self._sentence_terminated = terminated
+        self._sentence_ids = [bisect_right(sentence_starts, start) - 1 for start in self.starts]
+
+    @property
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """Sentence spans as (start, end) offsets, split on '.', '!' and '?'."""
+        if self._sentence_spans is None:
+            self._build_sentence_index()
+        return self._sentence_spans
+
+    @property
+    def sentence_terminated(self) -> List[bool]:
+        """Whether each sentence ends with a terminator (only the last one may not)."""
+        if self._sentence_terminated is None:
+            self._build_sentence_index()
+        return self._sentence_terminated
+
+    @property
+    def sentence_ids(self) -> List[int]:
+        """Sentence index of each lexical token."""
+        if self._sentence_ids is None:
+            self._build_sentence_index()
+        return self._sentence_ids
+
+    @property
+    def segment_ids(self) -> List[int]:
+        """Segment index of each lexical token."""
+        if self._segment_ids is None:
+            bounds = self.segment_token_offsets + [len(self.words)]
+            segment_ids: List[int] = []
+            for segment_index in range(len(self.segment_token_offsets)):
+                segment_ids.extend([segment_index] * (bounds[segment_index + 1] - bounds[segment_index]))
+            self._segment_ids = segment_ids
+        return self._segment_ids
+
+    def token(self, index: int) -> Token:
+        """Get the lexical token at the given index."""
+        return Token(
+            self.words[index],
+            self.starts[index],
+            self.ends[index],
+            self.segment_ids[index],
+            self.sentence_ids[index]
+        )
+
+    def sentence_text(self, sentence_index: int) -> str:
+        """Get the original text of a sentence."""
+        start, end = self.sentence_spans[sentence_index]
+        return self.text[start:end]
+
+    @property
+    def word_positions(self) -> Dict[str, List[int]]:
+        """Token indices of each lexical word, built once on first use."""
+        if self._word_positions is None:
+            positions: Dict[str, List[int]] = {}
+            for index, word in enumerate(self.words):
+                positions.setdefault(word, []).append(index)
+            self._word_positions = positions
+        return self._word_positions
+
+    def find_example_sentence(self, phrase: str) -> Optional[str]:
+        """
+        Find the first complete sentence containing a word or phrase.
+
+        Equivalent to taking the first match of sentence_pattern(phrase) over
+        the text, but answered from the sentence index and word positions
+        instead of scanning the whole text.
+
+        Args:
+            phrase: Word or phrase to look for (case-insensitive)
+
+        Returns:
+            The sentence text, stripped, or None if no terminated sentence contains it
+        """
+        phrase = phrase.lower()
+        if not TOKEN_PHRASE.fullmatch(phrase) or SENTENCE_TERMINATORS.search(phrase):
+            examples = sentence_pattern(phrase).findall(self.text)
+            return examples[0].strip() if examples else None
+
+        words = LEXICAL_PATTERN.findall(phrase)
+        separators = re.split(r"\w+", phrase)[1:-1]
+        last = len(words) - 1
+
+        for index in self.word_positions.get(words[0], []):
+            sentence_index = self.sentence_ids[index]
+            if not self.sentence_terminated[sentence_index]:
+                # Only the trailing fragment is unterminated, so nothing later can match
+                break
+            if index + last >= len(self.words) or self.sentence_ids[index + last] != sentence_index:
+                continue
+            if all(
+                self.words[index + k + 1] == words[k + 1]
+                and self.text[self.ends[index + k]:self.starts[index + k + 1]] == separators[k]
+                for k in range(last)
+            ):
+                return self.sentence_text(sentence_index).strip()
+
+        return None
+
+    @property
+    def vocabulary_tokens(self) -> List[str]:
+        """
+        Lowercased tokens for vocabulary analysis.
+
+        Uses NLTK's word_tokenize so vocabulary metrics keep their existing
+        token semantics, and falls back to whitespace splitting if NLTK data
+        isn't available. Computed once and cached on the stream.
+        """
+        if self._vocabulary_tokens is None:
+            try:
+                self._vocabulary_tokens = word_tokenize(self.lower_text)
+            except LookupError:
+                # NLTK's punkt data isn't installed
+                self._vocabulary_tokens = self.lower_text.split()
+        return self._vocabulary_tokens
@@ -1,4 +1,3 @@
-import re
 from typing import Dict, List, Tuple, Any
 import logging
 import nltk
@@ -6,6 +5,8 @@ from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from collections import Counter
 
+from analyzer.tokenizer import TokenStream, word_pattern
+
 logger = logging.getLogger(__name__)
 
 class VocabularyAnalyzer:
@@ -69,8 +70,20 @@ class VocabularyAnalyzer:
             # Fall back to simple splitting if NLTK isn't available
             tokens = text.lower().split()
         
+        return self.analyze_tokens(tokens)
+    
+    def analyze_tokens(self, tokens: List[str]) -> Dict[str, Any]:
+        """
+        Analyze already tokenized, lowercased text for vocabulary metrics.
+        
+        Args:
+            tokens: Lowercased tokens (e.g. TokenStream.vocabulary_tokens)
+            
+        Returns:
+            Dictionary of vocabulary metrics
+        """
         # Filter out punctuation and stopwords
-        words = [word for word in tokens if word.isalnum() and word not in self.stopwords]
+        words = self.content_words(tokens)
         
         if not words:
             return {
@@ -103,13 +116,28 @@ class VocabularyAnalyzer:
             "rare_words": rare_words
         }
     
-    def generate_improvement_suggestions(self, analysis: Dict[str, Any], text: str = None) -> List[Dict]:
+    def content_words(self, tokens: List[str]) -> List[str]:
+        """
+        Filter tokens down to the words counted for vocabulary metrics.
+        
+        Args:
+            tokens: Lowercased tokens
+            
+        Returns:
+            Tokens that are alphanumeric and not stopwords
+        """
+        return [word for word in tokens if word.isalnum() and word not in self.stopwords]
+    
+    def generate_improvement_suggestions(self, analysis: Dict[str, Any], text: str = None,
+                                         stream: TokenStream = None) -> List[Dict]:
         """
         Generate improvement suggestions based on vocabulary analysis.
         
         Args:
             analysis: Dictionary containing vocabulary analysis
             text: Optional original text for contextual examples
+            stream: Optional token stream of the text; its sentence index is
+                used to find examples without rescanning the text
             
         Returns:
             List of improvement suggestions
@@ -156,24 +184,19 @@ class VocabularyAnalyzer:
                 }
                 
                 # If we have the original text, try to find an example
-                if text:
-                    # Use regex to find the overused word in context
-                    pattern = re.compile(r"[^.!?]*\b" + re.escape(overused_word) + r"\b[^.!?]*[.!?]", 
-                                        re.IGNORECASE)
-                    examples = pattern.findall(text)
+                if stream is None and text:
+                    stream = TokenStream.from_text(text)
+                
+                if stream is not None and stream.text:
+                    # Look up the first sentence using the overused word
+                    example = stream.find_example_sentence(overused_word)
                     
-                    if examples:
-                        # Use the first example
-                        example = examples[0].strip()
+                    if example:
                         suggestion["example_text"] = example
                         
                         # Create improved example by replacing with a synonym
                         if synonyms:
-                            improved = re.sub(r"\b" + re.escape(overused_word) + r"\b", 
-                                            synonyms[0], 
-                                            example, 
-                                            flags=re.IGNORECASE, 
-                                            count=1)
+                            improved = word_pattern(overused_word).sub(synonyms[0], example, count=1)
                             suggestion["improved_example"] = improved
                 
                 suggestions.append(suggestion)
@@ -5,17 +5,21 @@ from datetime import datetime
 import logging
 import os
 
-from models.database import get_db
+from models.database import get_db, async_session
 from models.schemas import TranscriptRequest, SpeechAnalysisResponse
 from analyzer.analyzer_service import SpeechAnalyzerService
-from api.services.database_service import DatabaseService
+from analyzer.registry import get_analyzer_service
+from analyzer.session_state import SessionStore, chunk_fingerprint
+from api.services.database_service import DatabaseService, conversation_day
+from api.services.write_behind import PendingWebhook, WriteBehindWriter
 
 # Initialize router
 router = APIRouter()
 
 # Initialize services
-analyzer_service = SpeechAnalyzerService()
 db_service = DatabaseService()
+session_store = SessionStore()
+write_behind_writer = WriteBehindWriter(db_service, async_session)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,6 +29,7 @@ logger = logging.getLogger(__name__)
 async def analyze_transcript(
     request: TranscriptRequest,
     session: AsyncSession = Depends(get_db),
+    analyzer_service: SpeechAnalyzerService = Depends(get_analyzer_service),
     store_results: bool = Query(True, description="Whether to store analysis results in the database"),
     omi_api_key: str = Header(None, alias="X-OMI-API-Key")
 ):
@@ -60,13 +65,34 @@ async def analyze_transcript(
             })
         
         # Get analysis from the analyzer service
-        analysis_result = await analyzer_service.analyze_transcript(segments)
+        analysis_result, session_delta = await analyzer_service.analyze_session_chunk(segments)
+        
+        # Fold this chunk into the session's running metrics; retried chunks are only counted once
+        chunk_id = chunk_fingerprint(segments)
+        session_state = await session_store.merge_async(
+            f"{request.user_id}:{request.session_id}", session_delta,
+            chunk_id=chunk_id
+        )
+        session_metrics = analyzer_service.summarize_session(session_state)
         
         # If storing is enabled, save results to database
-        if store_results:
+        if store_results and write_behind_writer.accepting:
+            # Respond now; the writer stores this webhook with others in a batch
+            await write_behind_writer.submit(PendingWebhook(
+                external_id=request.user_id,
+                session_id=request.session_id,
+                segments=segments,
+                metrics=analysis_result["metrics"],
+                suggestions=analysis_result["suggestions"],
+                day=conversation_day(segments),  # UTC day, as the end-of-day job loads it
+                delta=session_delta,
+                chunk_id=chunk_id
+            ))
+            analysis_id = None
+        elif store_results:
             try:
                 # Store user if they don't exist
-                user = await db_service.get_or_create_user(
+                user_pk = await db_service.get_or_create_user_id(
                     session,
                     user_id=request.user_id,
                     username=f"User-{request.user_id[:8]}",  # Generate temporary username
@@ -76,7 +102,7 @@ async def analyze_transcript(
                 # Store conversation and segments
                 conversation = await db_service.store_conversation(
                     session,
-                    user_id=user.user_id,
+                    user_id=user_pk,
                     session_id=request.session_id,
                     segments=segments
                 )
@@ -84,13 +110,22 @@ async def analyze_transcript(
                 # Store analysis results
                 stored_analysis = await db_service.store_analysis_results(
                     session,
-                    user_id=user.user_id,
+                    user_id=user_pk,
                     metrics=analysis_result["metrics"],
                     suggestions=analysis_result["suggestions"]
                 )
                 
                 analysis_id = stored_analysis.analysis_id
                 logger.info(f"Stored analysis results with ID {analysis_id}")
+                
+                # Add the chunk to the user's daily rollup for the end-of-day job
+                await db_service.update_daily_metrics(
+                    session,
+                    user_id=user_pk,
+                    day=conversation.start_timestamp.date(),
+                    delta=session_delta,
+                    chunk_id=chunk_id
+                )
             
             except Exception as e:
                 logger.error(f"Error storing analysis results: {str(e)}")
@@ -105,6 +140,7 @@ async def analyze_transcript(
             user_id=request.user_id,
             timestamp=datetime.utcnow(),
             metrics=analysis_result["metrics"],
+            session_metrics=session_metrics,
             suggestions=analysis_result["suggestions"]
         )
         
@@ -1,59 +1,428 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, and_, desc, between
-from typing import List, Dict, Any, Optional
+from sqlalchemy import func, and_, or_, desc, between, bindparam, exists, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from typing import AsyncIterator, List, Dict, Any, Optional, Set, Tuple
 import logging
+from collections import Counter
 from datetime import datetime, date, timedelta
+from decimal import Decimal
 import json
 
-from models.database import User, Conversation, SpeechSegment, AnalysisResult, ImprovementSuggestion
+import numpy as np
+
+from models.database import (User, Conversation, SpeechSegment, AnalysisResult, ImprovementSuggestion, DailyUserMetrics,
+                             DailyMetricChunk, DailyMetricWord, JobCheckpoint, JobRun)
+from analyzer.session_state import SessionAccumulator
+from api.services.user_cache import UNKNOWN_USER, UserIdCache, user_id_cache
+from api.services.read_cache import ReadCache, read_cache as default_read_cache
+from models.partitions import month_window
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Rows sent to the driver per bulk INSERT execution
+BULK_INSERT_CHUNK_SIZE = 5000
+
+# Smallest batch worth the extra round trip of a COPY on asyncpg
+COPY_MIN_ROWS = 500
+
+# Speech segment columns written by the bulk insert path, in COPY order
+SEGMENT_COLUMNS = (
+    "conversation_id", "user_id", "start_time", "end_time", "text_content",
+    "is_user_speaking", "speaker_identification", "duration_seconds", "word_count", "created_at"
+)
+
+
+def normalize_segment_times(segments: List[Dict], base_time: datetime) -> tuple:
+    """
+    Convert a batch of segment timestamps to datetimes.
+    
+    Segments whose start and end are both floats are treated as seconds after
+    base_time and converted together with NumPy; other timestamps (already
+    datetimes) are kept as they are.
+    
+    Args:
+        segments: Speech segments
+        base_time: Datetime that float offsets are relative to
+        
+    Returns:
+        Tuple of (start_times, end_times, duration_seconds) lists
+    """
+    start_times = [s.get("start_time") for s in segments]
+    end_times = [s.get("end_time") for s in segments]
+    is_offset = np.fromiter(
+        (isinstance(start, float) and isinstance(end, float) for start, end in zip(start_times, end_times)),
+        dtype=bool, count=len(segments)
+    )
+    
+    if is_offset.any():
+        offsets = np.array([
+            (start, end) if flag else (0.0, 0.0)
+            for start, end, flag in zip(start_times, end_times, is_offset)
+        ], dtype=np.float64)
+        # Microsecond precision, rounded the same way as timedelta(seconds=...):
+        # whole seconds and the fraction are converted separately
+        fractions, whole_seconds = np.modf(offsets)
+        microseconds = whole_seconds.astype(np.int64) * 1_000_000 + np.round(fractions * 1e6).astype(np.int64)
+        converted = np.datetime64(base_time, "us") + microseconds.astype("timedelta64[us]")
+        converted_starts = converted[:, 0].tolist()
+        converted_ends = converted[:, 1].tolist()
+        for index in np.flatnonzero(is_offset).tolist():
+            start_times[index] = converted_starts[index]
+            end_times[index] = converted_ends[index]
+    
+    durations = [(end - start).total_seconds() for start, end in zip(start_times, end_times)]
+    return start_times, end_times, durations
+
+
+def conversation_day(segments: List[Dict], now: Optional[datetime] = None) -> date:
+    """
+    UTC day a webhook's conversation is stored under.
+    
+    The end-of-day job loads a day's conversations by their start time, so
+    daily rollups are keyed on this day rather than the server's local date.
+    """
+    conversation, _ = build_conversation(None, "", segments, now or datetime.utcnow())
+    return conversation.start_timestamp.date()
+
+
+def build_segment_rows(
+    segments: List[Dict], 
+    conversation_id: int, 
+    user_id: int, 
+    base_time: datetime, 
+    created_at: datetime
+) -> List[Dict]:
+    """
+    Build speech_segments rows for a bulk insert.
+    
+    Args:
+        segments: Speech segments in the analyzer's internal format
+        conversation_id: Conversation the segments belong to
+        user_id: User ID
+        base_time: Datetime that float timestamps are relative to
+        created_at: Creation time stamped on every row of the batch
+        
+    Returns:
+        List of row dictionaries keyed by SEGMENT_COLUMNS
+    """
+    start_times, end_times, durations = normalize_segment_times(segments, base_time)
+    
+    rows = []
+    for segment, start_time, end_time, duration in zip(segments, start_times, end_times, durations):
+        text_content = segment.get("text_content", "")
+        rows.append({
+            "conversation_id": conversation_id,
+            "user_id": user_id,
+            "start_time": start_time,
+            "end_time": end_time,
+            "text_content": text_content,
+            "is_user_speaking": segment.get("is_user_speaking", False),
+            "speaker_identification": segment.get("speaker_identification", "UNKNOWN"),
+            "duration_seconds": int(round(duration)),
+            "word_count": len(text_content.split()),
+            "created_at": created_at
+        })
+    return rows
+
+
+def build_conversation(
+    user_id: int, 
+    session_id: str, 
+    segments: List[Dict], 
+    now: datetime
+) -> Tuple[Conversation, datetime]:
+    """
+    Build the conversations row for a webhook's segments.
+    
+    Args:
+        user_id: User ID
+        session_id: Session ID
+        segments: Speech segments in the analyzer's internal format
+        now: Arrival time; float timestamps are seconds since midnight UTC of its day
+        
+    Returns:
+        Tuple of the Conversation and the datetime float timestamps are relative to
+    """
+    # Float timestamps are seconds since midnight UTC of the day they arrive
+    base_time = datetime(now.year, now.month, now.day)
+    
+    # Calculate conversation timestamps
+    if segments:
+        start_times = [s.get("start_time") for s in segments if s.get("start_time")]
+        end_times = [s.get("end_time") for s in segments if s.get("end_time")]
+        
+        if start_times and end_times:
+            start_timestamp = min(start_times)
+            end_timestamp = max(end_times)
+            
+            if isinstance(start_timestamp, float):
+                # Convert to datetime if timestamps are floats
+                start_timestamp = base_time + timedelta(seconds=start_timestamp)
+                end_timestamp = base_time + timedelta(seconds=end_timestamp)
+        else:
+            start_timestamp = now
+            end_timestamp = now
+    else:
+        start_timestamp = now
+        end_timestamp = now
+    
+    # Create conversation record
+    conversation = Conversation(
+        user_id=user_id,
+        start_timestamp=start_timestamp,
+        end_timestamp=end_timestamp,
+        conversation_context=f"Session: {session_id}",
+        participants_count=len(set([s.get("speaker_identification") for s in segments if s.get("speaker_identification")])),
+        total_duration_seconds=(end_timestamp - start_timestamp).total_seconds()
+    )
+    
+    return conversation, base_time
+
+
+def analysis_result_values(metrics: Dict) -> Dict[str, Any]:
+    """analysis_results column values for an analysis's metrics."""
+    return dict(
+        total_speaking_time_seconds=metrics.get("speaking_time_seconds", 0),
+        total_conversations=1,  # For now, just count this as one conversation
+        filler_word_count=metrics.get("total_filler_count", 0),
+        filler_word_percentage=metrics.get("filler_percentage", 0),
+        avg_words_per_minute=metrics.get("words_per_minute", 0),
+        pace_variability=metrics.get("pace_variability", 0),
+        vocabulary_diversity_score=metrics.get("vocabulary_diversity", 0),
+        clarity_score=metrics.get("clarity_score", 0),
+        confidence_score=metrics.get("confidence_score", 0),
+        overall_rating=metrics.get("confidence_score", 0) * 0.5 + metrics.get("clarity_score", 0) * 0.5
+    )
+
+
+def build_suggestion_record(analysis_id: int, suggestion: Dict) -> ImprovementSuggestion:
+    """improvement_suggestions row for one suggestion of an analysis."""
+    return ImprovementSuggestion(
+        analysis_id=analysis_id,
+        segment_id=None,  # For now, we don't link to specific segments
+        suggestion_type=suggestion.get("suggestion_type", "general"),
+        suggestion_text=suggestion.get("suggestion_text", ""),
+        priority_level=suggestion.get("priority_level", 3),
+        example_text=suggestion.get("example_text"),
+        improved_example=suggestion.get("improved_example")
+    )
+
+
+def rollup_accumulator(row: DailyUserMetrics, words: List[Tuple[str, str, int]]) -> SessionAccumulator:
+    """
+    Rebuild the accumulator stored in a daily_user_metrics row and its words.
+    
+    Chunk fingerprints aren't loaded; they are only needed (and checked in
+    the database) when merging new chunks.
+    """
+    accumulator = SessionAccumulator()
+    accumulator.segment_count = row.segment_count or 0
+    accumulator.word_count = row.word_count or 0
+    accumulator.speaking_seconds = row.speaking_seconds or 0.0
+    accumulator.total_fillers = row.total_fillers or 0
+    for kind, word, count in words:
+        if kind == "filler":
+            accumulator.filler_counts[word] = count
+        else:
+            accumulator.vocabulary[word] = count
+    accumulator.set_pace_sums(row.pace_count or 0, row.pace_sum or 0.0, row.pace_sum_squares or 0.0)
+    return accumulator
+
+
+def rollup_increments(accumulator: SessionAccumulator) -> Dict[str, Any]:
+    """UPDATE values adding an accumulator's totals to a daily_user_metrics row."""
+    return {
+        "segment_count": DailyUserMetrics.segment_count + accumulator.segment_count,
+        "word_count": DailyUserMetrics.word_count + accumulator.word_count,
+        "speaking_seconds": DailyUserMetrics.speaking_seconds + accumulator.speaking_seconds,
+        "total_fillers": DailyUserMetrics.total_fillers + accumulator.total_fillers,
+        "pace_count": DailyUserMetrics.pace_count + accumulator.pace_count,
+        "pace_sum": DailyUserMetrics.pace_sum + accumulator.pace_sum,
+        "pace_sum_squares": DailyUserMetrics.pace_sum_squares + accumulator.pace_sum_squares,
+        "updated_at": datetime.utcnow()
+    }
+
 
 class DatabaseService:
     """
     Service for database operations related to speech analysis.
     """
     
-    async def get_or_create_user(
+    def __init__(self, user_cache: Optional[UserIdCache] = None, read_cache: Optional[ReadCache] = None):
+        """
+        Initialize the database service.
+        
+        Args:
+            user_cache: Cache of external to internal user ids
+                (defaults to the process-wide user_id_cache)
+            read_cache: Cache of history and statistics payloads
+                (defaults to the process-wide read_cache)
+        """
+        self.user_cache = user_cache if user_cache is not None else user_id_cache
+        self.read_cache = read_cache if read_cache is not None else default_read_cache
+    
+    async def resolve_user_id(
+        self, 
+        session: AsyncSession, 
+        external_id: str
+    ) -> Optional[int]:
+        """
+        Map an external (OMI) user id to the internal user_id.
+        
+        Args:
+            session: Database session
+            external_id: User ID from the OMI device
+            
+        Returns:
+            Internal user ID, or None if there is no such user
+        """
+        cached = self.user_cache.get(external_id)
+        if cached is not None:
+            return None if cached == UNKNOWN_USER else cached
+        
+        user_pk = await self._find_user_id(session, external_id)
+        self.user_cache.put(external_id, UNKNOWN_USER if user_pk is None else user_pk)
+        return user_pk
+    
+    async def _find_user_id(
+        self, 
+        session: AsyncSession, 
+        external_id: str, 
+        claim: bool = False
+    ) -> Optional[int]:
+        """
+        Look up a user by external id in the database.
+        
+        Users created before external ids were stored are found by the
+        username they were given: the full id, or else "User-" and its first
+        8 characters. Only rows without an external id are considered, and
+        a prefix match is refused when it is ambiguous: several such rows
+        share the username, or another user's external id already starts
+        with the same 8 characters. With claim, the matched user gets the
+        external id stored so later lookups are exact.
+        """
+        result = await session.execute(select(User.user_id).where(User.external_id == external_id))
+        user_pk = result.scalar()
+        if user_pk is not None:
+            return user_pk
+        
+        user_pk = await self._find_legacy_user_id(session, User.username == external_id)
+        if user_pk is None:
+            prefix = external_id[:8]
+            claimed_prefix = await session.execute(
+                select(User.user_id)
+                .where(and_(func.substr(User.external_id, 1, 8) == prefix, User.external_id != external_id))
+                .limit(1)
+            )
+            if claimed_prefix.scalar() is None:
+                user_pk = await self._find_legacy_user_id(session, User.username == f"User-{prefix}")
+            else:
+                logger.warning(f"Not matching {external_id} to a legacy user: its id prefix is shared")
+        
+        if user_pk is not None and claim:
+            try:
+                result = await session.execute(
+                    update(User)
+                    .where(and_(User.user_id == user_pk, User.external_id.is_(None)))
+                    .values(external_id=external_id)
+                )
+                await session.commit()
+                if result.rowcount:
+                    logger.info(f"Stored external id {external_id} for existing user {user_pk}")
+                    return user_pk
+            except IntegrityError:
+                # Another request stored this external id first
+                await session.rollback()
+            # The user was claimed by another request, possibly for a different id
+            result = await session.execute(select(User.user_id).where(User.external_id == external_id))
+            user_pk = result.scalar()
+        
+        return user_pk
+    
+    async def _find_legacy_user_id(self, session: AsyncSession, condition) -> Optional[int]:
+        """The only user without an external id matching condition, or None if there are none or several."""
+        result = await session.execute(
+            select(User.user_id).where(and_(User.external_id.is_(None), condition)).limit(2))
+        matches = result.scalars().all()
+        if len(matches) > 1:
+            logger.warning(f"Not matching a legacy user: {len(matches)} users without an external id match")
+            return None
+        return matches[0] if matches else None
+    
+    async def get_or_create_user_id(
         self, 
         session: AsyncSession, 
         user_id: str, 
         username: str, 
         device_id: str
-    ) -> User:
+    ) -> int:
         """
-        Get a user by ID or create if not exists.
+        Get the internal ID of a user, creating the user if needed.
+        
+        Known users are resolved from the user cache without a query.
         
         Args:
             session: Database session
-            user_id: User ID (could be from OMI device)
-            username: Username
-            device_id: Device ID
+            user_id: User ID from the OMI device
+            username: Username for a new user
+            device_id: Device ID for a new user
             
         Returns:
-            User object
+            Internal user ID
         """
-        # Try to find existing user
-        query = select(User).where(User.username == username)
-        result = await session.execute(query)
-        user = result.scalars().first()
+        cached = self.user_cache.get(user_id)
+        if cached is not None and cached != UNKNOWN_USER:
+            return cached
         
-        if not user:
+        user_pk = await self._find_user_id(session, user_id, claim=True)
+        
+        if user_pk is None:
             # Create new user
             user = User(
+                external_id=user_id,
                 username=username,
                 email=f"{username}@example.com",  # Placeholder email
                 device_id=device_id,
                 settings={}
             )
             session.add(user)
-            await session.commit()
-            logger.info(f"Created new user: {username}")
+            try:
+                await session.commit()
+                user_pk = user.user_id
+                logger.info(f"Created new user: {username}")
+            except IntegrityError:
+                # Another request created this user first
+                await session.rollback()
+                user_pk = await self._find_user_id(session, user_id)
         
-        return user
+        # Replaces a cached "unknown user" entry for this id
+        self.user_cache.put(user_id, user_pk)
+        return user_pk
+    
+    async def get_or_create_user(
+        self, 
+        session: AsyncSession, 
+        user_id: str, 
+        username: str, 
+        device_id: str
+    ) -> User:
+        """
+        Get a user by ID or create if not exists.
+        
+        Args:
+            session: Database session
+            user_id: User ID (could be from OMI device)
+            username: Username
+            device_id: Device ID
+            
+        Returns:
+            User object
+        """
+        user_pk = await self.get_or_create_user_id(session, user_id, username, device_id)
+        return await session.get(User, user_pk)
     
     async def store_conversation(
         self, 
@@ -65,6 +434,12 @@ class DatabaseService:
         """
         Store a conversation with speech segments.
         
+        Segments are written in bulk: a Core INSERT executed for batches of
+        BULK_INSERT_CHUNK_SIZE rows, or a single COPY on asyncpg for batches
+        of at least COPY_MIN_ROWS rows. The user's last_activity_date is
+        moved forward to the conversation's day, which is how the end-of-day
+        job finds the users active on a day.
+        
         Args:
             session: Database session
             user_id: User ID
@@ -74,135 +449,692 @@ class DatabaseService:
         Returns:
             Conversation object
         """
-        # Calculate conversation timestamps
-        if segments:
-            start_times = [s.get("start_time") for s in segments if s.get("start_time")]
-            end_times = [s.get("end_time") for s in segments if s.get("end_time")]
-            
-            if start_times and end_times:
-                start_timestamp = min(start_times)
-                end_timestamp = max(end_times)
-                
-                if isinstance(start_timestamp, float):
-                    # Convert to datetime if timestamps are floats
-                    now = datetime.utcnow()
-                    base_time = datetime(now.year, now.month, now.day)
-                    start_timestamp = base_time + timedelta(seconds=start_timestamp)
-                    end_timestamp = base_time + timedelta(seconds=end_timestamp)
-            else:
-                start_timestamp = datetime.utcnow()
-                end_timestamp = datetime.utcnow()
-        else:
-            start_timestamp = datetime.utcnow()
-            end_timestamp = datetime.utcnow()
-        
-        # Create conversation record
-        conversation = Conversation(
-            user_id=user_id,
-            start_timestamp=start_timestamp,
-            end_timestamp=end_timestamp,
-            conversation_context=f"Session: {session_id}",
-            participants_count=len(set([s.get("speaker_identification") for s in segments if s.get("speaker_identification")])),
-            total_duration_seconds=(end_timestamp - start_timestamp).total_seconds()
-        )
+        now = datetime.utcnow()
+        conversation, base_time = build_conversation(user_id, session_id, segments, now)
         session.add(conversation)
         await session.flush()  # Flush to get the ID
         
         # Store speech segments
-        for segment in segments:
-            # Extract segment data
-            text_content = segment.get("text_content", "")
-            speaker = segment.get("speaker_identification", "UNKNOWN")
-            is_user = segment.get("is_user_speaking", False)
-            
-            # Handle timestamps
-            start_time = segment.get("start_time")
-            end_time = segment.get("end_time")
-            
-            if isinstance(start_time, float) and isinstance(end_time, float):
-                # Convert to datetime if timestamps are floats
-                now = datetime.utcnow()
-                base_time = datetime(now.year, now.month, now.day)
-                start_time = base_time + timedelta(seconds=start_time)
-                end_time = base_time + timedelta(seconds=end_time)
-            
-            # Calculate duration and word count
-            duration = (end_time - start_time).total_seconds()
-            word_count = len(text_content.split())
-            
-            # Create segment record
-            speech_segment = SpeechSegment(
-                conversation_id=conversation.conversation_id,
-                user_id=user_id,
-                start_time=start_time,
-                end_time=end_time,
-                text_content=text_content,
-                is_user_speaking=is_user,
-                speaker_identification=speaker,
-                duration_seconds=duration,
-                word_count=word_count
-            )
-            session.add(speech_segment)
+        rows = build_segment_rows(segments, conversation.conversation_id, user_id, base_time, now)
+        await self.bulk_insert_segments(session, rows)
+        
+        await self._record_activity(session, user_id, conversation.start_timestamp.date())
         
         await session.commit()
         logger.info(f"Stored conversation with {len(segments)} segments for user {user_id}")
         
         return conversation
     
+    async def bulk_insert_segments(
+        self, 
+        session: AsyncSession, 
+        rows: List[Dict]
+    ) -> None:
+        """
+        Insert speech segment rows without going through the ORM.
+        
+        Args:
+            session: Database session (the rows join its transaction)
+            rows: Rows from build_segment_rows
+        """
+        if not rows:
+            return
+        
+        connection = await session.connection()
+        if connection.dialect.driver == "asyncpg" and len(rows) >= COPY_MIN_ROWS:
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                SpeechSegment.__tablename__,
+                records=[tuple(row[column] for column in SEGMENT_COLUMNS) for row in rows],
+                columns=list(SEGMENT_COLUMNS)
+            )
+            return
+        
+        # One cached INSERT statement executed for many parameter sets; the
+        # driver batches the rows instead of the ORM flushing them one by one
+        statement = insert(SpeechSegment.__table__)
+        for offset in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+            await connection.execute(statement, rows[offset:offset + BULK_INSERT_CHUNK_SIZE])
+    
+    async def store_webhook_batch(
+        self, 
+        session: AsyncSession, 
+        webhooks: List[Dict]
+    ) -> List[AnalysisResult]:
+        """
+        Store the conversations and analysis results of many webhooks in one transaction.
+        
+        Used by the write-behind writer: the conversations and the analysis
+        results are each flushed once, all segments go through one bulk
+        insert and each user's last_activity_date is updated once.
+        
+        A webhook's chunk fingerprint is stored on its conversation, and
+        webhooks whose chunk is already stored for the user (a batch retried
+        after it was committed, or a chunk delivered twice) are skipped, so
+        writing a webhook again never duplicates its rows.
+        
+        Args:
+            session: Database session
+            webhooks: Dictionaries with the internal user_id, session_id,
+                segments, metrics, suggestions and optional chunk_id of each webhook
+            
+        Returns:
+            AnalysisResult objects of the webhooks stored, in webhook order
+        """
+        now = datetime.utcnow()
+        conversations = []
+        for webhook in webhooks:
+            conversation, base_time = build_conversation(
+                webhook["user_id"], webhook["session_id"], webhook["segments"], now)
+            conversation.chunk_id = webhook.get("chunk_id")
+            conversations.append((conversation, base_time))
+        
+        stored_chunks = await self._stored_chunks(session, [conversation for conversation, _ in conversations])
+        pending = []
+        for webhook, (conversation, base_time) in zip(webhooks, conversations):
+            if conversation.chunk_id is not None:
+                key = (conversation.user_id, conversation.chunk_id)
+                if key in stored_chunks:
+                    logger.info(f"Skipping already stored chunk {conversation.chunk_id} for user {conversation.user_id}")
+                    continue
+                stored_chunks.add(key)
+            pending.append((webhook, (conversation, base_time)))
+        if not pending:
+            await session.rollback()
+            return []
+        webhooks = [webhook for webhook, _ in pending]
+        conversations = [conversation for _, conversation in pending]
+        
+        session.add_all([conversation for conversation, _ in conversations])
+        await session.flush()  # Flush to get the IDs
+        
+        rows = []
+        latest_activity: Dict[int, date] = {}
+        for webhook, (conversation, base_time) in zip(webhooks, conversations):
+            rows.extend(build_segment_rows(
+                webhook["segments"], conversation.conversation_id, webhook["user_id"], base_time, now))
+            day = conversation.start_timestamp.date()
+            latest_activity[webhook["user_id"]] = max(day, latest_activity.get(webhook["user_id"], day))
+        await self.bulk_insert_segments(session, rows)
+        for user_id, day in latest_activity.items():
+            await self._record_activity(session, user_id, day)
+        
+        analysis_results = [
+            AnalysisResult(user_id=webhook["user_id"], date=date.today(), **analysis_result_values(webhook["metrics"]))
+            for webhook in webhooks
+        ]
+        session.add_all(analysis_results)
+        await session.flush()  # Flush to get the IDs
+        session.add_all([
+            build_suggestion_record(analysis_result.analysis_id, suggestion)
+            for webhook, analysis_result in zip(webhooks, analysis_results)
+            for suggestion in webhook["suggestions"]
+        ])
+        
+        await session.commit()
+        for user_id in latest_activity:
+            await self.read_cache.invalidate(user_id)
+        logger.info(f"Stored {len(webhooks)} webhooks with {len(rows)} segments in one transaction")
+        
+        return analysis_results
+    
+    async def _stored_chunks(self, session: AsyncSession, conversations: List[Conversation]) -> Set[Tuple[int, str]]:
+        """(user ID, chunk fingerprint) of the given unsaved conversations' chunks that are already stored."""
+        keyed = [conversation for conversation in conversations if conversation.chunk_id is not None]
+        if not keyed:
+            return set()
+        
+        # A retried chunk's conversation gets the same start time, so only these months are searched
+        months_from, months_until = month_window(min(conversation.start_timestamp for conversation in keyed),
+                                                 max(conversation.start_timestamp for conversation in keyed))
+        result = await session.execute(
+            select(Conversation.user_id, Conversation.chunk_id)
+            .where(and_(
+                Conversation.chunk_id.in_({conversation.chunk_id for conversation in keyed}),
+                Conversation.start_timestamp >= months_from,
+                Conversation.start_timestamp < months_until
+            ))
+        )
+        keys = {(conversation.user_id, conversation.chunk_id) for conversation in keyed}
+        return {tuple(row) for row in result if tuple(row) in keys}
+    
+    async def _record_activity(self, session: AsyncSession, user_id: int, day: date) -> None:
+        """Move a user's last_activity_date forward to day (never back)."""
+        await session.execute(
+            update(User)
+            .where(
+                User.user_id == user_id,
+                or_(User.last_activity_date.is_(None), User.last_activity_date < day)
+            )
+            .values(last_activity_date=day)
+            .execution_options(synchronize_session=False)
+        )
+    
     async def store_analysis_results(
         self, 
         session: AsyncSession, 
         user_id: int, 
         metrics: Dict, 
-        suggestions: List[Dict]
+        suggestions: List[Dict],
+        day: Optional[date] = None,
+        daily_summary: bool = False
     ) -> AnalysisResult:
         """
         Store speech analysis results.
         
+        Webhook results are always inserted. A daily summary (the end-of-day
+        job's result) is upserted on (user_id, date): storing it again, e.g.
+        from a re-run or a second job, replaces the earlier summary and its
+        suggestions instead of adding a duplicate.
+        
         Args:
             session: Database session
             user_id: User ID
             metrics: Analysis metrics
             suggestions: Improvement suggestions
+            day: Day the results are for (defaults to today)
+            daily_summary: Whether these are the end-of-day results for the day
             
         Returns:
             AnalysisResult object
         """
-        # Create analysis result record
-        analysis_result = AnalysisResult(
-            user_id=user_id,
-            date=date.today(),
-            total_speaking_time_seconds=metrics.get("speaking_time_seconds", 0),
-            total_conversations=1,  # For now, just count this as one conversation
-            filler_word_count=metrics.get("total_filler_count", 0),
-            filler_word_percentage=metrics.get("filler_percentage", 0),
-            avg_words_per_minute=metrics.get("words_per_minute", 0),
-            pace_variability=metrics.get("pace_variability", 0),
-            vocabulary_diversity_score=metrics.get("vocabulary_diversity", 0),
-            clarity_score=metrics.get("clarity_score", 0),
-            confidence_score=metrics.get("confidence_score", 0),
-            overall_rating=metrics.get("confidence_score", 0) * 0.5 + metrics.get("clarity_score", 0) * 0.5
+        day = day or date.today()
+        values = analysis_result_values(metrics)
+        
+        for attempt in range(2):
+            analysis_result = None
+            if daily_summary:
+                query = (
+                    select(AnalysisResult)
+                    .where(and_(
+                        AnalysisResult.user_id == user_id,
+                        AnalysisResult.date == day,
+                        AnalysisResult.daily_summary.is_(True)
+                    ))
+                    .with_for_update()
+                )
+                analysis_result = (await session.execute(query)).scalars().first()
+            
+            try:
+                if analysis_result is None:
+                    # Create analysis result record
+                    analysis_result = AnalysisResult(user_id=user_id, date=day, daily_summary=daily_summary, **values)
+                    session.add(analysis_result)
+                    await session.flush()  # Flush to get the ID
+                else:
+                    for name, value in values.items():
+                        setattr(analysis_result, name, value)
+                    analysis_result.created_at = datetime.utcnow()
+                    await session.execute(
+                        ImprovementSuggestion.__table__.delete()
+                        .where(ImprovementSuggestion.analysis_id == analysis_result.analysis_id)
+                    )
+                
+                # Store improvement suggestions
+                session.add_all([
+                    build_suggestion_record(analysis_result.analysis_id, suggestion)
+                    for suggestion in suggestions
+                ])
+                
+                await session.commit()
+                break
+            except IntegrityError:
+                # Another job stored the day's summary first; replace that one
+                await session.rollback()
+                if attempt or not daily_summary:
+                    raise
+        
+        # Cached history and statistics of the user no longer match the database
+        await self.read_cache.invalidate(user_id)
+        logger.info(f"Stored analysis results with {len(suggestions)} suggestions for user {user_id}")
+        
+        return analysis_result
+    
+    async def update_daily_metrics(
+        self, 
+        session: AsyncSession, 
+        user_id: int, 
+        day: date, 
+        delta: SessionAccumulator, 
+        chunk_id: Optional[str] = None
+    ) -> bool:
+        """
+        Fold a webhook chunk's totals into the user's rollup for a day.
+        
+        The row is locked while it is updated (on databases that support
+        SELECT ... FOR UPDATE), so concurrent webhooks for one user don't
+        lose each other's counts.
+        
+        Args:
+            session: Database session
+            user_id: User ID
+            day: Day the speech belongs to
+            delta: Accumulator of the chunk's user segments
+            chunk_id: Optional chunk fingerprint; a chunk already in the
+                rollup (a retried webhook) is skipped
+            
+        Returns:
+            True if the chunk was merged, False if it was already counted
+        """
+        return await self.update_daily_metrics_many(session, user_id, day, [(delta, chunk_id)]) > 0
+    
+    async def update_daily_metrics_many(
+        self, 
+        session: AsyncSession, 
+        user_id: int, 
+        day: date, 
+        chunks: List[Tuple[SessionAccumulator, Optional[str]]]
+    ) -> int:
+        """
+        Fold several webhook chunks into the user's rollup for a day in one transaction.
+        
+        Like update_daily_metrics, but the row is locked and written once
+        for all chunks; chunks already in the rollup, or repeated in chunks,
+        are skipped. The row's counters are incremented in place, and only
+        the new chunks' fingerprints and words are written, so the cost of
+        a webhook doesn't grow with the size of the day's rollup.
+        
+        Args:
+            session: Database session
+            user_id: User ID
+            day: Day the speech belongs to
+            chunks: (accumulator, chunk fingerprint or None) of each chunk
+            
+        Returns:
+            Number of chunks merged
+        """
+        for attempt in range(2):
+            try:
+                query = (
+                    select(DailyUserMetrics.daily_metrics_id)
+                    .where(and_(DailyUserMetrics.user_id == user_id, DailyUserMetrics.date == day))
+                    .with_for_update()
+                )
+                metrics_id = (await session.execute(query)).scalar()
+                
+                counted: Set[str] = set()
+                if metrics_id is None:
+                    row = DailyUserMetrics(user_id=user_id, date=day)
+                    session.add(row)
+                    await session.flush()  # Flush to get the ID
+                    metrics_id = row.daily_metrics_id
+                else:
+                    chunk_ids = {chunk_id for _, chunk_id in chunks if chunk_id is not None}
+                    if chunk_ids:
+                        result = await session.execute(
+                            select(DailyMetricChunk.chunk_id)
+                            .where(and_(
+                                DailyMetricChunk.daily_metrics_id == metrics_id,
+                                DailyMetricChunk.chunk_id.in_(chunk_ids)
+                            ))
+                        )
+                        counted = set(result.scalars().all())
+                
+                delta = SessionAccumulator()
+                new_chunk_ids = []
+                merged = 0
+                for chunk_delta, chunk_id in chunks:
+                    if chunk_id is not None and chunk_id in counted:
+                        logger.info(f"Skipping already counted chunk {chunk_id} for user {user_id} on {day}")
+                        continue
+                    delta.merge(chunk_delta)
+                    if chunk_id is not None:
+                        counted.add(chunk_id)
+                        new_chunk_ids.append(chunk_id)
+                    merged += 1
+                
+                if not merged:
+                    await session.rollback()
+                    return 0
+                
+                await session.execute(
+                    update(DailyUserMetrics)
+                    .where(DailyUserMetrics.daily_metrics_id == metrics_id)
+                    .values(**rollup_increments(delta))
+                    .execution_options(synchronize_session=False)
+                )
+                if new_chunk_ids:
+                    await session.execute(insert(DailyMetricChunk), [
+                        {"daily_metrics_id": metrics_id, "chunk_id": chunk_id} for chunk_id in new_chunk_ids])
+                await self._add_rollup_words(session, metrics_id, delta)
+                
+                await session.commit()
+                return merged
+            except IntegrityError:
+                # Another request created the day's row first; merge into that one
+                await session.rollback()
+                if attempt:
+                    raise
+        return 0
+    
+    async def _add_rollup_words(self, session: AsyncSession, metrics_id: int, delta: SessionAccumulator) -> None:
+        """Add a delta's filler and content word counts to a rollup's word rows (the rollup row must be locked)."""
+        added = {("filler", word): count for word, count in delta.filler_counts.items() if count}
+        added.update({("vocabulary", word): count for word, count in delta.vocabulary.items() if count})
+        if not added:
+            return
+        
+        result = await session.execute(
+            select(DailyMetricWord.daily_metric_word_id, DailyMetricWord.kind, DailyMetricWord.word)
+            .where(and_(
+                DailyMetricWord.daily_metrics_id == metrics_id,
+                DailyMetricWord.word.in_({word for _, word in added})
+            ))
         )
-        session.add(analysis_result)
-        await session.flush()  # Flush to get the ID
+        existing = {(row.kind, row.word): row.daily_metric_word_id for row in result}
         
-        # Store improvement suggestions
-        for suggestion in suggestions:
-            suggestion_record = ImprovementSuggestion(
-                analysis_id=analysis_result.analysis_id,
-                segment_id=None,  # For now, we don't link to specific segments
-                suggestion_type=suggestion.get("suggestion_type", "general"),
-                suggestion_text=suggestion.get("suggestion_text", ""),
-                priority_level=suggestion.get("priority_level", 3),
-                example_text=suggestion.get("example_text"),
-                improved_example=suggestion.get("improved_example")
+        words = DailyMetricWord.__table__
+        increments = [{"word_id": existing[key], "added": count} for key, count in added.items() if key in existing]
+        if increments:
+            await session.execute(
+                update(words)
+                .where(words.c.daily_metric_word_id == bindparam("word_id"))
+                .values(count=words.c.count + bindparam("added")),
+                increments
             )
-            session.add(suggestion_record)
+        new_words = [
+            {"daily_metrics_id": metrics_id, "kind": kind, "word": word, "count": count}
+            for (kind, word), count in added.items() if (kind, word) not in existing
+        ]
+        if new_words:
+            await session.execute(insert(words), new_words)
+    
+    async def get_daily_metrics(
+        self, 
+        session: AsyncSession, 
+        day: date, 
+        user_ids: Optional[List[int]] = None
+    ) -> Dict[int, SessionAccumulator]:
+        """
+        Get the rollups of every user with speech on a day.
+        
+        Args:
+            session: Database session
+            day: Day to get rollups for
+            user_ids: Only get the rollups of these users
+            
+        Returns:
+            Accumulators keyed by user ID
+        """
+        query = select(DailyUserMetrics).where(DailyUserMetrics.date == day)
+        if user_ids is not None:
+            query = query.where(DailyUserMetrics.user_id.in_(user_ids))
+        rows = (await session.execute(query)).scalars().all()
+        if not rows:
+            return {}
         
+        words: Dict[int, List[Tuple[str, str, int]]] = {row.daily_metrics_id: [] for row in rows}
+        result = await session.execute(
+            select(DailyMetricWord.daily_metrics_id, DailyMetricWord.kind, DailyMetricWord.word, DailyMetricWord.count)
+            .where(DailyMetricWord.daily_metrics_id.in_(list(words)))
+            .order_by(DailyMetricWord.daily_metric_word_id)  # First-seen order, which breaks ties between fillers
+        )
+        for metrics_id, kind, word, count in result:
+            words[metrics_id].append((kind, word, count))
+        return {row.user_id: rollup_accumulator(row, words[row.daily_metrics_id]) for row in rows}
+    
+    async def start_job_run(
+        self, 
+        session: AsyncSession, 
+        job_name: str, 
+        day: date
+    ) -> JobRun:
+        """
+        Record the start of a batch job run in the job_runs ledger.
+        
+        Args:
+            session: Database session
+            job_name: Job name, e.g. "end_of_day"
+            day: Day the run processes
+            
+        Returns:
+            JobRun object
+        """
+        job_run = JobRun(job_name=job_name, day=day, state="running", started_at=datetime.utcnow())
+        session.add(job_run)
         await session.commit()
-        logger.info(f"Stored analysis results with {len(suggestions)} suggestions for user {user_id}")
+        return job_run
+    
+    async def finish_job_run(
+        self, 
+        session: AsyncSession, 
+        run_id: int, 
+        state: str, 
+        completed: int, 
+        failed: int, 
+        skipped: int = 0
+    ) -> None:
+        """
+        Record the outcome of a batch job run.
         
-        return analysis_result
+        Args:
+            session: Database session
+            run_id: Run ID from start_job_run
+            state: "completed" or "failed"
+            completed: Users completed by the run
+            failed: Users that failed in the run
+            skipped: Users skipped because an earlier run completed them
+        """
+        await session.execute(
+            update(JobRun)
+            .where(JobRun.run_id == run_id)
+            .values(state=state, completed_count=completed, failed_count=failed,
+                    skipped_count=skipped, finished_at=datetime.utcnow())
+        )
+        await session.commit()
+    
+    async def record_checkpoint(
+        self, 
+        session: AsyncSession, 
+        job_name: str, 
+        day: date, 
+        user_id: int, 
+        run_id: int, 
+        status: str, 
+        error: Optional[str] = None, 
+        analysis_id: Optional[int] = None
+    ) -> None:
+        """
+        Record a batch job's outcome for one user and day.
+        
+        There is one checkpoint per job, day and user; a later run replaces
+        the checkpoint of an earlier one, e.g. when a failed user is redone.
+        Recording the outcome releases the item's lease.
+        
+        Args:
+            session: Database session
+            job_name: Job name
+            day: Day the run processes
+            user_id: User ID
+            run_id: Run that processed the user
+            status: "completed" or "failed"
+            error: Error message of a failed user
+            analysis_id: Stored analysis result of a completed user
+        """
+        values = dict(run_id=run_id, status=status, error=error, analysis_id=analysis_id,
+                      lease_owner=None, lease_expires_at=None, updated_at=datetime.utcnow())
+        for attempt in range(2):
+            query = (
+                select(JobCheckpoint)
+                .where(and_(
+                    JobCheckpoint.job_name == job_name,
+                    JobCheckpoint.day == day,
+                    JobCheckpoint.user_id == user_id
+                ))
+                .with_for_update()
+            )
+            checkpoint = (await session.execute(query)).scalars().first()
+            if checkpoint is None:
+                session.add(JobCheckpoint(job_name=job_name, day=day, user_id=user_id, **values))
+            else:
+                for name, value in values.items():
+                    setattr(checkpoint, name, value)
+            
+            try:
+                await session.commit()
+                return
+            except IntegrityError:
+                # Another run checkpointed the user first; overwrite that one
+                await session.rollback()
+                if attempt:
+                    raise
+    
+    async def enqueue_work_items(
+        self, 
+        session: AsyncSession, 
+        job_name: str, 
+        day: date, 
+        user_ids: List[int], 
+        run_id: int
+    ) -> int:
+        """
+        Add pending work items (checkpoints) for a job's users on a day.
+        
+        Users without an item get a pending one and failed items are reset to
+        pending; completed items and those pending or leased by another run
+        are left alone, so enqueueing twice is harmless.
+        
+        Args:
+            session: Database session
+            job_name: Job name
+            day: Day to process
+            user_ids: Users to process
+            run_id: Run enqueueing the items
+            
+        Returns:
+            Number of items made pending
+        """
+        for attempt in range(2):
+            query = select(JobCheckpoint.user_id, JobCheckpoint.status).where(and_(
+                JobCheckpoint.job_name == job_name,
+                JobCheckpoint.day == day
+            ))
+            existing = dict((await session.execute(query)).all())
+            new_user_ids = [user_id for user_id in user_ids if user_id not in existing]
+            failed_user_ids = [user_id for user_id in user_ids if existing.get(user_id) == "failed"]
+            
+            now = datetime.utcnow()
+            if new_user_ids:
+                await session.execute(insert(JobCheckpoint.__table__), [
+                    {"job_name": job_name, "day": day, "user_id": user_id, "run_id": run_id,
+                     "status": "pending", "attempts": 0, "updated_at": now}
+                    for user_id in new_user_ids
+                ])
+            if failed_user_ids:
+                await session.execute(
+                    update(JobCheckpoint)
+                    .where(and_(
+                        JobCheckpoint.job_name == job_name,
+                        JobCheckpoint.day == day,
+                        JobCheckpoint.user_id.in_(failed_user_ids),
+                        JobCheckpoint.status == "failed"
+                    ))
+                    .values(status="pending", run_id=run_id, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+            
+            try:
+                await session.commit()
+                return len(new_user_ids) + len(failed_user_ids)
+            except IntegrityError:
+                # Another run enqueued some of the users first
+                await session.rollback()
+                if attempt:
+                    raise
+        return 0
+    
+    async def claim_work_items(
+        self, 
+        session: AsyncSession, 
+        job_name: str, 
+        day: date, 
+        owner: str, 
+        limit: int, 
+        lease_seconds: float
+    ) -> List[int]:
+        """
+        Lease up to limit pending work items for a worker.
+        
+        Items whose lease expired (their worker crashed or stalled) are
+        claimable again. On PostgreSQL the candidates are selected with
+        SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers on any
+        number of nodes skip each other's rows instead of waiting. Databases
+        without row locks (SQLite in tests and local runs) ignore the
+        locking clause; there the UPDATE re-checks that each item is still
+        claimable, so an item another worker took in between is left out.
+        
+        Args:
+            session: Database session
+            job_name: Job name
+            day: Day to process
+            owner: Worker identity recorded on the lease
+            limit: Maximum number of items to lease
+            lease_seconds: How long the worker has before the items may be claimed again
+            
+        Returns:
+            User IDs of the leased items
+        """
+        now = datetime.utcnow()
+        claimable = and_(
+            JobCheckpoint.job_name == job_name,
+            JobCheckpoint.day == day,
+            or_(
+                JobCheckpoint.status == "pending",
+                and_(JobCheckpoint.status == "leased", JobCheckpoint.lease_expires_at < now)
+            )
+        )
+        candidates = (
+            select(JobCheckpoint.checkpoint_id)
+            .where(claimable)
+            .order_by(JobCheckpoint.checkpoint_id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        checkpoint_ids = list((await session.execute(candidates)).scalars())
+        if not checkpoint_ids:
+            await session.commit()
+            return []
+        
+        claimed = await session.execute(
+            update(JobCheckpoint)
+            .where(and_(JobCheckpoint.checkpoint_id.in_(checkpoint_ids), claimable))
+            .values(
+                status="leased",
+                lease_owner=owner,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=JobCheckpoint.attempts + 1,
+                updated_at=now
+            )
+            .returning(JobCheckpoint.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        user_ids = sorted(claimed.scalars())
+        await session.commit()
+        return user_ids
+    
+    async def get_completed_user_ids(
+        self, 
+        session: AsyncSession, 
+        job_name: str, 
+        day: date
+    ) -> Set[int]:
+        """
+        Get the users a job has already completed for a day, in any run.
+        
+        Args:
+            session: Database session
+            job_name: Job name
+            day: Day to check
+            
+        Returns:
+            Set of user IDs
+        """
+        query = select(JobCheckpoint.user_id).where(and_(
+            JobCheckpoint.job_name == job_name,
+            JobCheckpoint.day == day,
+            JobCheckpoint.status == "completed"
+        ))
+        return set((await session.execute(query)).scalars())
     
     async def get_user_analysis_history(
         self, 
@@ -213,6 +1145,10 @@ class DatabaseService:
         """
         Get historical analysis results for a user.
         
+        Read through the read cache: until results are stored for the
+        user again, repeat requests for the same limit don't query the
+        database.
+        
         Args:
             session: Database session
             user_id: User ID
@@ -222,46 +1158,56 @@ class DatabaseService:
             List of analysis results with suggestions
         """
         # Find user record
-        user_query = select(User).where(User.username.like(f"%{user_id}%"))
-        user_result = await session.execute(user_query)
-        user = user_result.scalars().first()
+        user_pk = await self.resolve_user_id(session, user_id)
         
-        if not user:
+        if user_pk is None:
             logger.warning(f"User not found: {user_id}")
             return []
         
+        return await self.read_cache.get_or_load(
+            user_pk, "history", limit,
+            lambda: self._load_analysis_history(session, user_pk, limit)
+        )
+    
+    async def _load_analysis_history(
+        self, 
+        session: AsyncSession, 
+        user_pk: int, 
+        limit: int
+    ) -> List[Dict]:
         # Query analysis results
         query = (
             select(AnalysisResult)
-            .where(AnalysisResult.user_id == user.user_id)
+            .where(AnalysisResult.user_id == user_pk)
             .order_by(desc(AnalysisResult.date))
             .limit(limit)
         )
         result = await session.execute(query)
         analyses = result.scalars().all()
         
-        # Build response
-        history = []
-        for analysis in analyses:
-            # Get suggestions for this analysis
-            suggestion_query = select(ImprovementSuggestion).where(
-                ImprovementSuggestion.analysis_id == analysis.analysis_id
+        # Load the suggestions of all these analyses in one query
+        suggestions_by_analysis = {analysis.analysis_id: [] for analysis in analyses}
+        if analyses:
+            suggestion_query = (
+                select(ImprovementSuggestion)
+                .where(ImprovementSuggestion.analysis_id.in_(list(suggestions_by_analysis)))
+                .order_by(ImprovementSuggestion.suggestion_id)
             )
             suggestion_result = await session.execute(suggestion_query)
-            suggestions = suggestion_result.scalars().all()
-            
-            # Format suggestions
-            formatted_suggestions = [
-                {
+            for s in suggestion_result.scalars().all():
+                suggestions_by_analysis[s.analysis_id].append({
                     "suggestion_id": s.suggestion_id,
                     "suggestion_type": s.suggestion_type,
                     "suggestion_text": s.suggestion_text,
                     "priority_level": s.priority_level,
                     "example_text": s.example_text,
                     "improved_example": s.improved_example
-                }
-                for s in suggestions
-            ]
+                })
+        
+        # Build response
+        history = []
+        for analysis in analyses:
+            formatted_suggestions = suggestions_by_analysis[analysis.analysis_id]
             
             # Add to history
             history.append({
@@ -292,6 +1238,9 @@ class DatabaseService:
         """
         Get aggregated statistics for a user over a time period.
         
+        Read through the read cache, like get_user_analysis_history; the
+        period ends today, so cached statistics also miss on a new day.
+        
         Args:
             session: Database session
             user_id: User ID
@@ -301,11 +1250,9 @@ class DatabaseService:
             Dictionary of statistics
         """
         # Find user record
-        user_query = select(User).where(User.username.like(f"%{user_id}%"))
-        user_result = await session.execute(user_query)
-        user = user_result.scalars().first()
+        user_pk = await self.resolve_user_id(session, user_id)
         
-        if not user:
+        if user_pk is None:
             logger.warning(f"User not found: {user_id}")
             return {
                 "user_id": user_id,
@@ -316,27 +1263,67 @@ class DatabaseService:
                 "trend_data": {}
             }
         
-        # Calculate date range
+        # Cached by internal user ID, so the payload leaves out the id it was requested by
         end_date = date.today()
+        statistics = await self.read_cache.get_or_load(
+            user_pk, "statistics", f"{days}:{end_date.isoformat()}",
+            lambda: self._load_user_statistics(session, user_pk, days, end_date)
+        )
+        return {"user_id": user_id, **statistics}
+    
+    async def _load_user_statistics(
+        self, 
+        session: AsyncSession, 
+        user_pk: int, 
+        days: int, 
+        end_date: date
+    ) -> Dict[str, Any]:
+        # Calculate date range
         start_date = end_date - timedelta(days=days)
         
-        # Query analysis results within date range
-        query = (
-            select(AnalysisResult)
-            .where(and_(
-                AnalysisResult.user_id == user.user_id,
-                AnalysisResult.date >= start_date,
-                AnalysisResult.date <= end_date
-            ))
-            .order_by(AnalysisResult.date)
+        in_range = and_(
+            AnalysisResult.user_id == user_pk,
+            AnalysisResult.date >= start_date,
+            AnalysisResult.date <= end_date
         )
-        result = await session.execute(query)
-        analyses = result.scalars().all()
         
-        if not analyses:
-            logger.warning(f"No analysis results found for user {user_id} in the past {days} days")
+        # Totals and averages in one aggregate query; NULLs count as 0 in the averages
+        aggregates = [
+            func.count(),
+            func.coalesce(func.sum(AnalysisResult.total_speaking_time_seconds), 0),
+            func.coalesce(func.sum(AnalysisResult.total_conversations), 0),
+            func.coalesce(func.sum(AnalysisResult.filler_word_percentage), 0),
+            func.coalesce(func.sum(AnalysisResult.avg_words_per_minute), 0),
+            func.coalesce(func.sum(AnalysisResult.vocabulary_diversity_score), 0),
+            func.coalesce(func.sum(AnalysisResult.clarity_score), 0),
+            func.coalesce(func.sum(AnalysisResult.confidence_score), 0)
+        ]
+        trend_columns = [
+            AnalysisResult.date,
+            AnalysisResult.filler_word_percentage,
+            AnalysisResult.avg_words_per_minute,
+            AnalysisResult.confidence_score,
+            AnalysisResult.clarity_score
+        ]
+        trend_order = (AnalysisResult.date, AnalysisResult.analysis_id)
+        
+        if session.get_bind().dialect.name == "postgresql":
+            # The trend series come back as arrays from the same query
+            query = select(*aggregates, *[
+                array_agg(aggregate_order_by(column, *trend_order)) for column in trend_columns
+            ]).where(in_range)
+            row = (await session.execute(query)).one()
+            totals, trends = row[:len(aggregates)], row[len(aggregates):]
+        else:
+            totals = (await session.execute(select(*aggregates).where(in_range))).one()
+            trend_rows = (await session.execute(
+                select(*trend_columns).where(in_range).order_by(*trend_order))).all()
+            trends = list(zip(*trend_rows)) or [[] for _ in trend_columns]
+        
+        count = totals[0]
+        if not count:
+            logger.warning(f"No analysis results found for user {user_pk} in the past {days} days")
             return {
-                "user_id": user_id,
                 "days_analyzed": days,
                 "total_speaking_time": 0,
                 "total_conversations": 0,
@@ -344,26 +1331,20 @@ class DatabaseService:
                 "trend_data": {}
             }
         
-        # Calculate total speaking time and conversations
-        total_speaking_time = sum(a.total_speaking_time_seconds for a in analyses if a.total_speaking_time_seconds)
-        total_conversations = sum(a.total_conversations for a in analyses if a.total_conversations)
-        
-        # Calculate averages
-        avg_filler_percentage = sum(float(a.filler_word_percentage) for a in analyses if a.filler_word_percentage) / len(analyses)
-        avg_wpm = sum(a.avg_words_per_minute for a in analyses if a.avg_words_per_minute) / len(analyses)
-        avg_diversity = sum(float(a.vocabulary_diversity_score) for a in analyses if a.vocabulary_diversity_score) / len(analyses)
-        avg_clarity = sum(float(a.clarity_score) for a in analyses if a.clarity_score) / len(analyses)
-        avg_confidence = sum(float(a.confidence_score) for a in analyses if a.confidence_score) / len(analyses)
+        total_speaking_time, total_conversations = totals[1], totals[2]
+        avg_filler_percentage, avg_wpm, avg_diversity, avg_clarity, avg_confidence = [
+            (float(total) if isinstance(total, Decimal) else total) / count for total in totals[3:]
+        ]
         
         # Prepare trend data (daily values)
-        trend_dates = [a.date.isoformat() for a in analyses]
-        trend_filler = [float(a.filler_word_percentage) if a.filler_word_percentage else 0 for a in analyses]
-        trend_wpm = [a.avg_words_per_minute if a.avg_words_per_minute else 0 for a in analyses]
-        trend_confidence = [float(a.confidence_score) if a.confidence_score else 0 for a in analyses]
-        trend_clarity = [float(a.clarity_score) if a.clarity_score else 0 for a in analyses]
+        dates, filler, wpm, confidence, clarity = trends
+        trend_dates = [d.isoformat() for d in dates]
+        trend_filler = [float(v) if v else 0 for v in filler]
+        trend_wpm = [v if v else 0 for v in wpm]
+        trend_confidence = [float(v) if v else 0 for v in confidence]
+        trend_clarity = [float(v) if v else 0 for v in clarity]
         
         return {
-            "user_id": user_id,
             "days_analyzed": days,
             "total_speaking_time": total_speaking_time,
             "total_conversations": total_conversations,
@@ -447,22 +1428,16 @@ class DatabaseService:
             session_id: Session ID
             segments: Transcription segments
         """
-        # Find user record
-        user_query = select(User).where(User.username.like(f"%{user_id}%"))
-        user_result = await session.execute(user_query)
-        user = user_result.scalars().first()
-        
-        if not user:
-            # Create a placeholder user
-            user = await self.get_or_create_user(
-                session, 
-                user_id=user_id, 
-                username=f"User-{user_id[:8]}", 
-                device_id=f"OMI-{user_id[:8]}"
-            )
+        # Find user record, creating a placeholder user if needed
+        user_pk = await self.get_or_create_user_id(
+            session, 
+            user_id=user_id, 
+            username=f"User-{user_id[:8]}", 
+            device_id=f"OMI-{user_id[:8]}"
+        )
         
         # Store the conversation and segments
-        await self.store_conversation(session, user.user_id, session_id, segments)
+        await self.store_conversation(session, user_pk, session_id, segments)
         logger.info(f"Stored transcription with {len(segments)} segments for user {user_id}")
     
     async def get_audio_processing_status(
@@ -491,22 +1466,64 @@ class DatabaseService:
     
     async def get_all_users(
         self, 
-        session: AsyncSession
+        session: AsyncSession, 
+        active_on: Optional[date] = None
     ) -> List[User]:
         """
-        Get all active users in the system.
+        Get all users in the system.
         
         Args:
             session: Database session
+            active_on: Only return users with a conversation on this day
             
         Returns:
             List of User objects
         """
         query = select(User)
+        if active_on is not None:
+            query = query.where(self._active_on(active_on))
         result = await session.execute(query)
         users = result.scalars().all()
         return users
     
+    async def get_active_user_ids(
+        self, 
+        session: AsyncSession, 
+        day: date
+    ) -> List[int]:
+        """
+        Get the IDs of the users with a conversation on a day.
+        
+        Starts from the users.last_activity_date index, so users who have
+        been idle since before the day are never looked at; for the rest,
+        one indexed EXISTS on conversations checks the day itself.
+        
+        Args:
+            session: Database session
+            day: Day to find active users for
+            
+        Returns:
+            User IDs in ascending order
+        """
+        # Sorted here rather than in SQL, where ordering by the primary key
+        # can make the planner walk the whole table instead of the index
+        query = select(User.user_id).where(self._active_on(day))
+        return sorted((await session.execute(query)).scalars())
+    
+    @staticmethod
+    def _active_on(day: date):
+        """Condition on users selecting those with a conversation on the day."""
+        start_day = datetime.combine(day, datetime.min.time())
+        end_day = datetime.combine(day, datetime.max.time())
+        return and_(
+            User.last_activity_date >= day,
+            exists().where(and_(
+                Conversation.user_id == User.user_id,
+                Conversation.start_timestamp >= start_day,
+                Conversation.end_timestamp <= end_day
+            ))
+        )
+    
     async def get_user_daily_conversations(
         self, 
         session: AsyncSession, 
@@ -516,6 +1533,9 @@ class DatabaseService:
         """
         Get all conversations for a user on a specific date.
         
+        start_timestamp is bounded on both sides so PostgreSQL only scans
+        the monthly partition of the date.
+        
         Args:
             session: Database session
             user_id: User ID
@@ -533,6 +1553,7 @@ class DatabaseService:
             and_(
                 Conversation.user_id == user_id,
                 Conversation.start_timestamp >= start_day,
+                Conversation.start_timestamp <= end_day,
                 Conversation.end_timestamp <= end_day
             )
         )
@@ -542,6 +1563,128 @@ class DatabaseService:
         
         return conversations
     
+    async def stream_daily_user_segments(
+        self, 
+        session: AsyncSession, 
+        day: date, 
+        exclude_rollups: bool = False, 
+        batch_size: int = 1000,
+        user_ids: Optional[List[int]] = None
+    ) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """
+        Stream every user's speech segments for a day with a single query.
+        
+        Selects the user-speaking segments of all conversations that took
+        place on the day, ordered by user and time, and yields them one user
+        at a time, so the end-of-day job makes one round trip instead of one
+        per user and conversation. Rows are fetched batch_size at a time.
+        
+        The stream keeps a cursor open, so use a session that isn't
+        committed while it is being read. Both tables are filtered on their
+        partition keys, so PostgreSQL only scans the day's monthly partitions.
+        
+        Args:
+            session: Database session
+            day: Day to load segments for
+            exclude_rollups: Skip users with a daily_user_metrics row for the day
+            batch_size: Rows fetched per round trip
+            user_ids: Only load the segments of these users
+            
+        Yields:
+            Tuples of (user ID, segments in the analyzer's format)
+        """
+        query = (
+            select(
+                Conversation.user_id,
+                SpeechSegment.text_content,
+                SpeechSegment.speaker_identification,
+                SpeechSegment.is_user_speaking,
+                SpeechSegment.start_time,
+                SpeechSegment.end_time,
+                SpeechSegment.duration_seconds,
+                SpeechSegment.word_count
+            )
+            .join(Conversation, SpeechSegment.conversation_id == Conversation.conversation_id)
+            .where(self._daily_user_segments(day))
+            .order_by(Conversation.user_id, SpeechSegment.start_time, SpeechSegment.segment_id)
+            .execution_options(yield_per=batch_size)
+        )
+        if exclude_rollups:
+            query = query.where(~exists().where(and_(
+                DailyUserMetrics.user_id == Conversation.user_id,
+                DailyUserMetrics.date == day
+            )))
+        if user_ids is not None:
+            query = query.where(Conversation.user_id.in_(user_ids))
+        
+        result = await session.stream(query)
+        current_user_id = None
+        segments: List[Dict] = []
+        try:
+            async for row in result:
+                if row.user_id != current_user_id:
+                    if segments:
+                        yield current_user_id, segments
+                    current_user_id, segments = row.user_id, []
+                segments.append({
+                    "text_content": row.text_content,
+                    "speaker_identification": row.speaker_identification,
+                    "is_user_speaking": row.is_user_speaking,
+                    "start_time": row.start_time,
+                    "end_time": row.end_time,
+                    "duration_seconds": row.duration_seconds,
+                    "word_count": row.word_count
+                })
+            if segments:
+                yield current_user_id, segments
+        finally:
+            await result.close()
+    
+    async def count_daily_user_segments(
+        self, 
+        session: AsyncSession, 
+        day: date, 
+        user_ids: Optional[List[int]] = None
+    ) -> Dict[int, int]:
+        """
+        Count the user segments stream_daily_user_segments would load for each user.
+        
+        Args:
+            session: Database session
+            day: Day to count segments for
+            user_ids: Only count the segments of these users
+            
+        Returns:
+            Segment counts keyed by user ID; users without segments are left out
+        """
+        query = (
+            select(Conversation.user_id, func.count(SpeechSegment.segment_id))
+            .join(Conversation, SpeechSegment.conversation_id == Conversation.conversation_id)
+            .where(self._daily_user_segments(day))
+            .group_by(Conversation.user_id)
+        )
+        if user_ids is not None:
+            query = query.where(Conversation.user_id.in_(user_ids))
+        return {user_id: count for user_id, count in (await session.execute(query)).all()}
+    
+    @staticmethod
+    def _daily_user_segments(day: date):
+        """
+        Condition on speech segments joined with their conversations selecting
+        the user segments of the conversations that took place on the day.
+        """
+        start_day = datetime.combine(day, datetime.min.time())
+        end_day = datetime.combine(day, datetime.max.time())
+        segments_from, segments_until = month_window(day, day)
+        return and_(
+            Conversation.start_timestamp >= start_day,
+            Conversation.start_timestamp <= end_day,
+            Conversation.end_timestamp <= end_day,
+            SpeechSegment.start_time >= segments_from,
+            SpeechSegment.start_time < segments_until,
+            SpeechSegment.is_user_speaking.is_(True)
+        )
+    
     async def get_conversation_segments(
         self, 
         session: AsyncSession, 
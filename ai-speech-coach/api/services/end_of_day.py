@@ -0,0 +1,326 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import date, datetime
+
+from analyzer.instrumentation import StageTimings
+
+logger = logging.getLogger(__name__)
+
+# Number of users analyzed and stored at the same time
+END_OF_DAY_CONCURRENCY = int(os.getenv("END_OF_DAY_CONCURRENCY", "4"))
+
+# How long a worker may hold leased users before other workers can claim them
+END_OF_DAY_LEASE_SECONDS = float(os.getenv("END_OF_DAY_LEASE_SECONDS", "600"))
+
+# Users queued per worker ahead of the workers, bounding memory while loading
+QUEUE_DEPTH_PER_WORKER = 2
+
+# Number of slowest users kept in the job status
+SLOWEST_USERS = 10
+
+# Name of the job in the job_runs ledger and job_checkpoints
+JOB_NAME = "end_of_day"
+
+# Queue item telling a worker that no more users are coming
+_DONE = None
+
+
+class EndOfDayJob:
+    """
+    One run of the end-of-day analysis over every user with activity on a day.
+
+    The per-user work lives in a database-backed queue: one job_checkpoints
+    row per user and day. Enqueueing starts from the users active on the day
+    (see DatabaseService.get_active_user_ids), so idle accounts cost nothing,
+    and skips users an earlier run completed. Draining leases items in
+    batches (DatabaseService.claim_work_items, SELECT ... FOR UPDATE SKIP
+    LOCKED on PostgreSQL), so any number of runs on any number of nodes can
+    drain one day's queue in parallel; items whose lease expires, because
+    their worker crashed, are claimed again.
+
+    Within a run, the producer loads each leased batch onto a bounded queue:
+    the users whose webhooks kept a daily_user_metrics rollup covering all
+    their stored segments (only their scores need to be finalized), then
+    everyone else's speech segments from one streaming query. `concurrency`
+    workers take users off the queue; each has its own database session
+    and submits its analyses to the shared analyzer service's executor (the
+    registry's, see analyzer.registry), so analysis of one user overlaps
+    with storing another's results without a pool of workers per run. A
+    failure for one user is recorded on its item without stopping the
+    others, and a later run redoes it.
+
+    Runs are idempotent: each is recorded in the job_runs ledger, and
+    results are stored as the day's summary, which is upserted on
+    (user_id, date), so overlapping runs never store duplicates.
+
+    status() reports progress while the job runs and per-user timings
+    afterwards, for logs and the /health/end-of-day endpoint.
+    """
+
+    def __init__(self, db_service, analyzer_service, session_factory: Callable,
+                 concurrency: Optional[int] = None,
+                 analyzer_factory: Optional[Callable] = None,
+                 enqueue: bool = True, drain: bool = True,
+                 worker_id: Optional[str] = None, lease_seconds: Optional[float] = None):
+        """
+        Initialize the job.
+
+        Args:
+            db_service: DatabaseService used for loading and storing
+            analyzer_service: Shared SpeechAnalyzerService the workers analyze with
+            session_factory: Session factory (normally the batch engine profile's)
+            concurrency: Number of workers (defaults to END_OF_DAY_CONCURRENCY)
+            analyzer_factory: Builds a worker's own analyzer service from analyzer_service
+                (by default every worker uses analyzer_service)
+            enqueue: Whether to enqueue the day's active users
+            drain: Whether to analyze queued users (False leaves them to worker processes)
+            worker_id: Identity recorded on leases (defaults to host, process and a random suffix)
+            lease_seconds: How long leased users stay claimed (defaults to END_OF_DAY_LEASE_SECONDS)
+        """
+        self.db_service = db_service
+        self.analyzer_service = analyzer_service
+        self.session_factory = session_factory
+        self.concurrency = max(1, concurrency or END_OF_DAY_CONCURRENCY)
+        self.analyzer_factory = analyzer_factory
+        self.enqueue = enqueue
+        self.drain = drain
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds or END_OF_DAY_LEASE_SECONDS
+
+        self.timings = StageTimings(enabled=True)
+        self.state = "pending"
+        self.day: Optional[date] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.active_users: Optional[int] = None
+        self.enqueued = 0
+        self.claimed = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rollups = 0
+        self.skipped = 0
+        self.run_id: Optional[int] = None
+        self.loading_done = False
+        self._started = 0.0
+        self._elapsed = 0.0
+        self._user_seconds: List[Tuple[float, int]] = []
+
+    async def run(self, day: date) -> Dict[str, Any]:
+        """
+        Enqueue and/or drain the day's per-user work.
+
+        Args:
+            day: Day to analyze
+
+        Returns:
+            The final status()
+        """
+        self.day = day
+        self.state = "running"
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        async with self.session_factory() as session:
+            self.run_id = (await self.db_service.start_job_run(session, JOB_NAME, day)).run_id
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * QUEUE_DEPTH_PER_WORKER)
+        workers = [asyncio.create_task(self._worker(index, queue)) for index in range(self.concurrency)]
+
+        try:
+            if self.enqueue:
+                await self._enqueue_users()
+            if self.drain and (self.active_users or not self.enqueue):
+                await self._produce(queue)
+        except Exception as e:
+            self.state = "failed"
+            logger.error(f"Error loading end-of-day work: {str(e)}")
+        finally:
+            self.loading_done = True
+            for _ in workers:
+                await queue.put(_DONE)
+            await asyncio.gather(*workers)
+
+        self._elapsed = time.perf_counter() - self._started
+        self.finished_at = datetime.now()
+        if self.state == "running":
+            self.state = "completed"
+        async with self.session_factory() as session:
+            await self.db_service.finish_job_run(
+                session, self.run_id, self.state, self.completed, self.failed, self.skipped)
+        status = self.status()
+        logger.info(
+            f"End-of-day analysis run {self.run_id} for {day}: {status['completed']} users completed, "
+            f"{status['failed']} failed, {status['skipped']} already done "
+            f"in {status['elapsed_seconds']:.1f}s ({status['users_per_second']:.1f} users/s, "
+            f"{self.concurrency} workers on {self.worker_id})"
+        )
+        return status
+
+    async def _enqueue_users(self) -> None:
+        async with self.session_factory() as session:
+            active_user_ids = await self.db_service.get_active_user_ids(session, self.day)
+            self.active_users = len(active_user_ids)
+            if active_user_ids:
+                # Users completed by an earlier run for the day are left alone
+                completed = await self.db_service.get_completed_user_ids(session, JOB_NAME, self.day)
+                self.skipped = len(completed)
+                self.enqueued = await self.db_service.enqueue_work_items(
+                    session, JOB_NAME, self.day, active_user_ids, self.run_id)
+        logger.info(
+            f"End-of-day analysis for {self.day}: {self.active_users} active users, "
+            f"{self.enqueued} enqueued, {self.skipped} already done"
+        )
+
+    async def _produce(self, queue: asyncio.Queue) -> None:
+        claim_size = self.concurrency * QUEUE_DEPTH_PER_WORKER
+        async with self.session_factory() as read_session:
+            while True:
+                user_ids = await self.db_service.claim_work_items(
+                    read_session, JOB_NAME, self.day, self.worker_id, claim_size, self.lease_seconds)
+                if not user_ids:
+                    return
+                self.claimed += len(user_ids)
+                loaded = await self._load_users(read_session, queue, user_ids)
+
+                # Nothing was loaded for the rest. A webhook may have stored their
+                # speech since, so look once more and only mark users without any
+                # segments or rollup for the day (only other speakers talked) as done
+                missing = [user_id for user_id in user_ids if user_id not in loaded]
+                if missing:
+                    loaded = await self._load_users(read_session, queue, missing)
+                for user_id in missing:
+                    if user_id not in loaded:
+                        await self.db_service.record_checkpoint(
+                            read_session, JOB_NAME, self.day, user_id, self.run_id, "completed")
+
+    async def _load_users(self, read_session, queue: asyncio.Queue, user_ids: List[int]) -> set:
+        """Queue the rollups or segments of users, returning the IDs of those queued."""
+        loaded = set()
+
+        # Users whose webhooks kept a daily rollup only need their scores
+        # finalized, unless segments were also stored another way (audio
+        # uploads, imports): then the rollup misses some of the day's
+        # speech and the user is re-analyzed from all of it
+        rollups = await self.db_service.get_daily_metrics(read_session, self.day, user_ids=user_ids)
+        if rollups:
+            segment_counts = await self.db_service.count_daily_user_segments(
+                read_session, self.day, user_ids=list(rollups))
+            rollups = {user_id: accumulator for user_id, accumulator in rollups.items()
+                       if segment_counts.get(user_id, 0) <= accumulator.segment_count}
+        self.rollups += len(rollups)
+        for user_id, accumulator in rollups.items():
+            loaded.add(user_id)
+            await self._enqueue(queue, ("rollup", user_id, accumulator))
+
+        # Everyone else is re-analyzed from the day's speech segments, loaded
+        # with one streaming query per batch
+        async for user_id, segments in self.db_service.stream_daily_user_segments(
+            read_session, self.day,
+            user_ids=[user_id for user_id in user_ids if user_id not in rollups]
+        ):
+            loaded.add(user_id)
+            await self._enqueue(queue, ("segments", user_id, segments))
+        return loaded
+
+    async def _enqueue(self, queue: asyncio.Queue, item: Tuple) -> None:
+        self.queued += 1
+        await queue.put(item)
+
+    async def _worker(self, index: int, queue: asyncio.Queue) -> None:
+        analyzer_service = (self.analyzer_factory(self.analyzer_service) if self.analyzer_factory
+                            else self.analyzer_service)
+        try:
+            async with self.session_factory() as session:
+                while True:
+                    item = await queue.get()
+                    if item is _DONE:
+                        return
+                    await self._process(session, analyzer_service, *item)
+        finally:
+            if analyzer_service is not self.analyzer_service:
+                # Waits for running analyses, so it's kept off the event loop
+                await asyncio.to_thread(analyzer_service.shutdown)
+
+    async def _process(self, session, analyzer_service, kind: str, user_id: int, payload: Any) -> None:
+        started = time.perf_counter()
+        try:
+            with self.timings.stage(f"user.{kind}.analyze"):
+                if kind == "rollup":
+                    analysis_result = analyzer_service.finalize_accumulator(payload)
+                else:
+                    # Full-day transcripts are analyzed once, so they stay out of the result cache
+                    analysis_result = await analyzer_service.analyze_transcript(payload, use_cache=False)
+            if "error" in analysis_result:
+                raise ValueError(analysis_result["error"])
+
+            with self.timings.stage("user.store"):
+                stored = await self.db_service.store_analysis_results(
+                    session,
+                    user_id=user_id,
+                    metrics=analysis_result["metrics"],
+                    suggestions=analysis_result["suggestions"],
+                    day=self.day,
+                    daily_summary=True
+                )
+                await self.db_service.record_checkpoint(
+                    session, JOB_NAME, self.day, user_id, self.run_id, "completed",
+                    analysis_id=stored.analysis_id)
+            self.completed += 1
+
+        except Exception as e:
+            self.failed += 1
+            await session.rollback()
+            logger.error(f"Error in end-of-day analysis for user {user_id}: {str(e)}")
+            try:
+                await self.db_service.record_checkpoint(
+                    session, JOB_NAME, self.day, user_id, self.run_id, "failed", error=str(e))
+            except Exception as checkpoint_error:
+                await session.rollback()
+                logger.error(f"Error recording end-of-day checkpoint for user {user_id}: {str(checkpoint_error)}")
+
+        seconds = time.perf_counter() - started
+        self.timings.record("user", seconds)
+        self._user_seconds.append((seconds, user_id))
+        self._log_progress()
+
+    def _log_progress(self) -> None:
+        done = self.completed + self.failed
+        # Roughly every tenth of the users leased so far, and the last one
+        total = self.claimed
+        step = max(1, total // 10)
+        if done % step == 0 or done == total:
+            logger.info(f"End-of-day analysis progress: {done}/{total} users ({self.failed} failed)")
+
+    def status(self) -> Dict[str, Any]:
+        """Progress, throughput and per-user timings of the run."""
+        elapsed = self._elapsed if self.finished_at else (
+            time.perf_counter() - self._started if self.started_at else 0.0)
+        done = self.completed + self.failed
+        slowest = sorted(self._user_seconds, reverse=True)[:SLOWEST_USERS]
+        return {
+            "run_id": self.run_id,
+            "state": self.state,
+            "day": self.day.isoformat() if self.day else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "loading_done": self.loading_done,
+            "active_users": self.active_users,
+            "enqueued": self.enqueued,
+            "claimed": self.claimed,
+            "queued": self.queued,
+            "rollups": self.rollups,
+            "skipped": self.skipped,
+            "completed": self.completed,
+            "failed": self.failed,
+            "elapsed_seconds": elapsed,
+            "users_per_second": done / elapsed if elapsed else 0.0,
+            "timings": self.timings.snapshot(),
+            "slowest_users": [{"user_id": user_id, "seconds": seconds} for seconds, user_id in slowest]
+        }
@@ -0,0 +1,253 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Directory (under the temp directory) shared by web workers when WEB_CONCURRENCY > 1
+DEFAULT_SHARED_CACHE_DIR = "speech_coach_read_cache"
+
+
+class InMemoryCacheBackend:
+    """
+    Process-local LRU store for ReadCache.
+
+    Holds at most max_entries values; values older than the TTL are dropped
+    when read.
+    """
+
+    # Reads and writes don't block the event loop
+    blocking = False
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            # Callers get their own copy so they can't modify the cached value
+            return copy.deepcopy(entry[0])
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(value), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DirectoryCacheBackend:
+    """
+    Store for ReadCache shared by processes through a directory of JSON files.
+
+    Stands in for a shared cache server: every API worker (and the
+    end-of-day job) pointed at the same directory sees the others' entries
+    and invalidations. Values older than the TTL are removed when read.
+    """
+
+    # File I/O runs in a thread so the event loop isn't blocked
+    blocking = True
+
+    def __init__(self, cache_dir: str, ttl_seconds: float):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.cache_dir) if name.endswith(".json"))
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading read cache entry {key}: {str(e)}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        try:
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(value, f, default=str)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error writing read cache entry {key}: {str(e)}")
+
+    def clear(self) -> None:
+        for name in os.listdir(self.cache_dir):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json")
+
+
+class ReadCache:
+    """
+    Read-through cache of per-user dashboard payloads (history, statistics).
+
+    Entries are keyed by user, kind and parameters (e.g. the history limit)
+    plus the user's current generation, a random token kept in the same
+    backend. invalidate() replaces the generation, so every payload cached
+    for the user misses at once without the backend having to find them;
+    the old entries age out. A reader that loaded from the database before
+    a write stores its result under the old generation, where nobody looks
+    any more, so writes are never hidden by a racing read.
+
+    Generation tokens are written after the entries they supersede and read
+    with every lookup, so they outlive those entries under both the TTL and
+    LRU eviction, and a missing token can't bring back stale entries.
+
+    The backend is in-process (InMemoryCacheBackend) by default; with
+    READ_CACHE_BACKEND=directory and READ_CACHE_DIR, processes share a
+    DirectoryCacheBackend, so a write in one process invalidates the
+    others. Several uvicorn workers (WEB_CONCURRENCY above 1) would each
+    serve stale entries from their own memory, so unless a backend is
+    chosen explicitly they share a directory under the temp directory
+    instead. Any object with get(key), set(key, value), clear() and a
+    blocking attribute can be passed as backend. Sizes come from the
+    READ_CACHE_MAX_ENTRIES and READ_CACHE_TTL_SECONDS environment
+    variables. A max_entries of 0 disables the cache.
+    """
+
+    def __init__(self, backend=None, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None, cache_dir: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: Store for entries (defaults to READ_CACHE_BACKEND)
+            max_entries: Maximum number of in-memory entries
+            ttl_seconds: Age after which an entry is loaded again
+            cache_dir: Directory for the directory backend
+        """
+        self.max_entries = (max_entries if max_entries is not None
+                            else int(os.getenv("READ_CACHE_MAX_ENTRIES", 10000)))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("READ_CACHE_TTL_SECONDS", 300))
+        if backend is None:
+            cache_dir = cache_dir or os.getenv("READ_CACHE_DIR")
+            backend_name = os.getenv("READ_CACHE_BACKEND")
+            if backend_name is None and not cache_dir and int(os.getenv("WEB_CONCURRENCY", 1)) > 1:
+                backend_name = "directory"
+                cache_dir = os.path.join(tempfile.gettempdir(), DEFAULT_SHARED_CACHE_DIR)
+                logger.info(f"Sharing the read cache between web workers through {cache_dir}")
+            if (backend_name or "memory").lower() == "directory" or cache_dir:
+                if not cache_dir:
+                    raise ValueError("READ_CACHE_DIR is required for the directory read cache backend")
+                backend = DirectoryCacheBackend(cache_dir, self.ttl_seconds)
+            else:
+                backend = InMemoryCacheBackend(self.max_entries, self.ttl_seconds)
+        self.backend = backend
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    async def get_or_load(self, user_id: int, kind: str, params: Any,
+                          loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a user's cached payload, loading and caching it on a miss.
+
+        Args:
+            user_id: Internal user ID the payload belongs to
+            kind: Payload name, e.g. "history"
+            params: Parameters the payload depends on, e.g. the limit
+            loader: Coroutine function loading the payload from the database
+
+        Returns:
+            The cached or freshly loaded payload
+        """
+        if not self.enabled:
+            return await loader()
+
+        generation = await self._call(self.backend.get, self._generation_key(user_id)) or "0"
+        key = f"{kind}:{user_id}:{generation}:{params}"
+        value = await self._call(self.backend.get, key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await loader()
+        await self._call(self.backend.set, key, value)
+        return value
+
+    async def invalidate(self, user_id: int) -> None:
+        """Make every cached payload of a user miss, e.g. after storing new results for it."""
+        if not self.enabled:
+            return
+        await self._call(self.backend.set, self._generation_key(user_id), uuid.uuid4().hex)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": getattr(self.backend, "evictions", 0),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    async def _call(self, method: Callable, *args) -> Any:
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    @staticmethod
+    def _generation_key(user_id: int) -> str:
+        return f"generation:{user_id}"
+
+
+# Shared by every DatabaseService in this process so a write anywhere invalidates it everywhere
+read_cache = ReadCache()
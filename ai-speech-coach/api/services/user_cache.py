@@ -0,0 +1,103 @@
+from typing import Any, Dict, Optional
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Cached answer for external ids that have no user yet
+UNKNOWN_USER = -1
+
+
+class UserIdCache:
+    """
+    Bounded mapping from external (OMI) user ids to internal users.user_id.
+    
+    Holds at most max_entries ids with LRU eviction; entries older than the
+    TTL are looked up again. Ids with no user are cached as UNKNOWN_USER so
+    dashboard polls for unknown users don't hit the database either, which
+    is why creating a user must call put() (or invalidate()) for its id.
+    
+    Defaults come from the USER_CACHE_MAX_ENTRIES and USER_CACHE_TTL_SECONDS
+    environment variables. A max_entries of 0 disables the cache.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of ids kept
+            ttl_seconds: Age after which an id is resolved again
+        """
+        self.max_entries = (max_entries if max_entries is not None
+                            else int(os.getenv("USER_CACHE_MAX_ENTRIES", 100000)))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("USER_CACHE_TTL_SECONDS", 3600))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, external_id: str) -> Optional[int]:
+        """
+        Look up an external id.
+        
+        Returns:
+            The internal user id, UNKNOWN_USER if the id is known to have no
+            user, or None if the id isn't cached
+        """
+        with self._lock:
+            entry = self._entries.get(external_id)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[external_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(external_id)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, external_id: str, user_id: int) -> None:
+        """Cache the internal user id (or UNKNOWN_USER) of an external id."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[external_id] = (user_id, time.monotonic())
+            self._entries.move_to_end(external_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, external_id: str) -> None:
+        """Forget an external id, e.g. after its user was created or changed."""
+        with self._lock:
+            self._entries.pop(external_id, None)
+    
+    def clear(self) -> None:
+        """Forget all ids."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+# Shared by every DatabaseService in this process so creating a user anywhere invalidates it everywhere
+user_id_cache = UserIdCache()
@@ -0,0 +1,237 @@
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from datetime import date
+
+from analyzer.instrumentation import StageTimings
+from analyzer.session_state import SessionAccumulator
+
+logger = logging.getLogger(__name__)
+
+# Queue item telling the writer to stop once everything before it is written
+_STOP = object()
+
+
+class PendingWebhook:
+    """An analyzed webhook waiting to be written."""
+    __slots__ = ("external_id", "session_id", "segments", "metrics", "suggestions",
+                 "day", "delta", "chunk_id", "enqueued_at")
+
+    def __init__(self, external_id: str, session_id: str, segments: List[Dict], metrics: Dict,
+                 suggestions: List[Dict], day: date, delta: SessionAccumulator,
+                 chunk_id: Optional[str] = None):
+        self.external_id = external_id
+        self.session_id = session_id
+        self.segments = segments
+        self.metrics = metrics
+        self.suggestions = suggestions
+        self.day = day
+        self.delta = delta
+        self.chunk_id = chunk_id
+        self.enqueued_at = time.monotonic()
+
+
+class WriteBehindWriter:
+    """
+    Bounded in-process queue of analyzed webhooks, written in batches.
+
+    With write-behind enabled, /api/transcript/analyze responds as soon as
+    the analysis is computed and submits the persistence work here. One
+    background task drains the queue: it waits up to max_delay_seconds for
+    up to batch_size webhooks and writes them together, so many webhooks
+    share one transaction for conversations, segments and analysis results
+    (DatabaseService.store_webhook_batch) and one per user for the daily
+    rollup (DatabaseService.update_daily_metrics_many). If a batch fails,
+    its webhooks are retried one at a time so one bad webhook can't lose
+    the others. Both writes are keyed on the webhook's chunk fingerprint,
+    so retrying webhooks that were already committed is a no-op.
+
+    When the queue is full, submit() waits for room, which pushes back on
+    webhooks instead of growing memory. close() writes everything still
+    queued, so nothing accepted is lost on a clean shutdown; webhooks still
+    queued when the process crashes are lost, which is the trade-off of
+    this mode. stats() reports queue depth and lag (time from submit to
+    commit) for /health/write-behind.
+
+    Enabled with TRANSCRIPT_WRITE_BEHIND=true; sizes come from the
+    WRITE_BEHIND_QUEUE_SIZE, WRITE_BEHIND_BATCH_SIZE and
+    WRITE_BEHIND_MAX_DELAY_SECONDS environment variables.
+    """
+
+    def __init__(self, db_service, session_factory: Callable, enabled: Optional[bool] = None,
+                 max_queue: Optional[int] = None, batch_size: Optional[int] = None,
+                 max_delay_seconds: Optional[float] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            db_service: DatabaseService used for writing
+            session_factory: Session factory for the writer's sessions
+            enabled: Whether webhooks are written behind (defaults to TRANSCRIPT_WRITE_BEHIND)
+            max_queue: Maximum number of queued webhooks
+            batch_size: Maximum number of webhooks written together
+            max_delay_seconds: How long the writer waits to fill a batch
+        """
+        if enabled is None:
+            enabled = os.getenv("TRANSCRIPT_WRITE_BEHIND", "false").lower() in ("1", "true")
+        self.enabled = enabled
+        self.db_service = db_service
+        self.session_factory = session_factory
+        self.max_queue = max_queue or int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", 1000))
+        self.batch_size = batch_size or int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 100))
+        self.max_delay_seconds = (max_delay_seconds if max_delay_seconds is not None
+                                  else float(os.getenv("WRITE_BEHIND_MAX_DELAY_SECONDS", 0.2)))
+
+        self.timings = StageTimings(enabled=True)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        # Submit times of queued webhooks, oldest first, for the lag of the oldest one
+        self._pending_since: deque = deque()
+
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def accepting(self) -> bool:
+        """Whether submit() takes webhooks (enabled and not closed)."""
+        return self.enabled and not self._closed
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Started write-behind writer (queue {self.max_queue}, batches of {self.batch_size})")
+
+    async def submit(self, webhook: PendingWebhook) -> None:
+        """
+        Queue an analyzed webhook for writing, waiting for room if the queue is full.
+
+        Raises:
+            RuntimeError: If the writer is disabled or closed
+        """
+        if not self.accepting:
+            raise RuntimeError("Write-behind writer is not accepting webhooks")
+        self.start()
+        webhook.enqueued_at = time.monotonic()
+        await self._queue.put(webhook)
+        self._pending_since.append(webhook.enqueued_at)
+        self.submitted += 1
+
+    async def close(self) -> None:
+        """Stop accepting webhooks and write everything still queued."""
+        self._closed = True
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info(f"Stopped write-behind writer: {self.written} webhooks written, {self.failed} failed")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and lag for monitoring."""
+        timings = self.timings.snapshot()
+        return {
+            "enabled": self.enabled,
+            "queue_depth": len(self._pending_since),
+            "max_queue": self.max_queue,
+            "oldest_pending_seconds": (time.monotonic() - self._pending_since[0]) if self._pending_since else 0.0,
+            "submitted": self.submitted,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "mean_batch_size": self.written / self.batches if self.batches else 0.0,
+            "lag": timings.get("lag"),
+            "batch_write": timings.get("batch_write")
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+
+            # Fill the batch with whatever arrives before the deadline
+            deadline = loop.time() + self.max_delay_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                try:
+                    if self._queue.empty() and remaining > 0:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            for _ in batch:
+                self._pending_since.popleft()
+            await self._write(batch)
+
+    async def _write(self, batch: List[PendingWebhook]) -> None:
+        started = time.perf_counter()
+        try:
+            await self._store(batch)
+        except Exception as e:
+            logger.error(f"Error writing a batch of {len(batch)} webhooks, retrying one at a time: {str(e)}")
+            for webhook in batch:
+                try:
+                    await self._store([webhook])
+                except Exception as webhook_error:
+                    self.failed += 1
+                    logger.error(f"Error writing webhook for session {webhook.session_id}: {str(webhook_error)}")
+        self.timings.record("batch_write", time.perf_counter() - started)
+        self.batches += 1
+
+    async def _store(self, batch: List[PendingWebhook]) -> None:
+        async with self.session_factory() as session:
+            user_ids = {}
+            for webhook in batch:
+                if webhook.external_id not in user_ids:
+                    user_ids[webhook.external_id] = await self.db_service.get_or_create_user_id(
+                        session,
+                        user_id=webhook.external_id,
+                        username=f"User-{webhook.external_id[:8]}",  # Generate temporary username
+                        device_id=f"OMI-{webhook.external_id[:8]}"   # Generate temporary device ID
+                    )
+
+            await self.db_service.store_webhook_batch(session, [
+                {
+                    "user_id": user_ids[webhook.external_id],
+                    "session_id": webhook.session_id,
+                    "segments": webhook.segments,
+                    "metrics": webhook.metrics,
+                    "suggestions": webhook.suggestions,
+                    "chunk_id": webhook.chunk_id
+                }
+                for webhook in batch
+            ])
+
+            written_at = time.monotonic()
+            for webhook in batch:
+                self.timings.record("lag", written_at - webhook.enqueued_at)
+            self.written += len(batch)
+
+            # One rollup transaction per user and day for the whole batch; the
+            # webhooks are stored by now, so a failure here is only logged
+            chunks = defaultdict(list)
+            for webhook in batch:
+                chunks[(user_ids[webhook.external_id], webhook.day)].append((webhook.delta, webhook.chunk_id))
+            for (user_id, day), user_chunks in chunks.items():
+                try:
+                    await self.db_service.update_daily_metrics_many(session, user_id, day, user_chunks)
+                except Exception as e:
+                    await session.rollback()
+                    logger.error(f"Error updating daily metrics for user {user_id}: {str(e)}")
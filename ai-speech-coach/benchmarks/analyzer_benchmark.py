@@ -0,0 +1,238 @@
+"""
+Benchmark suite for the analyzer package.
+
+Runs FillerWordAnalyzer.analyze_text, PaceAnalyzer.analyze_segments,
+VocabularyAnalyzer.analyze_text and SpeechAnalyzerService.analyze_transcript
+over deterministic synthetic corpora (1k to 1M words, 10 to 100k segments)
+and reports throughput, latency percentiles and peak memory as JSON.
+
+With --baseline, results are compared against an earlier report and the
+process exits with status 1 if any benchmark's median latency or peak
+memory regressed by more than the threshold.
+
+Usage:
+    python -m benchmarks.analyzer_benchmark [--max-words 100000] [--repeat 5]
+        [--output benchmarks/results/latest.json]
+        [--baseline benchmarks/results/baseline.json] [--threshold 0.2]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.filler_words import FillerWordAnalyzer
+from analyzer.pace import PaceAnalyzer
+from analyzer.vocabulary import VocabularyAnalyzer
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# (words, segments) for each synthetic corpus
+CORPUS_SIZES = [
+    (1_000, 10),
+    (10_000, 100),
+    (100_000, 1_000),
+    (1_000_000, 100_000)
+]
+
+BASE_WORDS = (
+    "the speech coach helps people improve how they talk in meetings and presentations "
+    "by measuring pace vocabulary and filler words while giving practical feedback about "
+    "clarity confidence structure pauses emphasis storytelling questions answers"
+).split()
+
+FILLERS = list(FillerWordAnalyzer.COMMON_FILLER_WORDS.keys())
+
+
+def build_segments(word_count: int, segment_count: int, seed: int = 0) -> List[Dict]:
+    """
+    Build a deterministic transcript of roughly word_count words.
+
+    About 8% of words are fillers and sentences end every dozen words or so.
+    Segments alternate between the user and another speaker (one in four is
+    someone else) and have float timestamps at a plausible speaking pace.
+    """
+    rng = random.Random(seed)
+    words_per_segment = max(1, word_count // segment_count)
+    segments = []
+    offset = 0.0
+
+    for index in range(segment_count):
+        words = []
+        while len(words) < words_per_segment:
+            if rng.random() < 0.08:
+                words.extend(rng.choice(FILLERS).split())
+            else:
+                words.append(rng.choice(BASE_WORDS))
+            if rng.random() < 0.08:
+                words[-1] += rng.choice(".,!?")
+        if not words[-1][-1] in ".!?":
+            words[-1] += "."
+
+        duration = len(words) / rng.uniform(110, 190) * 60
+        segments.append({
+            "text_content": " ".join(words),
+            "speaker_identification": "SPEAKER_00" if index % 4 else "SPEAKER_01",
+            "is_user_speaking": index % 4 != 0,
+            "start_time": offset,
+            "end_time": offset + duration
+        })
+        offset += duration + rng.uniform(0.2, 1.5)
+
+    return segments
+
+
+def build_cases(segments: List[Dict]) -> Dict[str, Callable[[], Any]]:
+    """Build the benchmarked calls for one corpus."""
+    filler_word_analyzer = FillerWordAnalyzer()
+    pace_analyzer = PaceAnalyzer()
+    vocabulary_analyzer = VocabularyAnalyzer()
+    service = SpeechAnalyzerService(
+        executor_backend="inline",
+        filler_word_analyzer=filler_word_analyzer,
+        pace_analyzer=pace_analyzer,
+        vocabulary_analyzer=vocabulary_analyzer
+    )
+    text = " ".join(s["text_content"] for s in segments)
+
+    return {
+        "filler_words.analyze_text": lambda: filler_word_analyzer.analyze_text(text),
+        "pace.analyze_segments": lambda: pace_analyzer.analyze_segments(segments),
+        "vocabulary.analyze_text": lambda: vocabulary_analyzer.analyze_text(text),
+        "service.analyze_transcript": lambda: asyncio.run(service.analyze_transcript(segments))
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Time `repeat` calls, then measure peak memory of one more call."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # Traced separately because tracemalloc slows the traced code down
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "min_seconds": float(np.min(timings)),
+        "p50_seconds": float(np.percentile(timings, 50)),
+        "p95_seconds": float(np.percentile(timings, 95)),
+        "p99_seconds": float(np.percentile(timings, 99)),
+        "peak_memory_mb": peak / (1024 * 1024)
+    }
+
+
+def run_suite(max_words: int, repeat: int) -> Dict[str, Any]:
+    """
+    Run every benchmark on every corpus up to max_words.
+
+    Returns:
+        Report with environment details and one entry per benchmark and corpus
+    """
+    results = {}
+    for word_count, segment_count in CORPUS_SIZES:
+        if word_count > max_words:
+            continue
+
+        segments = build_segments(word_count, segment_count)
+        actual_words = sum(len(s["text_content"].split()) for s in segments)
+
+        for name, func in build_cases(segments).items():
+            # Larger corpora get fewer repetitions so the suite finishes in minutes
+            case_repeat = max(1, repeat if word_count <= 100_000 else repeat // 5)
+            metrics = measure(func, case_repeat)
+            metrics.update({
+                "words": actual_words,
+                "segments": segment_count,
+                "repeat": case_repeat,
+                "words_per_second": actual_words / metrics["p50_seconds"] if metrics["p50_seconds"] else 0.0
+            })
+            key = f"{name}[{word_count}]"
+            results[key] = metrics
+            print(f"{key:<42} p50 {metrics['p50_seconds']:>9.4f}s  p95 {metrics['p95_seconds']:>9.4f}s  "
+                  f"{metrics['words_per_second']:>12,.0f} words/s  {metrics['peak_memory_mb']:>8.1f} MB")
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "results": results
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare a report with a baseline report.
+
+    Args:
+        report: Report from run_suite
+        baseline: Earlier report
+        threshold: Allowed relative increase, e.g. 0.2 for 20%
+
+    Returns:
+        Descriptions of the regressions found
+    """
+    regressions = []
+    for key, metrics in report["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        for metric in ("p50_seconds", "peak_memory_mb"):
+            if base[metric] > 0 and metrics[metric] > base[metric] * (1 + threshold):
+                change = metrics[metric] / base[metric] - 1
+                regressions.append(
+                    f"{key} {metric}: {base[metric]:.4f} -> {metrics[metric]:.4f} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer package")
+    parser.add_argument("--max-words", type=int, default=1_000_000, help="Largest corpus to run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions per benchmark")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "latest.json"),
+                        help="Where to write the JSON report")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative regression before failing")
+    args = parser.parse_args()
+
+    report = run_suite(args.max_words, args.repeat)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
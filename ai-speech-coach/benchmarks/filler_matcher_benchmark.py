@@ -0,0 +1,105 @@
+"""
+Benchmark the token-level filler trie against the alternation regex.
+
+Runs both matchers over the same deterministic corpus with lexicons of
+15, 150 and 1,500 entries and checks that they produce identical counts.
+The speedup column compares the regex with the full analyze_text path,
+tokenization included; the trie column shows matching alone on a
+pre-built stream, as the analyzer service uses it.
+
+Usage:
+    python -m benchmarks.filler_matcher_benchmark [--words 200000] [--repeat 3]
+"""
+import argparse
+import random
+import string
+import time
+import logging
+from typing import Dict, List, Tuple
+
+from analyzer.filler_words import FillerWordAnalyzer
+from analyzer.tokenizer import TokenStream
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+LEXICON_SIZES = [15, 150, 1500]
+
+BASE_WORDS = (
+    "the speech coach helps people improve how they talk in meetings and "
+    "presentations by measuring pace vocabulary and filler words"
+).split()
+
+
+def build_lexicon(size: int, rng: random.Random) -> Dict[str, bool]:
+    """Build custom fillers so the analyzer's lexicon has `size` entries."""
+    custom = {}
+    while len(FillerWordAnalyzer.COMMON_FILLER_WORDS) + len(custom) < size:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8)))
+        if rng.random() < 0.3:
+            word += " " + rng.choice(BASE_WORDS)
+        custom[word] = True
+    return custom
+
+
+def build_corpus(word_count: int, lexicon: List[str], rng: random.Random) -> str:
+    """Build a deterministic corpus with roughly 10% filler words."""
+    words = []
+    while len(words) < word_count:
+        if rng.random() < 0.1:
+            words.extend(rng.choice(lexicon).split())
+        else:
+            words.append(rng.choice(BASE_WORDS))
+        if rng.random() < 0.08:
+            words[-1] += rng.choice(".,!?")
+    return " ".join(words)
+
+
+def time_call(func, repeat: int) -> float:
+    """Return the best wall-clock time of `repeat` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_regex(analyzer: FillerWordAnalyzer, text: str) -> Tuple[Dict[str, int], int]:
+    """Count fillers the way the analyzer did before the trie matcher."""
+    filler_count = {}
+    for match in analyzer.matcher.pattern.findall(text.lower()):
+        match = match.lower()
+        filler_count[match] = filler_count.get(match, 0) + 1
+    return filler_count, sum(filler_count.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare filler regex and trie matchers")
+    parser.add_argument("--words", type=int, default=200000, help="Corpus size in words")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions")
+    args = parser.parse_args()
+
+    print(f"{'lexicon':>8} {'regex (s)':>10} {'trie (s)':>10} {'analyze_text (s)':>18} {'speedup':>8}")
+    for size in LEXICON_SIZES:
+        rng = random.Random(size)
+        analyzer = FillerWordAnalyzer(build_lexicon(size, rng))
+        text = build_corpus(args.words, list(analyzer.filler_words.keys()), rng)
+        stream = TokenStream.from_text(text)
+
+        # Both matchers must agree before timings mean anything
+        expected = run_regex(analyzer, text)
+        assert analyzer.analyze_stream(stream) == expected, f"Mismatch at {size} entries"
+        assert analyzer.analyze_text(text) == expected, f"Mismatch at {size} entries"
+
+        regex_time = time_call(lambda: run_regex(analyzer, text), args.repeat)
+        trie_time = time_call(lambda: analyzer.analyze_stream(stream), args.repeat)
+        full_time = time_call(lambda: analyzer.analyze_text(text), args.repeat)
+
+        print(f"{len(analyzer.filler_words):>8} {regex_time:>10.4f} {trie_time:>10.4f} "
+              f"{full_time:>18.4f} {regex_time / full_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
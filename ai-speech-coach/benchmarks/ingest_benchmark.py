@@ -0,0 +1,107 @@
+"""
+Ingest-throughput benchmark for DatabaseService.store_conversation.
+
+Stores synthetic conversations of 100, 10k and 100k segments and reports
+rows per second for the bulk insert path and for the previous one-ORM-
+object-per-segment path.
+
+Runs against an in-memory SQLite database by default; pass --database-url
+(e.g. postgresql+asyncpg://...) to measure a real server, where batches of
+COPY_MIN_ROWS or more use COPY. The schema is created in that database if
+it doesn't exist.
+
+Usage:
+    python -m benchmarks.ingest_benchmark [--sizes 100,10000,100000]
+        [--database-url sqlite+aiosqlite://] [--skip-orm]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.services.database_service import DatabaseService, build_segment_rows
+from benchmarks.analyzer_benchmark import build_segments
+from models.database import Base, Conversation, SpeechSegment
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [100, 10_000, 100_000]
+
+
+async def orm_ingest(session: AsyncSession, user_id: int, segments: List[Dict]) -> None:
+    """The previous ingestion path: one ORM object per segment."""
+    conversation = Conversation(
+        user_id=user_id,
+        start_timestamp=datetime.utcnow(),
+        end_timestamp=datetime.utcnow(),
+        conversation_context="Session: orm"
+    )
+    session.add(conversation)
+    await session.flush()
+
+    now = datetime.utcnow()
+    base_time = datetime(now.year, now.month, now.day)
+    for row in build_segment_rows(segments, conversation.conversation_id, user_id, base_time, now):
+        session.add(SpeechSegment(**row))
+    await session.commit()
+
+
+async def run(database_url: str, sizes: List[int], skip_orm: bool) -> Dict[str, float]:
+    engine_options = {"poolclass": StaticPool} if database_url.startswith("sqlite") else {}
+    engine = create_async_engine(database_url, **engine_options)
+    session_factory = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    db_service = DatabaseService()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    results = {}
+    try:
+        for size in sizes:
+            segments = build_segments(size * 10, size)
+            paths = {"bulk": db_service.store_conversation}
+            if not skip_orm:
+                paths["orm"] = lambda session, user_id, session_id, segments: orm_ingest(session, user_id, segments)
+
+            for name, store in paths.items():
+                async with session_factory() as session:
+                    start = time.perf_counter()
+                    await store(session, 0, "benchmark", segments)
+                    elapsed = time.perf_counter() - start
+
+                    # Leave the table as it was for the next run
+                    await session.execute(delete(SpeechSegment).where(SpeechSegment.user_id == 0))
+                    await session.execute(delete(Conversation).where(Conversation.user_id == 0))
+                    await session.commit()
+
+                rows_per_second = size / elapsed
+                results[f"{name}[{size}]"] = rows_per_second
+                print(f"{name:<5} {size:>8} segments  {elapsed:>8.3f}s  {rows_per_second:>12,.0f} rows/s")
+    finally:
+        await engine.dispose()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speech segment ingestion")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated segment counts")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite://", help="Database to write to")
+    parser.add_argument("--skip-orm", action="store_true", help="Only measure the bulk insert path")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.database_url, [int(size) for size in args.sizes.split(",")], args.skip_orm))
+
+
+if __name__ == "__main__":
+    main()
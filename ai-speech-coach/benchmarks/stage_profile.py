@@ -0,0 +1,52 @@
+"""
+Profile where analysis time goes, stage by stage.
+
+Enables stage timings, analyzes a synthetic transcript (or a JSON file of
+segments) several times and prints the per-stage histograms, slowest first.
+
+Usage:
+    python -m benchmarks.stage_profile [--words 100000] [--segments 1000] [--repeat 5]
+        [--segments-file transcript.json] [--json]
+"""
+import argparse
+import json
+import logging
+
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.instrumentation import stage_timings
+from benchmarks.analyzer_benchmark import build_segments
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage timing profile of transcript analysis")
+    parser.add_argument("--words", type=int, default=100000, help="Synthetic transcript size in words")
+    parser.add_argument("--segments", type=int, default=1000, help="Synthetic transcript segment count")
+    parser.add_argument("--segments-file", help="JSON file with a list of segments to analyze instead")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of analyses")
+    parser.add_argument("--json", action="store_true", help="Print the histograms as JSON")
+    args = parser.parse_args()
+
+    if args.segments_file:
+        with open(args.segments_file) as f:
+            segments = json.load(f)
+    else:
+        segments = build_segments(args.words, args.segments)
+
+    service = SpeechAnalyzerService(executor_backend="inline")
+    stage_timings.enable()
+    stage_timings.reset()
+    for _ in range(args.repeat):
+        service.analyze_transcript_sync(segments)
+
+    if args.json:
+        print(json.dumps(stage_timings.snapshot(), indent=2))
+    else:
+        print(stage_timings.report())
+
+
+if __name__ == "__main__":
+    main()
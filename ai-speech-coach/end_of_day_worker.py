@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from models.database import get_session_factory, dispose_engines, DB_BATCH_ENGINE_PROFILE
+from api.services.database_service import DatabaseService
+from api.services.end_of_day import EndOfDayJob
+from analyzer.registry import analyzer_registry, get_analyzer_service
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+async def main(day, concurrency=None, enqueue=True):
+    """Drain one day's end-of-day work queue, alongside any other workers"""
+    job = EndOfDayJob(
+        DatabaseService(),
+        get_analyzer_service(),
+        get_session_factory(DB_BATCH_ENGINE_PROFILE),
+        concurrency=concurrency,
+        enqueue=enqueue
+    )
+
+    try:
+        status = await job.run(day)
+        print(json.dumps({key: value for key, value in status.items() if key != "timings"}, indent=2))
+    finally:
+        await asyncio.to_thread(analyzer_registry.shutdown)
+        await dispose_engines()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Analyze users from the end-of-day work queue; run one per process or node to scale out")
+    parser.add_argument("--day", type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(),
+                        default=datetime.now().date(), help="Day to analyze (YYYY-MM-DD, default today)")
+    parser.add_argument("--concurrency", type=int, help="Users analyzed at a time (default END_OF_DAY_CONCURRENCY)")
+    parser.add_argument("--no-enqueue", action="store_true",
+                        help="Only drain users another process enqueued")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.day, concurrency=args.concurrency, enqueue=not args.no_enqueue))
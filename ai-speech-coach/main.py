@@ -11,12 +11,16 @@ import asyncio
 
 # Import our modules
 from api.routes import transcript_router, audio_router
-from models.database import init_db
+from models.database import init_db, get_db, get_engine, get_session_factory, dispose_engines, pool_stats, DB_BATCH_ENGINE_PROFILE
+from models.partitions import maintain_partitions
 
 # Import MCP server
 from mcp.server import setup_mcp_server
 from api.services.database_service import DatabaseService
-from analyzer.analyzer_service import SpeechAnalyzerService
+from api.services.end_of_day import EndOfDayJob, END_OF_DAY_CONCURRENCY
+from api.services.read_cache import read_cache
+from analyzer.registry import analyzer_registry, get_analyzer_service
+from analyzer.instrumentation import stage_timings
 
 # Configure logging
 logging.basicConfig(
@@ -26,7 +30,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize services
-analyzer_service = SpeechAnalyzerService()
 db_service = DatabaseService()
 
 # Initialize scheduler
@@ -52,61 +55,46 @@ app.add_middleware(
 app.include_router(transcript_router.router, prefix="/api/transcript", tags=["transcript"])
 app.include_router(audio_router.router, prefix="/api/audio", tags=["audio"])
 
+# Whether the scheduled job analyzes users in this process; with "false" it
+# only enqueues them for end_of_day_worker.py processes on other nodes
+END_OF_DAY_DRAIN_IN_API = os.getenv("END_OF_DAY_DRAIN_IN_API", "true").lower() == "true"
+
+# Most recent end-of-day job, reported by /health/end-of-day
+last_end_of_day_job: Optional[EndOfDayJob] = None
+
 # End-of-day analysis job (7 PM)
 async def run_end_of_day_analysis():
     """Run end-of-day analysis for all users"""
+    global last_end_of_day_job
     logger.info("Running scheduled end-of-day speech analysis")
     
-    try:
-        async for session in get_db():
-            # Get all active users
-            users = await db_service.get_all_users(session)
-            
-            # For each user, run daily analysis
-            for user in users:
-                try:
-                    # Get today's conversations
-                    today_convos = await db_service.get_user_daily_conversations(
-                        session, 
-                        user_id=user.user_id,
-                        date=datetime.now().date()
-                    )
-                    
-                    if not today_convos:
-                        logger.info(f"No conversations found today for user {user.user_id}")
-                        continue
-                    
-                    # Get speech segments
-                    segments = []
-                    for convo in today_convos:
-                        convo_segments = await db_service.get_conversation_segments(
-                            session, 
-                            conversation_id=convo.conversation_id
-                        )
-                        segments.extend(convo_segments)
-                    
-                    if not segments:
-                        logger.info(f"No speech segments found for user {user.user_id}")
-                        continue
-                    
-                    # Run analysis
-                    analysis_result = await analyzer_service.analyze_transcript(segments)
-                    
-                    # Store results
-                    await db_service.store_analysis_results(
-                        session,
-                        user_id=user.user_id,
-                        metrics=analysis_result["metrics"],
-                        suggestions=analysis_result["suggestions"]
-                    )
-                    
-                    logger.info(f"Completed end-of-day analysis for user {user.user_id}")
-                
-                except Exception as e:
-                    logger.error(f"Error analyzing data for user {user.user_id}: {str(e)}")
+    # The job has its own connection pool so it can't starve webhook requests
+    job = EndOfDayJob(
+        db_service,
+        get_analyzer_service(),
+        get_session_factory(DB_BATCH_ENGINE_PROFILE),
+        concurrency=END_OF_DAY_CONCURRENCY,
+        drain=END_OF_DAY_DRAIN_IN_API
+    )
+    last_end_of_day_job = job
     
+    try:
+        await job.run(datetime.now().date())
     except Exception as e:
         logger.error(f"Error in end-of-day analysis job: {str(e)}")
+    
+    if stage_timings.enabled:
+        logger.info(f"Analysis stage timings so far:\n{stage_timings.report()}")
+
+# Partition maintenance (daily)
+async def run_partition_maintenance():
+    """Create upcoming monthly partitions and retire the ones past retention"""
+    try:
+        result = await maintain_partitions(get_engine(DB_BATCH_ENGINE_PROFILE))
+        if result["created"] or result["retired"]:
+            logger.info(f"Partition maintenance: {result}")
+    except Exception as e:
+        logger.error(f"Error in partition maintenance job: {str(e)}")
 
 @app.on_event("startup")
 async def startup_event():
@@ -119,6 +107,13 @@ async def startup_event():
     # Set up MCP server
     setup_mcp_server()
     
+    # Build analyzers and start their executor before the first webhook arrives
+    analyzer_registry.warm_up()
+    
+    # Start the batching writer for webhooks in write-behind mode
+    if transcript_router.write_behind_writer.enabled:
+        transcript_router.write_behind_writer.start()
+    
     # Schedule end-of-day analysis at 7 PM
     scheduler.add_job(
         run_end_of_day_analysis,
@@ -127,6 +122,16 @@ async def startup_event():
         replace_existing=True
     )
     
+    # Keep monthly partitions of conversations and segments ready ahead of time;
+    # every API worker schedules this, maintain_partitions' advisory lock makes them take turns
+    scheduler.add_job(
+        run_partition_maintenance,
+        CronTrigger(hour=0, minute=5),
+        id="partition_maintenance",
+        replace_existing=True,
+        next_run_time=datetime.now()  # Also once at startup
+    )
+    
     # Start the scheduler
     scheduler.start()
     logger.info("Scheduled end-of-day analysis job for 7:00 PM")
@@ -139,6 +144,18 @@ async def shutdown_event():
     # Shut down scheduler
     if scheduler.running:
         scheduler.shutdown()
+    
+    # Shut down analyzer executor; waiting for running analyses happens off the event loop
+    await asyncio.to_thread(analyzer_registry.shutdown)
+    
+    # Write out pending session state
+    transcript_router.session_store.close()
+    
+    # Write webhooks still queued in write-behind mode
+    await transcript_router.write_behind_writer.close()
+    
+    # Close database connections
+    await dispose_engines()
 
 @app.get("/")
 async def root():
@@ -159,6 +176,39 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/health/analyzers")
+async def analyzer_stats():
+    """Analyzer construction and lookup counters"""
+    return analyzer_registry.stats()
+
+@app.get("/health/database")
+async def database_stats():
+    """Connection pool size, saturation and checkout wait of each database engine"""
+    return pool_stats()
+
+@app.get("/health/analyzer-timings")
+async def analyzer_timings(reset: bool = Query(False, description="Clear the histograms after reading them")):
+    """Per-stage analysis timing histograms (enable with ANALYZER_STAGE_TIMING=true)"""
+    timings = stage_timings.drain() if reset else stage_timings.snapshot()
+    return {"enabled": stage_timings.enabled, "stages": timings}
+
+@app.get("/health/read-cache")
+async def read_cache_stats():
+    """Hit rate of the cached history and statistics payloads"""
+    return read_cache.stats()
+
+@app.get("/health/write-behind")
+async def write_behind_stats():
+    """Queue depth, lag and batch sizes of the webhook write-behind writer"""
+    return transcript_router.write_behind_writer.stats()
+
+@app.get("/health/end-of-day")
+async def end_of_day_status():
+    """Progress and per-user timings of the most recent end-of-day analysis run"""
+    if last_end_of_day_job is None:
+        return {"state": "not_run"}
+    return last_end_of_day_job.status()
+
 @app.post("/trigger-analysis")
 async def trigger_analysis(background_tasks: BackgroundTasks):
     """Manually trigger end-of-day analysis"""
@@ -3,16 +3,26 @@ from mcp import FastMCP, Context
 import logging
 from typing import Dict, List, Any, Optional
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, date
 import os
 
 # Import analyzer components
 from analyzer.filler_words import FillerWordAnalyzer
 from analyzer.pace import PaceAnalyzer
+from analyzer.registry import AnalyzerRegistry, analyzer_registry
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def analyzer_lifespan(server: FastMCP):
+    """Build the shared analyzers once when the MCP server starts."""
+    analyzer_registry.warm_up()
+    yield {"analyzers": analyzer_registry}
+
+
 # Create MCP server
 mcp_server = FastMCP(
     name="speech-coach-server",
@@ -20,10 +30,21 @@ mcp_server = FastMCP(
     This server provides tools for analyzing speech patterns and providing coaching.
     You can analyze text for filler words, speaking pace, and other speech metrics.
     The server also provides historical analysis data and improvement suggestions.
-    """
+    """,
+    lifespan=analyzer_lifespan
 )
 
 
+def get_registry(ctx: Context) -> AnalyzerRegistry:
+    """Get the analyzer registry from the MCP lifespan context, or the process-wide one."""
+    try:
+        request_context = ctx.request_context
+    except ValueError:
+        # Called outside of a request, so there is no lifespan context
+        return analyzer_registry
+    return request_context.lifespan_context["analyzers"]
+
+
 @mcp_server.tool()
 async def analyze_text(text: str, ctx: Context) -> Dict[str, Any]:
     """
@@ -43,8 +64,8 @@ async def analyze_text(text: str, ctx: Context) -> Dict[str, Any]:
     await ctx.info(f"Analyzing text of length {len(text)}")
     
     try:
-        # Initialize analyzers
-        filler_word_analyzer = FillerWordAnalyzer()
+        # Get shared analyzers
+        filler_word_analyzer = get_registry(ctx).filler_word_analyzer()
         
         # Analyze filler words
         filler_words, total_fillers = filler_word_analyzer.analyze_text(text)
@@ -103,8 +124,8 @@ async def detect_filler_words(text: str, ctx: Context) -> Dict[str, Any]:
     await ctx.info(f"Detecting filler words in text of length {len(text)}")
     
     try:
-        # Initialize analyzer
-        filler_word_analyzer = FillerWordAnalyzer()
+        # Get shared analyzer
+        filler_word_analyzer = get_registry(ctx).filler_word_analyzer()
         
         # Analyze filler words
         filler_words, total_fillers = filler_word_analyzer.analyze_text(text)
@@ -152,8 +173,8 @@ async def generate_improvement_suggestions(text: str, ctx: Context) -> List[Dict
     await ctx.info(f"Generating improvement suggestions for text of length {len(text)}")
     
     try:
-        # Initialize analyzers
-        filler_word_analyzer = FillerWordAnalyzer()
+        # Get shared analyzers
+        filler_word_analyzer = get_registry(ctx).filler_word_analyzer()
         
         # Analyze filler words
         filler_words, total_fillers = filler_word_analyzer.analyze_text(text)
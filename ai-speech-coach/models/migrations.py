@@ -0,0 +1,236 @@
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection
+from datetime import datetime
+from typing import Callable, List
+import json
+import logging
+
+from models.database import Base
+from models.partitions import PARTITIONED_TABLES, ensure_partitions, is_partitioned, partition_table, supports_partitioning
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Applied migrations; kept out of Base.metadata so drop_all/create_all leave it alone
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow)
+)
+
+
+class Migration:
+    """
+    One versioned schema change.
+    
+    upgrade receives a synchronous Connection (run through run_sync) and must
+    be safe on databases where create_all already built the current schema.
+    """
+    
+    def __init__(self, version: int, description: str, upgrade: Callable[[Connection], None]):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+
+
+# Registered migrations in version order
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register the decorated function as the upgrade step of a migration."""
+    def register(upgrade: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"Migration {version} is out of order")
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        return upgrade
+    return register
+
+
+def create_model_indexes(conn: Connection, table_name: str, index_names: List[str]) -> None:
+    """Create indexes declared on a model's table by name, skipping existing ones."""
+    for index in Base.metadata.tables[table_name].indexes:
+        if index.name in index_names:
+            index.create(conn, checkfirst=True)
+
+
+@migration(1, "Indexes for user lookup, daily conversations, segments, history and statistics")
+def add_query_indexes(conn: Connection) -> None:
+    create_model_indexes(conn, "users", ["ix_users_username"])
+    create_model_indexes(conn, "conversations", ["ix_conversations_user_time"])
+    create_model_indexes(conn, "speech_segments", ["ix_speech_segments_conversation_id"])
+    create_model_indexes(conn, "analysis_results", ["ix_analysis_results_user_date"])
+    create_model_indexes(conn, "improvement_suggestions", ["ix_improvement_suggestions_analysis_id"])
+
+
+@migration(2, "External user id column with a unique index")
+def add_user_external_id(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("users")}
+    if "external_id" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN external_id VARCHAR(100)"))
+    create_model_indexes(conn, "users", ["ix_users_external_id"])
+
+
+@migration(3, "Daily per-user metrics rollup")
+def add_daily_user_metrics(conn: Connection) -> None:
+    Base.metadata.tables["daily_user_metrics"].create(conn, checkfirst=True)
+
+
+@migration(4, "Index for loading all of a day's conversations")
+def add_conversation_time_index(conn: Connection) -> None:
+    create_model_indexes(conn, "conversations", ["ix_conversations_start_timestamp"])
+
+
+@migration(5, "Users' last activity date for finding the users active on a day")
+def add_user_last_activity_date(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("users")}
+    if "last_activity_date" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN last_activity_date DATE"))
+    create_model_indexes(conn, "users", ["ix_users_last_activity_date"])
+    
+    # Backfill from each user's latest conversation
+    users = Base.metadata.tables["users"]
+    conversations = Base.metadata.tables["conversations"]
+    latest = conn.execute(
+        select(conversations.c.user_id, func.max(conversations.c.start_timestamp))
+        .group_by(conversations.c.user_id)
+    ).all()
+    for user_id, start_timestamp in latest:
+        conn.execute(
+            users.update()
+            .where(users.c.user_id == user_id, users.c.last_activity_date.is_(None))
+            .values(last_activity_date=start_timestamp.date())
+        )
+
+
+@migration(6, "Job run ledger, per-user checkpoints and one end-of-day summary per user and day")
+def add_job_runs(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("analysis_results")}
+    if "daily_summary" not in columns:
+        conn.execute(text("ALTER TABLE analysis_results ADD COLUMN daily_summary BOOLEAN NOT NULL DEFAULT FALSE"))
+    create_model_indexes(conn, "analysis_results", ["ux_analysis_results_daily_summary"])
+    Base.metadata.tables["job_runs"].create(conn, checkfirst=True)
+    Base.metadata.tables["job_checkpoints"].create(conn, checkfirst=True)
+
+
+@migration(7, "Leases on job checkpoints, making them a work queue")
+def add_job_checkpoint_leases(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("job_checkpoints")}
+    if "lease_owner" not in columns:
+        conn.execute(text("ALTER TABLE job_checkpoints ADD COLUMN lease_owner VARCHAR(100)"))
+    if "lease_expires_at" not in columns:
+        conn.execute(text("ALTER TABLE job_checkpoints ADD COLUMN lease_expires_at TIMESTAMP"))
+    if "attempts" not in columns:
+        conn.execute(text("ALTER TABLE job_checkpoints ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"))
+    create_model_indexes(conn, "job_checkpoints", ["ix_job_checkpoints_job_day_status"])
+
+
+
+@migration(8, "Monthly partitions for conversations and speech segments on PostgreSQL")
+def partition_conversations_and_segments(conn: Connection) -> None:
+    if not supports_partitioning(conn):
+        return
+    
+    # A partitioned table's primary key includes the partition key, so its id
+    # alone can't be referenced: drop the foreign keys to these tables
+    inspector = inspect(conn)
+    for table_name in inspector.get_table_names():
+        for foreign_key in inspector.get_foreign_keys(table_name):
+            if foreign_key["referred_table"] in PARTITIONED_TABLES and foreign_key["name"]:
+                conn.execute(text(f"ALTER TABLE {table_name} DROP CONSTRAINT {foreign_key['name']}"))
+    
+    for table_name, column in PARTITIONED_TABLES.items():
+        if not is_partitioned(conn, table_name):
+            partition_table(conn, table_name, column)
+    ensure_partitions(conn)
+
+
+@migration(9, "Per-word counts and chunk fingerprints of daily rollups in their own tables")
+def split_daily_metric_words_and_chunks(conn: Connection) -> None:
+    Base.metadata.tables["daily_metric_words"].create(conn, checkfirst=True)
+    Base.metadata.tables["daily_metric_chunks"].create(conn, checkfirst=True)
+    columns = {column["name"] for column in inspect(conn).get_columns("daily_user_metrics")}
+    moved = [column for column in ("filler_counts", "vocabulary", "chunk_ids") if column in columns]
+    if not moved:
+        return
+    
+    def load(value):
+        # Raw JSON comes back as text on some drivers
+        return json.loads(value) if isinstance(value, str) else value
+    
+    words = Base.metadata.tables["daily_metric_words"]
+    chunks = Base.metadata.tables["daily_metric_chunks"]
+    rows = conn.execute(text(f"SELECT daily_metrics_id, {', '.join(moved)} FROM daily_user_metrics")).mappings().all()
+    for row in rows:
+        word_rows = [
+            {"daily_metrics_id": row["daily_metrics_id"], "kind": kind, "word": word, "count": count}
+            for kind, column in (("filler", "filler_counts"), ("vocabulary", "vocabulary")) if column in moved
+            for word, count in (load(row[column]) or {}).items()
+        ]
+        if word_rows:
+            conn.execute(words.insert(), word_rows)
+        chunk_ids = load(row["chunk_ids"]) if "chunk_ids" in moved else None
+        if chunk_ids:
+            conn.execute(chunks.insert(), [
+                {"daily_metrics_id": row["daily_metrics_id"], "chunk_id": chunk_id} for chunk_id in chunk_ids])
+    for column in moved:
+        conn.execute(text(f"ALTER TABLE daily_user_metrics DROP COLUMN {column}"))
+
+
+@migration(10, "Chunk fingerprints on conversations, so retried webhook writes are skipped")
+def add_conversation_chunk_id(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("conversations")}
+    if "chunk_id" not in columns:
+        conn.execute(text("ALTER TABLE conversations ADD COLUMN chunk_id VARCHAR(64)"))
+    create_model_indexes(conn, "conversations", ["ix_conversations_chunk_id"])
+
+
+def _apply(conn: Connection) -> List[int]:
+    migration_metadata.create_all(conn)
+    applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+    
+    newly_applied = []
+    for pending in MIGRATIONS:
+        if pending.version in applied:
+            continue
+        logger.info(f"Applying schema migration {pending.version}: {pending.description}")
+        pending.upgrade(conn)
+        conn.execute(schema_migrations.insert().values(
+            version=pending.version,
+            description=pending.description,
+            applied_at=datetime.utcnow()
+        ))
+        newly_applied.append(pending.version)
+    
+    return newly_applied
+
+
+async def run_migrations(conn: AsyncConnection) -> List[int]:
+    """
+    Apply the migrations not yet recorded in schema_migrations.
+    
+    Run inside a transaction (engine.begin()) so a failing migration leaves
+    no partial changes behind where the database supports transactional DDL.
+    
+    Args:
+        conn: Async database connection
+        
+    Returns:
+        Versions applied by this call
+    """
+    newly_applied = await conn.run_sync(_apply)
+    if newly_applied:
+        logger.info(f"Applied schema migrations {newly_applied}")
+    return newly_applied
+
+
+async def current_version(conn: AsyncConnection) -> int:
+    """Highest applied migration version, or 0 if none were applied."""
+    def read(sync_conn: Connection) -> int:
+        migration_metadata.create_all(sync_conn)
+        return max(sync_conn.execute(select(schema_migrations.c.version)).scalars(), default=0)
+    return await conn.run_sync(read)
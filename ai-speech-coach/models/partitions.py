@@ -0,0 +1,327 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+import os
+import re
+
+from models.database import Base
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Tables partitioned by month on PostgreSQL, with their partition key column
+PARTITIONED_TABLES: Dict[str, str] = {
+    "conversations": "start_timestamp",
+    "speech_segments": "start_time"
+}
+
+# Months of partitions kept ready ahead of the current one
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+
+# Months of partitions kept before the current one (0 keeps everything)
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", 0))
+
+# Whether retired partitions are dropped; otherwise they are only detached,
+# leaving standalone tables to archive (e.g. with pg_dump) and drop by hand
+PARTITION_RETENTION_DROP = os.getenv("PARTITION_RETENTION_DROP", "false").lower() == "true"
+
+# Key of the advisory lock serializing partition maintenance across processes
+PARTITION_MAINTENANCE_LOCK = 7_301_125
+
+# Bounds of a range partition as printed by pg_get_expr
+_RANGE_BOUND = re.compile(r"FROM \((MINVALUE|'[^']*')\) TO \((MAXVALUE|'[^']*')\)")
+
+
+def month_start(value: Union[date, datetime]) -> date:
+    """First day of the month value falls in."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month months after day's month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_window(start: Union[date, datetime], end: Union[date, datetime]) -> Tuple[datetime, datetime]:
+    """
+    Whole months around [start, end], as partition-pruning bounds.
+
+    Returns:
+        Tuple of the start of start's month and the start of the month after end's
+    """
+    return (
+        datetime.combine(month_start(start), datetime.min.time()),
+        datetime.combine(add_months(month_start(end), 1), datetime.min.time())
+    )
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of a table's partition for a month, e.g. speech_segments_p2024_05."""
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def supports_partitioning(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    """Whether table is a partitioned (parent) table."""
+    return conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table}
+    ).scalar() is True
+
+
+def list_partitions(conn: Connection, table: str) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+    """
+    Partitions of a partitioned table with their ranges.
+
+    Returns:
+        (name, lower bound, upper bound) of each range partition ordered by
+        lower bound; None stands for MINVALUE/MAXVALUE. The default
+        partition is left out.
+    """
+    rows = conn.execute(text(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+        "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table)"
+    ), {"table": table}).all()
+
+    def parse(bound: str) -> Optional[datetime]:
+        return None if bound in ("MINVALUE", "MAXVALUE") else datetime.fromisoformat(bound.strip("'"))
+
+    partitions = []
+    for name, expression in rows:
+        match = _RANGE_BOUND.search(expression or "")
+        if match:
+            partitions.append((name, parse(match.group(1)), parse(match.group(2))))
+    return sorted(partitions, key=lambda partition: partition[1] or datetime.min)
+
+
+def default_partition(conn: Connection, table: str) -> Optional[str]:
+    """Name of a partitioned table's default partition, or None if it has none."""
+    return conn.execute(text(
+        "SELECT child.relname "
+        "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table) "
+        "AND pg_get_expr(child.relpartbound, child.oid) = 'DEFAULT'"
+    ), {"table": table}).scalar()
+
+
+def create_partition(conn: Connection, table: str, month: date) -> str:
+    """
+    Create a table's partition for a month.
+
+    A month's partition can't be created while the default partition holds
+    rows of that month, so the default partition is detached, the month's
+    rows are moved from it to the new partition and it is attached again,
+    all in the caller's transaction.
+
+    Returns:
+        Name of the partition created
+    """
+    name = partition_name(table, month)
+    column = PARTITIONED_TABLES[table]
+    in_month = f"{column} >= '{month.isoformat()}' AND {column} < '{add_months(month, 1).isoformat()}'"
+    create = (f"CREATE TABLE {name} PARTITION OF {table} "
+              f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')")
+
+    default = default_partition(conn, table)
+    if default is None or not conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})")).scalar():
+        conn.execute(text(create))
+        return name
+
+    columns = ", ".join(reflected["name"] for reflected in inspect(conn).get_columns(table))
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    conn.execute(text(create))
+    moved = conn.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {default} WHERE {in_month}"))
+    conn.execute(text(f"DELETE FROM {default} WHERE {in_month}"))
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    logger.info(f"Moved {moved.rowcount} rows of {table} from {default} to {name}")
+    return name
+
+
+def ensure_partitions(conn: Connection, today: Optional[date] = None,
+                      months_ahead: Optional[int] = None, tables: Optional[List[str]] = None) -> List[str]:
+    """
+    Create the monthly partitions of the current and the next months_ahead months.
+
+    Months already covered by a partition (including the legacy partition
+    holding the rows from before partitioning) are skipped, so this is safe
+    to run repeatedly. Does nothing on databases without partitioning.
+
+    Args:
+        conn: Database connection
+        today: Day the current month is taken from (defaults to today)
+        months_ahead: Months to create ahead (defaults to PARTITION_MONTHS_AHEAD)
+        tables: Tables to create partitions for (defaults to all partitioned tables)
+
+    Returns:
+        Names of the partitions created
+    """
+    if not supports_partitioning(conn):
+        return []
+    today = today or date.today()
+    months_ahead = PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+
+    created = []
+    for table in tables or PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            continue
+        partitions = list_partitions(conn, table)
+        for offset in range(months_ahead + 1):
+            month = add_months(month_start(today), offset)
+            month_begin = datetime.combine(month, datetime.min.time())
+            if any((lower is None or lower <= month_begin) and (upper is None or month_begin < upper)
+                   for _, lower, upper in partitions):
+                continue
+            created.append(create_partition(conn, table, month))
+
+    if created:
+        logger.info(f"Created partitions {created}")
+    return created
+
+
+def retire_partitions(conn: Connection, before: date, drop: bool = False,
+                      tables: Optional[List[str]] = None) -> List[str]:
+    """
+    Detach (and optionally drop) the partitions holding only rows from before a day.
+
+    Detaching and dropping a partition only changes the catalog, so old
+    months are removed in constant time instead of with DELETEs that grow
+    with the table. Does nothing on databases without partitioning.
+
+    Args:
+        conn: Database connection
+        before: Partitions whose range ends on or before this day are retired
+        drop: Drop the detached partitions instead of keeping them as tables
+        tables: Tables to retire partitions of (defaults to all partitioned tables)
+
+    Returns:
+        Names of the partitions retired
+    """
+    if not supports_partitioning(conn):
+        return []
+    cutoff = datetime.combine(before, datetime.min.time())
+
+    retired = []
+    for table in tables or PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            continue
+        for name, _, upper in list_partitions(conn, table):
+            if upper is None or upper > cutoff:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if drop:
+                conn.execute(text(f"DROP TABLE {name}"))
+            retired.append(name)
+
+    if retired:
+        logger.info(f"{'Dropped' if drop else 'Detached'} partitions {retired}")
+    return retired
+
+
+def partition_table(conn: Connection, table: str, column: str, today: Optional[date] = None) -> None:
+    """
+    Turn an existing table into a table partitioned by month on column.
+
+    The existing table is kept as it is and attached as one partition (the
+    legacy partition) covering everything before the month after both today
+    and its newest row, so no rows are copied; later rows go to monthly
+    partitions. Attaching checks the legacy rows against the range and
+    builds the (primary key, column) unique index on the legacy table, the
+    only work that grows with its size. Foreign keys referencing table
+    must be dropped first: its primary key becomes (id, column), so the id
+    alone can't be referenced any more.
+    """
+    today = today or date.today()
+    legacy = f"{table}_legacy"
+    inspector = inspect(conn)
+    primary_key = inspector.get_pk_constraint(table)
+    indexes = inspector.get_indexes(table)
+    foreign_keys = [foreign_key for foreign_key in inspector.get_foreign_keys(table)
+                    if foreign_key["referred_table"] not in PARTITIONED_TABLES]
+    key_column = primary_key["constrained_columns"][0]
+
+    latest = conn.execute(text(f"SELECT max({column}) FROM {table}")).scalar()
+    bound = add_months(month_start(max(latest.date(), today) if latest else today), 1)
+    sequence = conn.execute(
+        text("SELECT pg_get_serial_sequence(:table, :column)"), {"table": table, "column": key_column}
+    ).scalar()
+
+    # Free the names of the table, its primary key and its indexes for the partitioned table
+    conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {primary_key['name']}"))
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    for index in indexes:
+        conn.execute(text(f"ALTER INDEX {index['name']} RENAME TO {index['name']}_legacy"))
+
+    conn.execute(text(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({column})"
+    ))
+    conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY ({key_column}, {column})"))
+    if sequence:
+        # Dropping the legacy partition must not drop the id sequence with it
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{key_column}"))
+    for foreign_key in foreign_keys:
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD FOREIGN KEY ({', '.join(foreign_key['constrained_columns'])}) "
+            f"REFERENCES {foreign_key['referred_table']} ({', '.join(foreign_key['referred_columns'])})"
+        ))
+    # Indexes added by later migrations are left to them, as their columns may not exist yet
+    existing_indexes = {index["name"] for index in indexes}
+    for index in Base.metadata.tables[table].indexes:
+        if index.name in existing_indexes:
+            index.create(conn)
+
+    conn.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO ('{bound.isoformat()}')"
+    ))
+    # Rows with timestamps far outside the prepared months land here instead of
+    # failing; create_partition moves them out when their month is created
+    conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+    logger.info(f"Partitioned {table} by month on {column}; rows before {bound} are in {legacy}")
+
+
+async def maintain_partitions(engine: AsyncEngine, today: Optional[date] = None) -> Dict[str, List[str]]:
+    """
+    Create upcoming monthly partitions and retire the ones past retention.
+
+    Run daily by the scheduler in main.py. Retention is off unless
+    PARTITION_RETENTION_MONTHS is set; retired partitions are detached, or
+    dropped with PARTITION_RETENTION_DROP=true.
+
+    Each table is maintained in its own transaction, so a failure on one
+    doesn't hold the other back, and each transaction first takes an
+    advisory lock, so the API workers running this at the same time take
+    turns instead of racing to create the same partitions.
+
+    Returns:
+        Names of the partitions created and retired
+    """
+    today = today or date.today()
+    before = add_months(month_start(today), -PARTITION_RETENTION_MONTHS) if PARTITION_RETENTION_MONTHS > 0 else None
+
+    def maintain(conn: Connection, table: str) -> Tuple[List[str], List[str]]:
+        if not supports_partitioning(conn):
+            return [], []
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_MAINTENANCE_LOCK})
+        created = ensure_partitions(conn, today, tables=[table])
+        retired = retire_partitions(conn, before, PARTITION_RETENTION_DROP, tables=[table]) if before else []
+        return created, retired
+
+    result = {"created": [], "retired": []}
+    for table in PARTITIONED_TABLES:
+        try:
+            async with engine.begin() as conn:
+                created, retired = await conn.run_sync(maintain, table)
+        except Exception as e:
+            logger.error(f"Error maintaining partitions of {table}: {str(e)}")
+            continue
+        result["created"].extend(created)
+        result["retired"].extend(retired)
+    return result
@@ -153,4 +153,5 @@ class SpeechAnalysisResponse(BaseModel):
     user_id: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     metrics: AnalysisMetrics
+    session_metrics: Optional[AnalysisMetrics] = Field(None, description="Cumulative metrics for the whole session so far")
     suggestions: List[ImprovementSuggestion] = []
\ No newline at end of file
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import random
+import unittest
+from datetime import datetime, timedelta
+from analyzer.analyzer_service import SpeechAnalyzerService
+
+WORDS = "um uh like you know basically actually I mean so well just good idea think problem the a is".split()
+
+def build_transcripts(seed):
+    """Build deterministic transcripts with float and datetime timestamps."""
+    rng = random.Random(seed)
+    transcripts = {}
+    for user in range(5):
+        segments = []
+        offset = 0.0
+        use_datetimes = user % 2 == 0
+        for _ in range(rng.randint(0, 30)):
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 25))) + rng.choice(["", ".", "!"])
+            duration = rng.choice([rng.uniform(0.1, 10), 0.0, 1 / 3])
+            start, end = offset, offset + duration
+            if use_datetimes:
+                base = datetime(2024, 1, 1)
+                start, end = base + timedelta(seconds=start), base + timedelta(seconds=end)
+            segments.append({
+                "text_content": text,
+                "is_user_speaking": rng.random() < 0.85,
+                "start_time": start,
+                "end_time": end
+            })
+            offset += duration + 0.2
+        transcripts[f"user-{user}"] = segments
+    return transcripts
+
+class TestAnalyzeMany(unittest.TestCase):
+    def setUp(self):
+        self.service = SpeechAnalyzerService(executor_backend="inline")
+
+    def test_matches_single_call_path(self):
+        for seed in range(20):
+            transcripts = build_transcripts(seed)
+            results = self.service.analyze_many_sync(transcripts)
+            
+            self.assertEqual(list(results.keys()), list(transcripts.keys()))
+            for user_id, segments in transcripts.items():
+                expected = self.service.analyze_transcript_sync(segments)
+                # Compare serialized payloads so int/float differences are caught too
+                self.assertEqual(json.dumps(results[user_id], default=str),
+                                 json.dumps(expected, default=str))
+
+    def test_async_chunks_across_workers(self):
+        transcripts = build_transcripts(42)
+        service = SpeechAnalyzerService(executor_backend="thread", max_workers=2)
+        try:
+            results = asyncio.run(service.analyze_many(transcripts))
+        finally:
+            service.shutdown()
+        
+        self.assertEqual(results, self.service.analyze_many_sync(transcripts))
+
+    def test_bad_transcript_does_not_fail_batch(self):
+        for use_datetimes in (False, True):
+            transcripts = build_transcripts(7)
+            base = datetime(2024, 1, 1) if use_datetimes else 0.0
+            start = base + timedelta(seconds=1) if use_datetimes else 1.0
+            bad_segment = {"text_content": "um hello", "is_user_speaking": True,
+                           "start_time": start, "end_time": None}
+            transcripts["bad"] = [bad_segment]
+            
+            # The single-call path rejects the same transcript
+            with self.assertRaises(TypeError):
+                self.service.analyze_transcript_sync(transcripts["bad"])
+            
+            results = self.service.analyze_many_sync(transcripts)
+            self.assertIn("error", results["bad"])
+            for user_id, segments in transcripts.items():
+                if user_id != "bad":
+                    self.assertEqual(results[user_id], self.service.analyze_transcript_sync(segments))
+
+    def test_empty_input(self):
+        self.assertEqual(asyncio.run(self.service.analyze_many({})), {})
+        self.assertEqual(self.service.analyze_many_sync({"idle": []})["idle"]["metrics"]["total_words"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
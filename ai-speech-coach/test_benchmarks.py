@@ -0,0 +1,27 @@
+import unittest
+from benchmarks.analyzer_benchmark import build_segments, compare, run_suite
+
+class TestAnalyzerBenchmark(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        segments = build_segments(1000, 10)
+        
+        self.assertEqual(segments, build_segments(1000, 10))
+        self.assertEqual(len(segments), 10)
+        words = sum(len(s["text_content"].split()) for s in segments)
+        self.assertGreaterEqual(words, 1000)
+        self.assertLess(words, 1100)
+
+    def test_report_and_regression_check(self):
+        report = run_suite(max_words=1000, repeat=1)
+        self.assertIn("service.analyze_transcript[1000]", report["results"])
+        self.assertEqual(compare(report, report, 0.2), [])
+        
+        # A baseline twice as fast as the report is a regression
+        baseline = {"results": {
+            key: {**metrics, "p50_seconds": metrics["p50_seconds"] / 2}
+            for key, metrics in report["results"].items()
+        }}
+        self.assertEqual(len(compare(report, baseline, 0.2)), len(report["results"]))
+
+if __name__ == "__main__":
+    unittest.main()
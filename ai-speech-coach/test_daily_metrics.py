@@ -0,0 +1,113 @@
+import unittest
+from datetime import date, datetime
+from sqlalchemy import select
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.session_state import SessionAccumulator, chunk_fingerprint
+from api.services.database_service import conversation_day
+from models.database import DailyMetricChunk, DailyUserMetrics
+from test_database_service import DatabaseTestCase, QueryCounter
+from test_session_state import build_segments
+
+class TestDailyMetrics(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.analyzer_service = SpeechAnalyzerService(executor_backend="inline")
+        self.segments = build_segments()
+        self.chunks = [self.segments[:3], self.segments[3:]]
+        self.day = date(2024, 5, 1)
+        async with self.session_factory() as session:
+            self.user_pk = await self.db_service.get_or_create_user_id(session, "omi-1", "User-omi-1", "OMI-omi-1")
+
+    async def ingest(self, chunk):
+        _, delta = self.analyzer_service.analyze_session_chunk_sync(chunk)
+        async with self.session_factory() as session:
+            return await self.db_service.update_daily_metrics(
+                session, self.user_pk, self.day, delta, chunk_id=chunk_fingerprint(chunk))
+
+    async def test_chunks_merge_into_one_row(self):
+        for chunk in self.chunks:
+            self.assertTrue(await self.ingest(chunk))
+        # A retried webhook delivers the first chunk again
+        self.assertFalse(await self.ingest(self.chunks[0]))
+
+        expected = SessionAccumulator()
+        for chunk in self.chunks:
+            expected.merge(self.analyzer_service.analyze_session_chunk_sync(chunk)[1])
+
+        async with self.session_factory() as session:
+            rows = (await session.execute(select(DailyUserMetrics))).scalars().all()
+            chunk_ids = (await session.execute(select(DailyMetricChunk.chunk_id))).scalars().all()
+            rollups = await self.db_service.get_daily_metrics(session, self.day)
+
+        self.assertEqual(len(rows), 1)
+        rollup = rollups[self.user_pk]
+        self.assertEqual(rollup.word_count, expected.word_count)
+        self.assertEqual(rollup.filler_counts, expected.filler_counts)
+        self.assertEqual(rollup.vocabulary, expected.vocabulary)
+        self.assertEqual(rollup.pace_count, expected.pace_count)
+        self.assertAlmostEqual(rollup.pace_mean, expected.pace_mean)
+        self.assertAlmostEqual(rollup.pace_variability, expected.pace_variability)
+        self.assertEqual(sorted(chunk_ids), sorted(chunk_fingerprint(chunk) for chunk in self.chunks))
+
+    async def test_chunks_update_the_rollup_incrementally(self):
+        await self.ingest(self.chunks[0])
+        with QueryCounter(self.engine) as counter:
+            await self.ingest(self.chunks[1])
+        _, delta = self.analyzer_service.analyze_session_chunk_sync(self.chunks[1])
+
+        updates = [statement for statement in counter.statements if statement.startswith("UPDATE daily_user_metrics")]
+        self.assertEqual(len(updates), 1)
+        self.assertIn("segment_count=(daily_user_metrics.segment_count +", updates[0])
+        # Only the chunk's own words are written, never the day's whole vocabulary
+        inserted = [rows for statement, rows in zip(counter.statements, counter.parameters)
+                    if statement.startswith("INSERT INTO daily_metric_words")]
+        written_words = {row[2] for row in inserted[0]}
+        self.assertTrue(written_words)
+        self.assertLessEqual(written_words, set(delta.vocabulary) | set(delta.filler_counts))
+
+    async def test_finalized_rollup_matches_full_analysis(self):
+        for chunk in self.chunks:
+            await self.ingest(chunk)
+        async with self.session_factory() as session:
+            rollup = (await self.db_service.get_daily_metrics(session, self.day))[self.user_pk]
+
+        result = self.analyzer_service.finalize_accumulator(rollup)
+        expected = self.analyzer_service.analyze_transcript_sync(self.segments)
+
+        for name in ["total_filler_count", "total_words", "speaking_time_seconds", "vocabulary_diversity"]:
+            self.assertAlmostEqual(result["metrics"][name], expected["metrics"][name], msg=name)
+        self.assertAlmostEqual(result["metrics"]["words_per_minute"], expected["metrics"]["words_per_minute"])
+        self.assertAlmostEqual(result["metrics"]["pace_variability"], expected["metrics"]["pace_variability"])
+        self.assertAlmostEqual(result["metrics"]["confidence_score"], expected["metrics"]["confidence_score"])
+        self.assertEqual([s["suggestion_text"] for s in result["suggestions"]],
+                         [s["suggestion_text"] for s in expected["suggestions"]])
+
+    async def test_days_and_users_are_separate(self):
+        await self.ingest(self.chunks[0])
+        async with self.session_factory() as session:
+            other_pk = await self.db_service.get_or_create_user_id(session, "omi-2", "User-omi-2", "OMI-omi-2")
+            _, delta = self.analyzer_service.analyze_session_chunk_sync(self.chunks[1])
+            await self.db_service.update_daily_metrics(session, other_pk, self.day, delta)
+            await self.db_service.update_daily_metrics(session, other_pk, date(2024, 5, 2), delta)
+            rollups = await self.db_service.get_daily_metrics(session, self.day)
+
+        self.assertEqual(set(rollups), {self.user_pk, other_pk})
+
+    def test_rollups_use_the_conversation_utc_day(self):
+        # Float timestamps count from midnight UTC of the arrival day
+        self.assertEqual(conversation_day(self.segments, datetime(2024, 5, 1, 23, 59)), date(2024, 5, 1))
+        late = [dict(s, start_time=datetime(2024, 5, 1, 23, 59, 50), end_time=datetime(2024, 5, 2, 0, 0, 5))
+                for s in self.segments[:1]]
+        self.assertEqual(conversation_day(late, datetime(2024, 5, 2, 0, 1)), date(2024, 5, 1))
+
+    def test_pace_sums_round_trip(self):
+        accumulator = SessionAccumulator()
+        accumulator.add_segment_paces([{"wpm": wpm} for wpm in [120.0, 150.5, 98.25, 170.0]])
+        restored = SessionAccumulator()
+        restored.set_pace_sums(accumulator.pace_count, accumulator.pace_sum, accumulator.pace_sum_squares)
+
+        self.assertAlmostEqual(restored.pace_mean, accumulator.pace_mean)
+        self.assertAlmostEqual(restored.pace_variability, accumulator.pace_variability)
+
+if __name__ == "__main__":
+    unittest.main()
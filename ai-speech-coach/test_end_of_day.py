@@ -0,0 +1,424 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.session_state import SessionAccumulator
+from api.services.end_of_day import EndOfDayJob
+from models.database import AnalysisResult, Base, JobCheckpoint, JobRun, User
+from test_database_service import DatabaseTestCase, QueryCounter
+
+def day_segments(start, texts):
+    """User and other-speaker segments a minute apart, starting at start"""
+    segments = []
+    for index, text in enumerate(texts):
+        segment_start = start + timedelta(minutes=index)
+        segments.append({
+            "text_content": text,
+            "speaker_identification": "SPEAKER_00" if index % 3 else "SPEAKER_01",
+            "is_user_speaking": index % 3 != 0,
+            "start_time": segment_start,
+            "end_time": segment_start + timedelta(seconds=30)
+        })
+    return segments
+
+def build_file_database(path):
+    """SQLite database in a WAL-mode file, so workers can commit while segments are streamed"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def enable_wal(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        dbapi_connection.execute("PRAGMA busy_timeout=5000")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    return engine, create
+
+class EndOfDayTestCase(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.day = datetime(2024, 5, 1).date()
+        morning = datetime(2024, 5, 1, 9)
+        self.user_ids = []
+        async with self.session_factory() as session:
+            for index in range(3):
+                user_pk = await self.db_service.get_or_create_user_id(
+                    session, f"omi-{index}", f"User-omi-{index}", f"OMI-omi-{index}")
+                self.user_ids.append(user_pk)
+                # Two conversations today, stored out of order, and one the day before
+                await self.db_service.store_conversation(
+                    session, user_pk, "afternoon", day_segments(morning + timedelta(hours=5), [f"late {i}" for i in range(4)]))
+                await self.db_service.store_conversation(
+                    session, user_pk, "morning", day_segments(morning, [f"early {i}" for i in range(4)]))
+                await self.db_service.store_conversation(
+                    session, user_pk, "yesterday", day_segments(morning - timedelta(days=1), ["old"] * 4))
+
+class TestActiveUsers(EndOfDayTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        async with self.session_factory() as session:
+            # An account that was last active the week before
+            self.idle_user_id = await self.db_service.get_or_create_user_id(
+                session, "omi-idle", "User-omi-idle", "OMI-omi-idle")
+            await self.db_service.store_conversation(
+                session, self.idle_user_id, "old", day_segments(datetime(2024, 4, 24, 9), ["old"] * 4))
+
+    async def test_last_activity_date_only_moves_forward(self):
+        async with self.session_factory() as session:
+            rows = dict((await session.execute(select(User.user_id, User.last_activity_date))).all())
+
+        self.assertEqual(rows[self.idle_user_id], datetime(2024, 4, 24).date())
+        for user_id in self.user_ids:
+            # The day before was stored last
+            self.assertEqual(rows[user_id], self.day)
+
+    async def test_only_users_active_on_the_day(self):
+        async with self.session_factory() as session:
+            self.assertEqual(await self.db_service.get_active_user_ids(session, self.day), sorted(self.user_ids))
+            self.assertEqual(await self.db_service.get_active_user_ids(session, datetime(2024, 4, 24).date()),
+                             [self.idle_user_id])
+            # Active since, but not on, the day
+            self.assertEqual(await self.db_service.get_active_user_ids(session, datetime(2024, 4, 25).date()), [])
+            users = await self.db_service.get_all_users(session, active_on=self.day)
+
+        self.assertEqual(sorted(user.user_id for user in users), sorted(self.user_ids))
+
+    async def test_job_on_an_idle_day_loads_nothing(self):
+        job = EndOfDayJob(self.db_service, SpeechAnalyzerService(executor_backend="inline"),
+                          self.session_factory, concurrency=2)
+        with QueryCounter(self.engine) as counter:
+            status = await job.run(datetime(2024, 4, 28).date())
+
+        self.assertEqual((status["active_users"], status["queued"]), (0, 0))
+        # The active user lookup, and recording the run in the ledger
+        self.assertFalse(any("speech_segments" in statement for statement in counter.statements))
+        self.assertEqual(counter.count, 3)
+
+class TestEndOfDayLoading(EndOfDayTestCase):
+    async def load(self, **kwargs):
+        async with self.session_factory() as session:
+            return [item async for item in self.db_service.stream_daily_user_segments(session, self.day, **kwargs)]
+
+    async def test_segments_are_grouped_by_user_in_time_order(self):
+        loaded = await self.load(batch_size=2)
+
+        self.assertEqual([user_id for user_id, _ in loaded], sorted(self.user_ids))
+        for _, segments in loaded:
+            self.assertEqual([s["text_content"] for s in segments],
+                             ["early 1", "early 2", "late 1", "late 2"])
+            self.assertTrue(all(s["is_user_speaking"] for s in segments))
+
+    async def test_matches_per_conversation_loading(self):
+        loaded = dict(await self.load())
+        async with self.session_factory() as session:
+            for user_id in self.user_ids:
+                expected = []
+                for conversation in await self.db_service.get_user_daily_conversations(session, user_id, self.day):
+                    expected.extend(await self.db_service.get_conversation_segments(session, conversation.conversation_id))
+                expected = sorted((s for s in expected if s["is_user_speaking"]), key=lambda s: s["start_time"])
+                self.assertEqual(loaded[user_id], expected)
+
+    async def test_one_query_for_all_users(self):
+        with QueryCounter(self.engine) as counter:
+            loaded = await self.load(batch_size=2)
+
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(counter.count, 1)
+
+    async def test_users_with_rollups_are_excluded(self):
+        async with self.session_factory() as session:
+            await self.db_service.update_daily_metrics(session, self.user_ids[1], self.day, SessionAccumulator())
+
+        loaded = await self.load(exclude_rollups=True)
+        self.assertEqual([user_id for user_id, _ in loaded], [self.user_ids[0], self.user_ids[2]])
+
+class SlowAnalyzerService(SpeechAnalyzerService):
+    """Inline analyzer that yields while analyzing and records how many analyses overlap"""
+    def __init__(self, tracker, fail_for=None):
+        super().__init__(executor_backend="inline")
+        self.tracker = tracker
+        self.fail_for = fail_for
+
+    async def analyze_transcript(self, transcript_segments, use_cache=True):
+        self.tracker["running"] += 1
+        self.tracker["peak"] = max(self.tracker["peak"], self.tracker["running"])
+        try:
+            await asyncio.sleep(0.01)
+            self.tracker["analyzed"].append(transcript_segments[0]["text_content"])
+            if self.fail_for and any(self.fail_for in s["text_content"] for s in transcript_segments):
+                raise RuntimeError("analysis failed")
+            return await super().analyze_transcript(transcript_segments, use_cache=use_cache)
+        finally:
+            self.tracker["running"] -= 1
+
+class TestEndOfDayJob(EndOfDayTestCase):
+    def build_database(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return build_file_database(os.path.join(directory.name, "speech_coach.db"))
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.analyzer_service = SpeechAnalyzerService(executor_backend="inline")
+        self.tracker = {"running": 0, "peak": 0, "analyzed": []}
+
+    def build_job(self, concurrency, fail_for=None, **kwargs):
+        return EndOfDayJob(self.db_service, self.analyzer_service, self.session_factory,
+                           concurrency=concurrency,
+                           analyzer_factory=lambda service: SlowAnalyzerService(self.tracker, fail_for),
+                           **kwargs)
+
+    async def stored_results(self):
+        async with self.session_factory() as session:
+            rows = (await session.execute(select(AnalysisResult))).scalars().all()
+        return {row.user_id: row for row in rows}
+
+    async def test_every_active_user_is_analyzed(self):
+        status = await EndOfDayJob(self.db_service, self.analyzer_service, self.session_factory,
+                                   concurrency=2).run(self.day)
+
+        self.assertEqual(status["state"], "completed")
+        self.assertEqual((status["active_users"], status["queued"], status["completed"], status["failed"]),
+                         (3, 3, 3, 0))
+
+        async with self.session_factory() as session:
+            loaded = dict([item async for item in self.db_service.stream_daily_user_segments(session, self.day)])
+        stored = await self.stored_results()
+        self.assertEqual(sorted(stored), sorted(self.user_ids))
+        for user_id in self.user_ids:
+            expected = await self.analyzer_service.analyze_transcript(loaded[user_id])
+            self.assertAlmostEqual(stored[user_id].avg_words_per_minute,
+                                   expected["metrics"]["words_per_minute"])
+
+    async def test_workers_share_the_analyzer_service(self):
+        shared = SpeechAnalyzerService(executor_backend="thread", max_workers=2)
+        self.addCleanup(shared.shutdown)
+        constructed = []
+        init = SpeechAnalyzerService.__init__
+
+        def counting_init(service, *args, **kwargs):
+            constructed.append(service)
+            init(service, *args, **kwargs)
+
+        with mock.patch.object(SpeechAnalyzerService, "__init__", counting_init):
+            status = await EndOfDayJob(self.db_service, shared, self.session_factory, concurrency=3).run(self.day)
+
+        self.assertEqual(status["completed"], 3)
+        self.assertEqual(constructed, [])
+        # The shared executor is left running for the next caller
+        self.assertIsNotNone(shared.executor._executor)
+
+    async def test_workers_run_concurrently_up_to_the_limit(self):
+        await self.build_job(concurrency=2).run(self.day)
+        self.assertEqual(self.tracker["peak"], 2)
+
+        # Forget the first run so the second one redoes every user
+        async with self.session_factory() as session:
+            await session.execute(delete(JobCheckpoint))
+            await session.commit()
+        self.tracker["peak"] = 0
+        await self.build_job(concurrency=1).run(self.day)
+        self.assertEqual(self.tracker["peak"], 1)
+
+    async def add_rollup(self, user_id, segments):
+        async with self.session_factory() as session:
+            delta = (await self.analyzer_service.analyze_session_chunk(segments))[1]
+            await self.db_service.update_daily_metrics(session, user_id, self.day, delta)
+
+    async def test_rollup_users_are_finalized(self):
+        # The webhooks that stored the user's conversations kept the rollup
+        morning = datetime(2024, 5, 1, 9)
+        await self.add_rollup(self.user_ids[0], day_segments(morning, [f"early {i}" for i in range(4)]) +
+                              day_segments(morning + timedelta(hours=5), [f"late {i}" for i in range(4)]))
+
+        status = await self.build_job(concurrency=2).run(self.day)
+
+        self.assertEqual((status["rollups"], status["completed"]), (1, 3))
+        self.assertEqual(status["timings"]["user.rollup.analyze"]["count"], 1)
+        self.assertEqual(status["timings"]["user.segments.analyze"]["count"], 2)
+
+    async def test_segments_stored_without_webhooks_are_not_missed(self):
+        # The rollup only covers the morning; the afternoon was stored another way
+        await self.add_rollup(self.user_ids[0], day_segments(datetime(2024, 5, 1, 9), [f"early {i}" for i in range(4)]))
+
+        status = await self.build_job(concurrency=2).run(self.day)
+
+        self.assertEqual((status["rollups"], status["completed"]), (0, 3))
+        self.assertEqual(status["timings"]["user.segments.analyze"]["count"], 3)
+
+    async def test_speech_stored_while_loading_is_analyzed(self):
+        # So far only other speakers talked in this user's conversation
+        async with self.session_factory() as session:
+            quiet_user_id = await self.db_service.get_or_create_user_id(
+                session, "omi-quiet", "User-omi-quiet", "OMI-omi-quiet")
+            await self.db_service.store_conversation(
+                session, quiet_user_id, "listening", day_segments(datetime(2024, 5, 1, 8), ["hi"]))
+        webhook = day_segments(datetime(2024, 5, 1, 22), ["x", "late words", "more late words"])
+        stream = self.db_service.stream_daily_user_segments
+        stored = []
+
+        async def stream_then_store_webhook(session, day, **kwargs):
+            async for item in stream(session, day, **kwargs):
+                yield item
+            if not stored:
+                # The user's webhook lands right after the segments were streamed
+                async with self.session_factory() as webhook_session:
+                    stored.append(await self.db_service.store_conversation(
+                        webhook_session, quiet_user_id, "late", webhook))
+                    delta = (await self.analyzer_service.analyze_session_chunk(webhook))[1]
+                    await self.db_service.update_daily_metrics(webhook_session, quiet_user_id, self.day, delta)
+
+        self.db_service.stream_daily_user_segments = stream_then_store_webhook
+        status = await self.build_job(concurrency=2).run(self.day)
+
+        self.assertEqual((status["completed"], status["rollups"]), (4, 1))
+        self.assertIn(quiet_user_id, await self.stored_results())
+
+    async def test_failed_user_does_not_stop_the_others(self):
+        # Only the second user's segments contain this text
+        async with self.session_factory() as session:
+            await self.db_service.store_conversation(
+                session, self.user_ids[1], "broken", day_segments(datetime(2024, 5, 1, 20), ["x", "boom", "boom"]))
+
+        status = await self.build_job(concurrency=2, fail_for="boom").run(self.day)
+
+        self.assertEqual((status["completed"], status["failed"]), (2, 1))
+        self.assertEqual(sorted(await self.stored_results()), [self.user_ids[0], self.user_ids[2]])
+
+    async def test_rerun_skips_completed_users(self):
+        await self.build_job(concurrency=2).run(self.day)
+        status = await self.build_job(concurrency=2).run(self.day)
+
+        self.assertEqual((status["skipped"], status["queued"], status["completed"]), (3, 0, 0))
+        async with self.session_factory() as session:
+            rows = (await session.execute(select(AnalysisResult))).scalars().all()
+            runs = (await session.execute(select(JobRun).order_by(JobRun.run_id))).scalars().all()
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(all(row.daily_summary and row.date == self.day for row in rows))
+        self.assertEqual([(run.state, run.completed_count, run.skipped_count) for run in runs],
+                         [("completed", 3, 0), ("completed", 0, 3)])
+
+    async def test_rerun_redoes_failed_users(self):
+        async with self.session_factory() as session:
+            await self.db_service.store_conversation(
+                session, self.user_ids[1], "broken", day_segments(datetime(2024, 5, 1, 20), ["x", "boom", "boom"]))
+
+        first = await self.build_job(concurrency=2, fail_for="boom").run(self.day)
+        second = await self.build_job(concurrency=2).run(self.day)
+
+        self.assertEqual((first["completed"], first["failed"]), (2, 1))
+        self.assertEqual((second["skipped"], second["completed"], second["failed"]), (2, 1, 0))
+        async with self.session_factory() as session:
+            checkpoints = (await session.execute(select(JobCheckpoint))).scalars().all()
+        self.assertEqual(sorted(checkpoint.user_id for checkpoint in checkpoints), sorted(self.user_ids))
+        self.assertTrue(all(checkpoint.status == "completed" for checkpoint in checkpoints))
+        self.assertEqual(sorted(await self.stored_results()), sorted(self.user_ids))
+
+    async def test_overlapping_runs_store_one_summary_per_user(self):
+        await asyncio.gather(self.build_job(concurrency=2).run(self.day),
+                             self.build_job(concurrency=2).run(self.day))
+
+        async with self.session_factory() as session:
+            user_ids = (await session.execute(select(AnalysisResult.user_id))).scalars().all()
+        self.assertEqual(sorted(user_ids), sorted(self.user_ids))
+
+    async def test_status_reports_per_user_timings(self):
+        job = self.build_job(concurrency=3)
+        self.assertEqual(job.status()["state"], "pending")
+
+        status = await job.run(self.day)
+
+        self.assertEqual(status["timings"]["user"]["count"], 3)
+        self.assertEqual(status["timings"]["user.store"]["count"], 3)
+        self.assertEqual(sorted(entry["user_id"] for entry in status["slowest_users"]), sorted(self.user_ids))
+        self.assertGreater(status["users_per_second"], 0)
+
+class TestWorkQueue(EndOfDayTestCase):
+    def build_database(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return build_file_database(os.path.join(directory.name, "speech_coach.db"))
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.analyzer_service = SpeechAnalyzerService(executor_backend="inline")
+        self.tracker = {"running": 0, "peak": 0, "analyzed": []}
+        async with self.session_factory() as session:
+            self.run_id = (await self.db_service.start_job_run(session, "end_of_day", self.day)).run_id
+
+    def build_job(self, **kwargs):
+        return EndOfDayJob(self.db_service, self.analyzer_service, self.session_factory, concurrency=2,
+                           analyzer_factory=lambda service: SlowAnalyzerService(self.tracker), **kwargs)
+
+    async def enqueue(self):
+        async with self.session_factory() as session:
+            return await self.db_service.enqueue_work_items(
+                session, "end_of_day", self.day, self.user_ids, self.run_id)
+
+    async def claim(self, owner, limit=10, lease_seconds=600):
+        async with self.session_factory() as session:
+            return await self.db_service.claim_work_items(
+                session, "end_of_day", self.day, owner, limit, lease_seconds)
+
+    async def checkpoints(self):
+        async with self.session_factory() as session:
+            rows = (await session.execute(select(JobCheckpoint))).scalars().all()
+        return {row.user_id: row for row in rows}
+
+    async def test_enqueueing_is_idempotent(self):
+        self.assertEqual(await self.enqueue(), 3)
+        self.assertEqual(await self.enqueue(), 0)
+
+        async with self.session_factory() as session:
+            await self.db_service.record_checkpoint(
+                session, "end_of_day", self.day, self.user_ids[0], self.run_id, "failed", error="boom")
+        # Only the failed user is made pending again
+        self.assertEqual(await self.enqueue(), 1)
+        self.assertEqual({row.status for row in (await self.checkpoints()).values()}, {"pending"})
+
+    async def test_workers_claim_disjoint_items(self):
+        await self.enqueue()
+        first = await self.claim("worker-a", limit=2)
+        second = await self.claim("worker-b", limit=2)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(sorted(first + second), sorted(self.user_ids))
+        self.assertEqual(await self.claim("worker-c"), [])
+        checkpoints = await self.checkpoints()
+        self.assertEqual({checkpoints[user_id].lease_owner for user_id in first}, {"worker-a"})
+
+    async def test_expired_leases_are_claimed_again(self):
+        await self.enqueue()
+        # A worker that crashed right after claiming everything
+        await self.claim("crashed", lease_seconds=-1)
+
+        self.assertEqual(await self.claim("worker-b"), sorted(self.user_ids))
+        checkpoints = await self.checkpoints()
+        self.assertTrue(all(row.attempts == 2 and row.lease_owner == "worker-b" for row in checkpoints.values()))
+
+    async def test_live_leases_are_left_alone(self):
+        await self.enqueue()
+        await self.claim("busy", limit=1)
+
+        status = await self.build_job(enqueue=False).run(self.day)
+        self.assertEqual((status["claimed"], status["completed"]), (2, 2))
+
+    async def test_workers_share_the_queue(self):
+        await self.build_job(drain=False).run(self.day)
+        statuses = await asyncio.gather(self.build_job(enqueue=False).run(self.day),
+                                        self.build_job(enqueue=False).run(self.day))
+
+        self.assertEqual(sum(status["completed"] for status in statuses), 3)
+        self.assertEqual(len(self.tracker["analyzed"]), 3)
+        checkpoints = await self.checkpoints()
+        self.assertTrue(all(row.status == "completed" and row.lease_owner is None for row in checkpoints.values()))
+
+if __name__ == "__main__":
+    unittest.main()
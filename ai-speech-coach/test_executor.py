@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import unittest
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.executor import AnalyzerExecutor
+from analyzer.filler_words import FillerWordAnalyzer
+
+SEGMENTS = [
+    {
+        "text_content": "Hello, um, this is a test recording for the, uh, speech coach.",
+        "is_user_speaking": True,
+        "start_time": 0.0,
+        "end_time": 5.0
+    },
+    {
+        "text_content": "I want to improve my speaking skills and like reduce filler words.",
+        "is_user_speaking": True,
+        "start_time": 5.5,
+        "end_time": 12.0
+    },
+    {
+        "text_content": "Sometimes I speak too quickly and people have trouble following what I'm saying.",
+        "is_user_speaking": True,
+        "start_time": 12.5,
+        "end_time": 18.0
+    }
+]
+
+class TestAnalyzerExecutor(unittest.TestCase):
+    def setUp(self):
+        self.expected = SpeechAnalyzerService(executor_backend="inline").analyze_transcript_sync(SEGMENTS)
+
+    def _analyze(self, backend):
+        service = SpeechAnalyzerService(executor_backend=backend, max_workers=2)
+        try:
+            return asyncio.run(service.analyze_transcript(SEGMENTS))
+        finally:
+            service.shutdown()
+
+    def test_thread_backend_matches_inline(self):
+        self.assertEqual(self._analyze("thread"), self.expected)
+
+    def test_process_backend_matches_inline(self):
+        self.assertEqual(self._analyze("process"), self.expected)
+
+    def test_process_backend_uses_service_analyzers(self):
+        custom = FillerWordAnalyzer({"speech coach": True, "improve": True})
+        inline = SpeechAnalyzerService(executor_backend="inline", filler_word_analyzer=custom)
+        service = SpeechAnalyzerService(executor_backend="process", max_workers=1,
+                                        filler_word_analyzer=custom)
+        try:
+            result = asyncio.run(service.analyze_transcript(SEGMENTS))
+        finally:
+            service.shutdown()
+        
+        self.assertEqual(result, inline.analyze_transcript_sync(SEGMENTS))
+        self.assertIn("speech coach", result["metrics"]["filler_words"])
+
+    def test_process_executor_is_bound_to_one_service(self):
+        executor = AnalyzerExecutor("process", max_workers=1)
+        first = SpeechAnalyzerService(executor_backend="inline")
+        second = SpeechAnalyzerService(executor_backend="inline")
+        try:
+            asyncio.run(executor.run(first, "analyze_transcript_sync", SEGMENTS))
+            with self.assertRaises(ValueError):
+                asyncio.run(executor.run(second, "analyze_transcript_sync", SEGMENTS))
+        finally:
+            executor.shutdown()
+
+    def test_warm_up_starts_every_process_worker(self):
+        executor = AnalyzerExecutor("process", max_workers=3)
+        try:
+            pids = executor.warm_up(SpeechAnalyzerService(executor_backend="inline"))
+        finally:
+            executor.shutdown()
+
+        self.assertEqual(len(pids), 3)
+
+    def test_thread_backend_runs_off_event_loop(self):
+        service = SpeechAnalyzerService(executor_backend="thread")
+        threads = []
+        original = service.analyze_transcript_sync
+
+        def record_thread(segments):
+            threads.append(threading.current_thread())
+            return original(segments)
+
+        service.analyze_transcript_sync = record_thread
+        try:
+            asyncio.run(service.analyze_transcript(SEGMENTS))
+        finally:
+            service.shutdown()
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            AnalyzerExecutor("gpu")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from analyzer.filler_words import FillerWordAnalyzer
+from analyzer.tokenizer import TokenStream
 
 class TestFillerWordAnalyzer(unittest.TestCase):
     def setUp(self):
@@ -55,5 +56,29 @@ class TestFillerWordAnalyzer(unittest.TestCase):
             self.assertIn("suggestion_text", suggestion)
             self.assertIn("priority_level", suggestion)
 
+    def test_find_matches_positions(self):
+        stream = TokenStream.from_text(self.sample_text)
+        matches = self.analyzer.find_matches(stream)
+        
+        # Every match should point at its filler in the original text
+        for match in matches:
+            self.assertEqual(stream.text[match.start:match.end].lower(), match.filler)
+        
+        self.assertEqual(len(matches), self.analyzer.analyze_text(self.sample_text)[1])
+    
+    def test_custom_fillers_match_regex(self):
+        analyzer = FillerWordAnalyzer({"you know what": True, "uh-huh": True, "you": True})
+        text = "You know what, uh-huh, you see? Uh huh. You, know."
+        
+        # Counts must agree with the alternation regex
+        expected = {}
+        for match in analyzer.matcher.pattern.findall(text.lower()):
+            expected[match.lower()] = expected.get(match.lower(), 0) + 1
+        
+        self.assertEqual(analyzer.analyze_text(text), (expected, sum(expected.values())))
+        self.assertEqual(analyzer.analyze_stream(TokenStream.from_text(text)), analyzer.analyze_text(text))
+        # Earlier entries win ties, so "uh" takes precedence over "uh-huh"
+        self.assertEqual(expected, {"you know": 1, "uh": 2, "you": 2})
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import asyncio
+import unittest
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.instrumentation import StageTimings, stage_timings
+from test_executor import SEGMENTS
+
+class TestStageTimings(unittest.TestCase):
+    def setUp(self):
+        stage_timings.enable()
+        stage_timings.reset()
+
+    def tearDown(self):
+        stage_timings.disable()
+        stage_timings.reset()
+
+    def test_disabled_timings_record_nothing(self):
+        timings = StageTimings(enabled=False)
+        with timings.stage("tokenize"):
+            pass
+        self.assertEqual(timings.snapshot(), {})
+
+    def test_histogram_counts_and_buckets(self):
+        timings = StageTimings(enabled=True)
+        for seconds in [0.002, 0.003, 0.2]:
+            timings.record("tokenize", seconds)
+
+        histogram = timings.snapshot()["tokenize"]
+        self.assertEqual(histogram["count"], 3)
+        self.assertEqual(sum(histogram["buckets"]), 3)
+        self.assertAlmostEqual(histogram["total_seconds"], 0.205)
+        self.assertEqual(histogram["p50_seconds"], 0.005)
+        self.assertEqual(histogram["max_seconds"], 0.2)
+
+    def test_drain_and_merge(self):
+        worker = StageTimings(enabled=True)
+        worker.record("tokenize", 0.01)
+        drained = worker.drain()
+        self.assertEqual(worker.snapshot(), {})
+
+        parent = StageTimings(enabled=True)
+        parent.record("tokenize", 0.02)
+        parent.merge(drained)
+        self.assertEqual(parent.snapshot()["tokenize"]["count"], 2)
+
+    def test_analysis_records_each_stage(self):
+        SpeechAnalyzerService(executor_backend="inline").analyze_transcript_sync(SEGMENTS)
+
+        stages = stage_timings.snapshot()
+        for name in ["analyze_transcript", "tokenize", "filler_words.match", "pace.analyze",
+                     "vocabulary.analyze"]:
+            self.assertEqual(stages[name]["count"], 1, name)
+        self.assertIn("filler_words.match", stage_timings.report())
+
+    def test_process_workers_report_timings(self):
+        service = SpeechAnalyzerService(executor_backend="process", max_workers=1)
+        try:
+            asyncio.run(service.analyze_transcript(SEGMENTS))
+        finally:
+            service.shutdown()
+
+        self.assertEqual(stage_timings.snapshot()["analyze_transcript"]["count"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
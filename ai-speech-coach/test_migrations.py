@@ -0,0 +1,189 @@
+import unittest
+from datetime import date, datetime, timedelta
+from sqlalchemy import inspect, text
+from models.database import Base, User
+from models.migrations import MIGRATIONS, current_version, run_migrations
+from test_database_service import METRICS, DatabaseTestCase, QueryCounter, build_database, build_suggestions
+from test_session_state import build_segments
+
+INDEXES = {
+    "users": "ix_users_username",
+    "conversations": "ix_conversations_user_time",
+    "speech_segments": "ix_speech_segments_conversation_id",
+    "analysis_results": "ix_analysis_results_user_date",
+    "improvement_suggestions": "ix_improvement_suggestions_analysis_id"
+}
+
+def index_names(sync_conn):
+    inspector = inspect(sync_conn)
+    return {table: {index["name"] for index in inspector.get_indexes(table)} for table in INDEXES}
+
+class TestMigrations(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine, _ = build_database()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_existing_database_gets_indexes(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            # A database created before the indexes were declared
+            for name in [*INDEXES.values(), "ix_users_external_id", "ix_conversations_start_timestamp"]:
+                await conn.execute(text(f"DROP INDEX {name}"))
+            await conn.execute(text("ALTER TABLE users DROP COLUMN external_id"))
+            await conn.execute(text("DROP INDEX ux_analysis_results_daily_summary"))
+            await conn.execute(text("ALTER TABLE analysis_results DROP COLUMN daily_summary"))
+            await conn.execute(text("DROP TABLE job_checkpoints"))
+            await conn.execute(text("DROP TABLE job_runs"))
+
+            applied = await run_migrations(conn)
+            indexes = await conn.run_sync(index_names)
+            columns = await conn.run_sync(
+                lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("users")})
+            result_columns = await conn.run_sync(
+                lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("analysis_results")})
+            tables = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+
+        self.assertEqual(applied, [m.version for m in MIGRATIONS])
+        for table, name in INDEXES.items():
+            self.assertIn(name, indexes[table])
+        self.assertIn("ix_users_external_id", indexes["users"])
+        self.assertIn("external_id", columns)
+        self.assertIn("ux_analysis_results_daily_summary", indexes["analysis_results"])
+        self.assertIn("daily_summary", result_columns)
+        self.assertLessEqual({"job_runs", "job_checkpoints"}, tables)
+
+    async def test_last_activity_date_is_backfilled(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            # A database created before users had a last activity date
+            await conn.execute(text("DROP INDEX ix_users_last_activity_date"))
+            await conn.execute(text("ALTER TABLE users DROP COLUMN last_activity_date"))
+            await conn.execute(text(
+                "INSERT INTO users (user_id, username, email, device_id) VALUES (1, 'a', 'a', 'a'), (2, 'b', 'b', 'b')"))
+            await conn.execute(text(
+                "INSERT INTO conversations (user_id, start_timestamp, end_timestamp) VALUES "
+                "(1, '2024-05-01 09:00:00.000000', '2024-05-01 09:30:00.000000'), "
+                "(1, '2024-05-03 18:00:00.000000', '2024-05-03 18:10:00.000000')"))
+
+            await run_migrations(conn)
+            rows = (await conn.execute(
+                text("SELECT user_id, last_activity_date FROM users ORDER BY user_id"))).all()
+            indexes = await conn.run_sync(index_names)
+
+        self.assertEqual([tuple(row) for row in rows], [(1, "2024-05-03"), (2, None)])
+        self.assertIn("ix_users_last_activity_date", indexes["users"])
+
+    async def test_rollup_words_and_chunks_move_to_their_tables(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            # A database created while rollups kept words and chunks in JSON columns
+            await conn.execute(text("DROP TABLE daily_metric_words"))
+            await conn.execute(text("DROP TABLE daily_metric_chunks"))
+            for column in ("filler_counts", "vocabulary", "chunk_ids"):
+                await conn.execute(text(f"ALTER TABLE daily_user_metrics ADD COLUMN {column} JSON"))
+            await conn.execute(text("INSERT INTO users (user_id, username, email, device_id) VALUES (1, 'a', 'a', 'a')"))
+            await conn.execute(text(
+                "INSERT INTO daily_user_metrics (daily_metrics_id, user_id, date, segment_count, word_count, "
+                "speaking_seconds, total_fillers, pace_count, pace_sum, pace_sum_squares, filler_counts, "
+                "vocabulary, chunk_ids) VALUES (1, 1, '2024-05-01', 2, 9, 4.0, 1, 0, 0, 0, "
+                "'{\"um\": 1}', '{\"speech\": 2}', '[\"c1\", \"c2\"]')"))
+
+            await run_migrations(conn)
+            words = (await conn.execute(text("SELECT kind, word, count FROM daily_metric_words ORDER BY kind"))).all()
+            chunks = (await conn.execute(text("SELECT chunk_id FROM daily_metric_chunks ORDER BY chunk_id"))).scalars().all()
+            columns = await conn.run_sync(
+                lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("daily_user_metrics")})
+
+        self.assertEqual([tuple(row) for row in words], [("filler", "um", 1), ("vocabulary", "speech", 2)])
+        self.assertEqual(chunks, ["c1", "c2"])
+        self.assertFalse({"filler_counts", "vocabulary", "chunk_ids"} & columns)
+
+    async def test_migrations_apply_once(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await run_migrations(conn)
+            self.assertEqual(await run_migrations(conn), [])
+            self.assertEqual(await current_version(conn), MIGRATIONS[-1].version)
+
+class TestQueryPlans(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        async with self.session_factory() as session:
+            user = await self.db_service.get_or_create_user(session, "omi-1", "User-omi-1", "OMI-omi-1")
+            await self.db_service.store_conversation(session, user.user_id, "s1", build_segments())
+            for index in range(5):
+                await self.db_service.store_analysis_results(session, user.user_id, METRICS, build_suggestions(2))
+            self.user_id = user.user_id
+
+            # A few months of history, so the planner has a reason to prefer indexes
+            start = datetime.utcnow() - timedelta(days=90)
+            for index in range(90):
+                segments = [dict(s, start_time=start + timedelta(days=index, seconds=10 * i),
+                                 end_time=start + timedelta(days=index, seconds=10 * i + 5))
+                            for i, s in enumerate(build_segments() * 5)]
+                await self.db_service.store_conversation(session, user.user_id, f"old-{index}", segments)
+
+            # Other users, idle for a while, and their results
+            session.add_all([
+                User(user_id=1000 + index, username=f"user-{index}", email="", device_id="",
+                     last_activity_date=(start + timedelta(days=index % 60)).date())
+                for index in range(200)
+            ])
+            for index in range(200):
+                await self.db_service.store_analysis_results(session, 1000 + index, METRICS, build_suggestions(3))
+
+        async with self.engine.begin() as conn:
+            await conn.exec_driver_sql("ANALYZE")
+        # Look users up in the database rather than the cache
+        self.user_cache.max_entries = 0
+        self.user_cache.clear()
+
+    async def explain(self, statements):
+        """EXPLAIN QUERY PLAN details for each captured (statement, parameters)"""
+        plans = []
+        async with self.engine.connect() as conn:
+            for statement, parameters in statements:
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                plans.append((statement, [row[3] for row in result]))
+        return plans
+
+    async def capture(self, call):
+        async with self.session_factory() as session:
+            with QueryCounter(self.engine) as counter:
+                await call(session)
+        return list(zip(counter.statements, counter.parameters))
+
+    async def assert_index_scans(self, call):
+        plans = await self.explain(await self.capture(call))
+        self.assertTrue(any(detail.startswith("SEARCH") for _, details in plans for detail in details))
+        for statement, details in plans:
+            for detail in details:
+                if detail.startswith("SCAN"):
+                    self.fail(f"{detail} in plan of {statement}")
+
+    async def test_statistics_queries_use_indexes(self):
+        await self.assert_index_scans(
+            lambda session: self.db_service.get_user_statistics(session, "omi-1", days=30))
+
+    async def test_history_queries_use_indexes(self):
+        await self.assert_index_scans(
+            lambda session: self.db_service.get_user_analysis_history(session, "omi-1", limit=10))
+
+    async def test_end_of_day_queries_use_indexes(self):
+        async def end_of_day(session):
+            await self.db_service.get_active_user_ids(session, datetime.utcnow().date())
+            conversations = await self.db_service.get_user_daily_conversations(
+                session, user_id=self.user_id, date=datetime.utcnow().date())
+            for conversation in conversations:
+                await self.db_service.get_conversation_segments(session, conversation.conversation_id)
+            async for _ in self.db_service.stream_daily_user_segments(
+                session, datetime.utcnow().date(), exclude_rollups=True
+            ):
+                pass
+
+        await self.assert_index_scans(end_of_day)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import unittest
+import uuid
+from datetime import date, datetime
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import selectinload
+from models.database import Base, Conversation
+from models.migrations import partition_conversations_and_segments
+from models.partitions import PARTITIONED_TABLES, add_months, default_partition, ensure_partitions, is_partitioned, list_partitions, \
+    maintain_partitions, month_start, month_window, partition_name, retire_partitions
+from test_database_service import DatabaseTestCase, QueryCounter
+from test_end_of_day import day_segments
+
+class TestPartitionMonths(unittest.TestCase):
+    def test_month_arithmetic(self):
+        self.assertEqual(month_start(datetime(2024, 5, 31, 23, 59)), date(2024, 5, 1))
+        self.assertEqual(add_months(date(2024, 11, 1), 2), date(2025, 1, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+        self.assertEqual(partition_name("speech_segments", date(2024, 5, 1)), "speech_segments_p2024_05")
+
+    def test_month_window_covers_the_span(self):
+        self.assertEqual(month_window(datetime(2024, 5, 31, 23, 50), datetime(2024, 6, 1, 0, 10)),
+                         (datetime(2024, 5, 1), datetime(2024, 7, 1)))
+        self.assertEqual(month_window(date(2024, 12, 5), date(2024, 12, 5)),
+                         (datetime(2024, 12, 1), datetime(2025, 1, 1)))
+
+class TestPartitionedModels(unittest.TestCase):
+    def test_no_foreign_keys_reference_partitioned_tables(self):
+        # Migration 8 drops them on PostgreSQL, so create_all mustn't build them either
+        referenced = {foreign_key.column.table.name
+                      for table in Base.metadata.tables.values() for foreign_key in table.foreign_keys}
+        self.assertFalse(referenced & set(PARTITIONED_TABLES))
+
+class TestPartitionPruning(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        async with self.session_factory() as session:
+            self.user_id = await self.db_service.get_or_create_user_id(session, "omi-1", "User-omi-1", "OMI-omi-1")
+            # Crosses midnight at the end of the month
+            self.conversation = await self.db_service.store_conversation(
+                session, self.user_id, "s1", day_segments(datetime(2024, 5, 31, 23, 58), ["a", "b", "c", "d"]))
+
+    async def test_queries_filter_on_partition_keys(self):
+        async with self.session_factory() as session:
+            with QueryCounter(self.engine) as counter:
+                await self.db_service.get_user_daily_conversations(session, self.user_id, date(2024, 5, 31))
+                async for _ in self.db_service.stream_daily_user_segments(session, date(2024, 5, 31)):
+                    pass
+
+        conversations, stream = counter.statements
+        self.assertIn("conversations.start_timestamp >=", conversations)
+        self.assertIn("conversations.start_timestamp <=", conversations)
+        self.assertIn("conversations.start_timestamp <=", stream)
+        self.assertIn("speech_segments.start_time <", stream)
+
+    async def test_relationships_join_without_foreign_keys(self):
+        async with self.session_factory() as session:
+            conversation = (await session.execute(
+                select(Conversation).options(selectinload(Conversation.speech_segments))
+            )).scalar_one()
+        self.assertEqual(len(conversation.speech_segments), 4)
+
+    async def test_maintenance_is_a_no_op_without_partitioning(self):
+        async with self.engine.begin() as conn:
+            self.assertEqual(await conn.run_sync(ensure_partitions), [])
+            self.assertEqual(await conn.run_sync(retire_partitions, date(2030, 1, 1), True), [])
+        self.assertEqual(await maintain_partitions(self.engine), {"created": [], "retired": []})
+
+POSTGRES_URL = os.getenv("DATABASE_URL", "")
+
+@unittest.skipUnless(POSTGRES_URL.startswith("postgresql"), "needs DATABASE_URL pointing at PostgreSQL")
+class TestPostgresPartitions(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # A schema of its own, so the test neither sees nor touches the database's tables
+        self.schema = f"partition_test_{uuid.uuid4().hex[:8]}"
+        admin = create_async_engine(POSTGRES_URL)
+        async with admin.begin() as conn:
+            await conn.execute(text(f"CREATE SCHEMA {self.schema}"))
+        await admin.dispose()
+        self.engine = create_async_engine(POSTGRES_URL, connect_args={"server_settings": {"search_path": self.schema}})
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            user_id = (await conn.execute(text(
+                "INSERT INTO users (username, email, device_id) VALUES ('u', 'u@example.com', 'd') RETURNING user_id"
+            ))).scalar()
+            for day in (date(2024, 3, 10), date(2024, 4, 10)):
+                conversation_id = (await conn.execute(text(
+                    "INSERT INTO conversations (user_id, start_timestamp, end_timestamp) "
+                    "VALUES (:user_id, :start, :start) RETURNING conversation_id"
+                ), {"user_id": user_id, "start": datetime.combine(day, datetime.min.time())})).scalar()
+                await conn.execute(text(
+                    "INSERT INTO speech_segments (conversation_id, user_id, start_time, end_time, text_content, "
+                    "is_user_speaking) VALUES (:conversation_id, :user_id, :start, :start, 'hello', true)"
+                ), {"conversation_id": conversation_id, "user_id": user_id,
+                    "start": datetime.combine(day, datetime.min.time())})
+            await conn.run_sync(partition_conversations_and_segments)
+        self.user_id = user_id
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        admin = create_async_engine(POSTGRES_URL)
+        async with admin.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {self.schema} CASCADE"))
+        await admin.dispose()
+
+    async def count(self, table):
+        async with self.engine.connect() as conn:
+            return (await conn.execute(text(f"SELECT count(*) FROM {table}"))).scalar()
+
+    async def test_populated_table_becomes_the_legacy_partition(self):
+        async with self.engine.connect() as conn:
+            for table in ("conversations", "speech_segments"):
+                self.assertTrue(await conn.run_sync(is_partitioned, table))
+                partitions = await conn.run_sync(list_partitions, table)
+                self.assertEqual(partitions[0][:2], (f"{table}_legacy", None))
+                self.assertEqual(await conn.run_sync(default_partition, table), f"{table}_default")
+        self.assertEqual(await self.count("conversations_legacy"), 2)
+        self.assertEqual(await self.count("speech_segments_legacy"), 2)
+
+    async def test_partitions_are_created_ahead(self):
+        async with self.engine.begin() as conn:
+            created = await conn.run_sync(ensure_partitions, date(2030, 1, 15), 1)
+            again = await conn.run_sync(ensure_partitions, date(2030, 1, 15), 1)
+
+        self.assertEqual(sorted(created), ["conversations_p2030_01", "conversations_p2030_02",
+                                           "speech_segments_p2030_01", "speech_segments_p2030_02"])
+        self.assertEqual(again, [])
+
+    async def test_rows_in_the_default_partition_move_to_their_month(self):
+        async with self.engine.begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO conversations (user_id, start_timestamp, end_timestamp) "
+                "VALUES (:user_id, '2031-06-10', '2031-06-10')"
+            ), {"user_id": self.user_id})
+        self.assertEqual(await self.count("conversations_default"), 1)
+
+        result = await maintain_partitions(self.engine, date(2031, 6, 1))
+
+        self.assertIn("conversations_p2031_06", result["created"])
+        self.assertIn("speech_segments_p2031_06", result["created"])
+        self.assertEqual(await self.count("conversations_default"), 0)
+        self.assertEqual(await self.count("conversations_p2031_06"), 1)
+        self.assertEqual(await self.count("conversations"), 3)
+
+    async def test_old_partitions_are_detached(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(ensure_partitions, date(2030, 1, 15), 1)
+            retired = await conn.run_sync(retire_partitions, date(2030, 2, 1))
+            remaining = [name for name, _, _ in await conn.run_sync(list_partitions, "conversations")]
+
+        self.assertIn("conversations_legacy", retired)
+        self.assertIn("conversations_p2030_01", retired)
+        self.assertEqual(remaining, ["conversations_p2030_02"])
+        # Detached partitions are kept as standalone tables
+        self.assertEqual(await self.count("conversations_legacy"), 2)
+        self.assertEqual(await self.count("conversations"), 0)
+
+if __name__ == "__main__":
+    unittest.main()
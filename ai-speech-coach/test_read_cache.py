@@ -0,0 +1,187 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+from api.services.database_service import DatabaseService
+from api.services.read_cache import DirectoryCacheBackend, InMemoryCacheBackend, ReadCache
+from test_database_service import METRICS, DatabaseTestCase, QueryCounter, build_suggestions
+from test_session_state import build_segments
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"calls": self.calls, "dates": ["2024-05-01"]}
+
+class TestReadCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = ReadCache(max_entries=16, ttl_seconds=60)
+        self.loader = CountingLoader()
+
+    async def test_repeat_reads_are_cached_per_parameters(self):
+        first = await self.cache.get_or_load(1, "history", 10, self.loader)
+        second = await self.cache.get_or_load(1, "history", 10, self.loader)
+        await self.cache.get_or_load(1, "history", 20, self.loader)
+        await self.cache.get_or_load(2, "history", 10, self.loader)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.loader.calls, 3)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 3))
+
+    async def test_invalidate_only_affects_one_user(self):
+        for user_id in (1, 2):
+            await self.cache.get_or_load(user_id, "history", 10, self.loader)
+            await self.cache.get_or_load(user_id, "statistics", 30, self.loader)
+        await self.cache.invalidate(1)
+
+        self.assertEqual((await self.cache.get_or_load(1, "history", 10, self.loader))["calls"], 5)
+        self.assertEqual((await self.cache.get_or_load(1, "statistics", 30, self.loader))["calls"], 6)
+        self.assertEqual((await self.cache.get_or_load(2, "history", 10, self.loader))["calls"], 3)
+
+    async def test_read_racing_a_write_is_not_cached_as_current(self):
+        loading = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_loader():
+            loading.set()
+            await release.wait()
+            return "before the write"
+
+        read = asyncio.create_task(self.cache.get_or_load(1, "history", 10, slow_loader))
+        await loading.wait()
+        await self.cache.invalidate(1)  # A write commits while the read is loading
+        release.set()
+        self.assertEqual(await read, "before the write")
+
+        self.assertEqual((await self.cache.get_or_load(1, "history", 10, self.loader))["calls"], 1)
+
+    async def test_cached_values_are_copies(self):
+        value = await self.cache.get_or_load(1, "history", 10, self.loader)
+        value["dates"].append("changed")
+        cached = await self.cache.get_or_load(1, "history", 10, self.loader)
+        cached["dates"].append("changed")
+
+        self.assertEqual((await self.cache.get_or_load(1, "history", 10, self.loader))["dates"], ["2024-05-01"])
+
+    async def test_entries_are_bounded_and_expire(self):
+        cache = ReadCache(max_entries=2, ttl_seconds=60)
+        for limit in range(3):
+            await cache.get_or_load(1, "history", limit, self.loader)
+        self.assertEqual(len(cache.backend), 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache = ReadCache(max_entries=2, ttl_seconds=0.01)
+        await cache.get_or_load(1, "history", 10, self.loader)
+        await asyncio.sleep(0.02)
+        await cache.get_or_load(1, "history", 10, self.loader)
+        self.assertEqual(cache.misses, 2)
+
+    async def test_disabled_cache_always_loads(self):
+        cache = ReadCache(max_entries=0)
+        for _ in range(2):
+            await cache.get_or_load(1, "history", 10, self.loader)
+        await cache.invalidate(1)
+
+        self.assertEqual(self.loader.calls, 2)
+        self.assertEqual(cache.stats()["hits"], 0)
+
+    async def test_directory_backend_is_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Two caches over one directory, as two API workers would have
+            api_worker = ReadCache(max_entries=16, ttl_seconds=60, cache_dir=cache_dir)
+            job = ReadCache(max_entries=16, ttl_seconds=60, cache_dir=cache_dir)
+            self.assertIsInstance(api_worker.backend, DirectoryCacheBackend)
+
+            await api_worker.get_or_load(1, "history", 10, self.loader)
+            self.assertEqual((await job.get_or_load(1, "history", 10, self.loader))["calls"], 1)
+            await job.invalidate(1)
+            self.assertEqual((await api_worker.get_or_load(1, "history", 10, self.loader))["calls"], 2)
+
+    def test_several_web_workers_share_a_directory(self):
+        def backend(**overrides):
+            environment = {key: value for key, value in os.environ.items() if not key.startswith("READ_CACHE_")}
+            with mock.patch.dict(os.environ, dict(environment, **overrides), clear=True):
+                return ReadCache().backend
+
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch.object(tempfile, "gettempdir", return_value=temp_dir):
+            self.assertIsInstance(backend(WEB_CONCURRENCY="4"), DirectoryCacheBackend)
+            self.assertIsInstance(backend(WEB_CONCURRENCY="4", READ_CACHE_BACKEND="memory"), InMemoryCacheBackend)
+            self.assertIsInstance(backend(WEB_CONCURRENCY="1"), InMemoryCacheBackend)
+
+    async def test_backend_is_pluggable(self):
+        backend = InMemoryCacheBackend(max_entries=4, ttl_seconds=60)
+        cache = ReadCache(backend=backend, max_entries=4)
+        await cache.get_or_load(1, "history", 10, self.loader)
+
+        self.assertIs(cache.backend, backend)
+        self.assertEqual(len(backend), 1)
+
+class TestCachedDashboard(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.read_cache = ReadCache(max_entries=64, ttl_seconds=60)
+        self.db_service = DatabaseService(user_cache=self.user_cache, read_cache=self.read_cache)
+        async with self.session_factory() as session:
+            self.user_id = await self.db_service.get_or_create_user_id(session, "omi-1", "User-omi-1", "OMI-omi-1")
+            await self.db_service.store_analysis_results(session, self.user_id, METRICS, build_suggestions(2))
+
+    async def read_dashboard(self):
+        async with self.session_factory() as session:
+            with QueryCounter(self.engine) as counter:
+                history = await self.db_service.get_user_analysis_history(session, "omi-1", limit=10)
+                statistics = await self.db_service.get_user_statistics(session, "omi-1", days=30)
+        return history, statistics, counter.count
+
+    async def test_repeat_dashboard_loads_skip_the_database(self):
+        history, statistics, first_count = await self.read_dashboard()
+        cached_history, cached_statistics, count = await self.read_dashboard()
+
+        self.assertGreater(first_count, 0)
+        self.assertEqual(count, 0)
+        self.assertEqual(cached_history, history)
+        self.assertEqual(cached_statistics, statistics)
+
+    async def test_stored_results_invalidate_the_user(self):
+        await self.read_dashboard()
+        async with self.session_factory() as session:
+            await self.db_service.store_analysis_results(session, self.user_id, METRICS, build_suggestions(1))
+
+        history, statistics, count = await self.read_dashboard()
+        self.assertGreater(count, 0)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(len(statistics["trend_data"]["dates"]), 2)
+
+    async def test_stored_webhook_batch_invalidates_the_user(self):
+        await self.read_dashboard()
+        async with self.session_factory() as session:
+            await self.db_service.store_webhook_batch(session, [{
+                "user_id": self.user_id,
+                "session_id": "s1",
+                "segments": build_segments(),
+                "metrics": METRICS,
+                "suggestions": build_suggestions(1)
+            }])
+
+        history, _, _ = await self.read_dashboard()
+        self.assertEqual(len(history), 2)
+
+    async def test_cached_statistics_carry_the_requested_id(self):
+        await self.read_dashboard()
+        # Another external id resolving to the same user hits the same entry
+        self.user_cache.put("omi-1-alias", self.user_id)
+        async with self.session_factory() as session:
+            statistics = await self.db_service.get_user_statistics(session, "omi-1-alias", days=30)
+
+        self.assertEqual(self.read_cache.hits, 1)
+        self.assertEqual(statistics["user_id"], "omi-1-alias")
+
+    async def test_unknown_users_are_not_cached(self):
+        async with self.session_factory() as session:
+            self.assertEqual(await self.db_service.get_user_analysis_history(session, "nobody"), [])
+        self.assertEqual(self.read_cache.misses, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from analyzer.registry import AnalyzerRegistry, analyzer_registry, get_analyzer_service, get_filler_word_analyzer
+
+class TestAnalyzerRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = AnalyzerRegistry()
+
+    def tearDown(self):
+        self.registry.shutdown()
+
+    def test_builds_each_analyzer_once(self):
+        service = self.registry.speech_analyzer_service()
+        
+        self.assertIs(self.registry.speech_analyzer_service(), service)
+        self.assertIs(service.filler_word_analyzer, self.registry.filler_word_analyzer())
+        self.assertIs(service.pace_analyzer, self.registry.pace_analyzer())
+        self.assertIs(service.vocabulary_analyzer, self.registry.vocabulary_analyzer())
+        self.assertTrue(all(count == 1 for count in self.registry.construction_counts.values()))
+
+    def test_no_construction_after_warm_up(self):
+        self.registry.warm_up()
+        for _ in range(10):
+            self.registry.filler_word_analyzer()
+            self.registry.speech_analyzer_service()
+        
+        stats = self.registry.stats()
+        self.assertTrue(stats["warmed_up"])
+        self.assertEqual(stats["constructions_after_warm_up"], 0)
+        self.assertEqual(stats["constructions"]["filler_word_analyzer"], 1)
+        self.assertGreaterEqual(stats["lookups"]["filler_word_analyzer"], 11)
+
+    def test_dependencies_return_process_wide_instances(self):
+        self.assertIs(get_analyzer_service(), get_analyzer_service())
+        self.assertIs(get_filler_word_analyzer(), analyzer_registry.filler_word_analyzer())
+        self.assertIs(get_analyzer_service().filler_word_analyzer, get_filler_word_analyzer())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.filler_words import FillerWordAnalyzer
+from analyzer.result_cache import AnalysisResultCache, analysis_cache_key
+from test_session_state import build_segments
+
+class TestAnalysisResultCache(unittest.TestCase):
+    def setUp(self):
+        self.segments = build_segments()
+        self.cache = AnalysisResultCache(max_entries=8, ttl_seconds=60)
+        self.service = SpeechAnalyzerService(executor_backend="inline", result_cache=self.cache)
+        self.expected = SpeechAnalyzerService(executor_backend="inline").analyze_transcript_sync(self.segments)
+
+    def test_repeat_transcript_skips_analysis(self):
+        calls = []
+        original = self.service.analyze_transcript_sync
+
+        def counting(segments):
+            calls.append(segments)
+            return original(segments)
+
+        self.service.analyze_transcript_sync = counting
+        first = asyncio.run(self.service.analyze_transcript(self.segments))
+        # Same content in new dictionaries, as a retried webhook would deliver it
+        second = asyncio.run(self.service.analyze_transcript([dict(s) for s in self.segments]))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first, self.expected)
+        self.assertEqual(second, self.expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_batch_callers_bypass_the_cache(self):
+        result = asyncio.run(self.service.analyze_transcript(self.segments, use_cache=False))
+        many = asyncio.run(self.service.analyze_many({"user": self.segments}, use_cache=False))
+
+        self.assertEqual(result, self.expected)
+        self.assertEqual(many["user"], self.expected)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+
+    def test_cached_results_are_copies(self):
+        asyncio.run(self.service.analyze_transcript(self.segments))
+        result = asyncio.run(self.service.analyze_transcript(self.segments))
+        result["metrics"]["total_words"] = -1
+
+        self.assertEqual(asyncio.run(self.service.analyze_transcript(self.segments)), self.expected)
+
+    def test_key_depends_on_content_and_configuration(self):
+        custom = SpeechAnalyzerService(executor_backend="inline",
+                                       filler_word_analyzer=FillerWordAnalyzer({"speech coach": True}))
+        changed = [dict(s) for s in self.segments]
+        changed[0]["text_content"] += " um"
+
+        key = analysis_cache_key(self.segments, self.service.config_version)
+        self.assertNotEqual(key, analysis_cache_key(changed, self.service.config_version))
+        self.assertNotEqual(key, analysis_cache_key(self.segments, custom.config_version))
+        self.assertEqual(self.service.config_version, SpeechAnalyzerService(executor_backend="inline").config_version)
+
+    def test_session_chunks_are_cached(self):
+        result, accumulator = asyncio.run(self.service.analyze_session_chunk(self.segments))
+        cached_result, cached_accumulator = asyncio.run(self.service.analyze_session_chunk(self.segments))
+
+        self.assertEqual(cached_result, result)
+        self.assertEqual(cached_accumulator.to_dict(), accumulator.to_dict())
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_analyze_many_uses_cache(self):
+        transcripts = {"a": self.segments, "b": self.segments[:3]}
+        first = asyncio.run(self.service.analyze_many(transcripts))
+        second = asyncio.run(self.service.analyze_many(transcripts))
+
+        self.assertEqual(first, second)
+        self.assertEqual(first["a"], self.expected)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_lru_and_ttl_eviction(self):
+        cache = AnalysisResultCache(max_entries=2, ttl_seconds=0.05)
+        for key in ["a", "b", "c"]:
+            cache.put(key, {"value": key})
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), {"value": "c"})
+        self.assertEqual(cache.evictions, 1)
+
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("c"))
+
+    def test_disk_tier_is_shared(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            writer = SpeechAnalyzerService(executor_backend="inline",
+                                           result_cache=AnalysisResultCache(ttl_seconds=60, cache_dir=cache_dir))
+            asyncio.run(writer.analyze_transcript(self.segments))
+
+            # A cache in another worker only shares the directory
+            reader_cache = AnalysisResultCache(ttl_seconds=60, cache_dir=cache_dir)
+            reader = SpeechAnalyzerService(executor_backend="inline", result_cache=reader_cache)
+            self.assertEqual(asyncio.run(reader.analyze_transcript(self.segments)), self.expected)
+            self.assertEqual(reader_cache.disk_hits, 1)
+
+    def test_disabled_cache(self):
+        cache = AnalysisResultCache(max_entries=0)
+        cache.put("a", {"value": 1})
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+if __name__ == "__main__":
+    unittest.main()
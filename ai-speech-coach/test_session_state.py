@@ -0,0 +1,104 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.session_state import SessionAccumulator, SessionStore, chunk_fingerprint
+
+TEXTS = [
+    "Hello, um, this is a test recording for the, uh, speech coach.",
+    "I want to improve my speaking skills and like reduce filler words.",
+    "Sometimes I speak too quickly and people have trouble following what I'm saying.",
+    "I also need to work on my vocabulary and you know use more varied words in my speech.",
+    "So, basically, the idea is good and the problem is the idea.",
+    "Well, I mean, I just think it is okay."
+]
+
+def build_segments():
+    segments = []
+    start = 0.0
+    for i, text in enumerate(TEXTS):
+        duration = 3.0 + i
+        segments.append({
+            "text_content": text,
+            "is_user_speaking": True,
+            "start_time": start,
+            "end_time": start + duration
+        })
+        start += duration + 0.5
+    return segments
+
+class TestSessionState(unittest.TestCase):
+    def setUp(self):
+        self.service = SpeechAnalyzerService(executor_backend="inline")
+        self.segments = build_segments()
+
+    def test_chunked_session_matches_full_analysis(self):
+        store = SessionStore(ttl_seconds=60)
+        for i in range(0, len(self.segments), 2):
+            _, delta = self.service.analyze_session_chunk_sync(self.segments[i:i + 2])
+            state = store.merge("user:session", delta)
+
+        session_metrics = self.service.summarize_session(state)
+        full_metrics = self.service.analyze_transcript_sync(self.segments)["metrics"]
+
+        for key in ["filler_words", "total_filler_count", "total_words", "words_per_minute",
+                    "vocabulary_metrics", "confidence_score", "clarity_score"]:
+            self.assertEqual(session_metrics[key], full_metrics[key], key)
+        for key in ["speaking_time_seconds", "pace_variability", "vocabulary_diversity"]:
+            self.assertAlmostEqual(session_metrics[key], full_metrics[key], places=6, msg=key)
+
+    def test_merge_is_order_independent_for_totals(self):
+        _, first = self.service.analyze_session_chunk_sync(self.segments[:3])
+        _, second = self.service.analyze_session_chunk_sync(self.segments[3:])
+
+        forward = SessionAccumulator().merge(first).merge(second)
+        backward = SessionAccumulator().merge(second).merge(first)
+
+        self.assertEqual(forward.filler_counts, backward.filler_counts)
+        self.assertEqual(forward.vocabulary, backward.vocabulary)
+        self.assertAlmostEqual(forward.pace_variability, backward.pace_variability)
+
+    def test_persistence_round_trip(self):
+        _, delta = self.service.analyze_session_chunk_sync(self.segments)
+        with tempfile.TemporaryDirectory() as persist_dir:
+            SessionStore(ttl_seconds=60, persist_dir=persist_dir).merge("user:session", delta)
+
+            # A fresh store (e.g. after a restart) picks the session up from disk
+            restored = SessionStore(ttl_seconds=60, persist_dir=persist_dir).get("user:session")
+            self.assertIsNotNone(restored)
+            self.assertEqual(restored.to_dict(), delta.to_dict())
+
+    def test_evicted_session_is_restored_asynchronously(self):
+        _, delta = self.service.analyze_session_chunk_sync(self.segments)
+        with tempfile.TemporaryDirectory() as persist_dir:
+            store = SessionStore(ttl_seconds=60, persist_dir=persist_dir)
+            store.merge("user:session", delta, chunk_id="first")
+            store._sessions.clear()  # Evicted from memory, its appends possibly still queued
+
+            async def merge_two():
+                return await asyncio.gather(
+                    store.merge_async("user:session", SessionAccumulator().merge(delta), chunk_id="second"),
+                    store.merge_async("user:session", SessionAccumulator().merge(delta), chunk_id="third"))
+
+            first, second = asyncio.run(merge_two())
+            store.close()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.chunk_ids, {"first", "second", "third"})
+        self.assertEqual(first.segment_count, 3 * delta.segment_count)
+
+    def test_ttl_eviction(self):
+        store = SessionStore(ttl_seconds=0.01)
+        store.merge("user:session", SessionAccumulator())
+        time.sleep(0.02)
+
+        self.assertIsNone(store.get("user:session"))
+        self.assertEqual(len(store), 0)
+
+    def test_empty_session(self):
+        metrics = self.service.summarize_session(SessionAccumulator())
+        self.assertEqual(metrics["total_words"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from analyzer.tokenizer import TokenStream, sentence_pattern, word_pattern
+from analyzer.filler_words import FillerWordAnalyzer, count_words
+from analyzer.pace import PaceAnalyzer
+
+class TestTokenStream(unittest.TestCase):
+    def setUp(self):
+        self.segments = [
+            {"text_content": "Hello, um, this is a test.", "start_time": 0.0, "end_time": 3.0},
+            {"text_content": "I want to, like, improve!", "start_time": 3.5, "end_time": 6.0},
+            {"text_content": "You know what I mean", "start_time": 6.5, "end_time": 9.0}
+        ]
+        self.stream = TokenStream.from_segments(self.segments)
+
+    def test_combined_text_and_word_counts(self):
+        combined = " ".join(s["text_content"] for s in self.segments)
+
+        self.assertEqual(self.stream.text, combined)
+        self.assertEqual(self.stream.word_count, count_words(combined))
+        self.assertEqual(self.stream.segment_word_counts,
+                         [len(s["text_content"].split()) for s in self.segments])
+
+    def test_token_offsets_and_membership(self):
+        for i in range(len(self.stream)):
+            token = self.stream.token(i)
+            self.assertEqual(self.stream.text[token.start:token.end].lower(), token.text)
+
+        # "improve" is in the second segment and the second sentence
+        index = self.stream.words.index("improve")
+        self.assertEqual(self.stream.segment_ids[index], 1)
+        self.assertEqual(self.stream.sentence_text(self.stream.sentence_ids[index]).strip(),
+                         "I want to, like, improve!")
+
+    def test_sentence_boundaries(self):
+        self.assertEqual(len(self.stream.sentence_spans), 3)
+        self.assertEqual(self.stream.sentence_terminated, [True, True, False])
+
+    def test_analyzers_match_text_path(self):
+        filler_analyzer = FillerWordAnalyzer()
+        self.assertEqual(filler_analyzer.analyze_stream(self.stream),
+                         filler_analyzer.analyze_text(self.stream.text))
+
+        pace_analyzer = PaceAnalyzer()
+        self.assertEqual(
+            pace_analyzer.analyze_segments(self.segments, word_counts=self.stream.segment_word_counts),
+            pace_analyzer.analyze_segments(self.segments)
+        )
+
+    def test_find_example_sentence_matches_regex(self):
+        text = "No fillers here. Well, um, you know... I mean it! Trailing you know"
+        stream = TokenStream.from_text(text)
+
+        for phrase in ["um", "you know", "i mean", "well", "trailing", "missing"]:
+            examples = sentence_pattern(phrase).findall(text)
+            expected = examples[0].strip() if examples else None
+            self.assertEqual(stream.find_example_sentence(phrase), expected, phrase)
+
+    def test_cached_patterns(self):
+        self.assertIs(word_pattern("um"), word_pattern("um"))
+        self.assertIs(sentence_pattern("you know"), sentence_pattern("you know"))
+
+    def test_empty_stream(self):
+        stream = TokenStream.from_text("")
+        self.assertEqual(len(stream), 0)
+        self.assertEqual(stream.word_count, 0)
+        self.assertEqual(stream.sentence_spans, [])
+
+if __name__ == "__main__":
+    unittest.main()
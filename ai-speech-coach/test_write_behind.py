@@ -0,0 +1,173 @@
+import asyncio
+import unittest
+from datetime import date
+from sqlalchemy import func, select
+from analyzer.analyzer_service import SpeechAnalyzerService
+from analyzer.session_state import chunk_fingerprint
+from api.services.database_service import DatabaseService
+from api.services.write_behind import PendingWebhook, WriteBehindWriter
+from models.database import (AnalysisResult, Conversation, DailyMetricChunk, DailyUserMetrics, ImprovementSuggestion,
+                             SpeechSegment, User)
+from test_database_service import DatabaseTestCase
+from test_session_state import build_segments
+
+class StallingDatabaseService(DatabaseService):
+    """Holds every batch until released, to fill the writer's queue"""
+    def __init__(self, user_cache, read_cache):
+        super().__init__(user_cache=user_cache, read_cache=read_cache)
+        self.release = asyncio.Event()
+
+    async def store_webhook_batch(self, session, webhooks):
+        await self.release.wait()
+        return await super().store_webhook_batch(session, webhooks)
+
+class FailingAfterCommitDatabaseService(DatabaseService):
+    """Fails the first batch after it was committed, as a lost connection would"""
+    async def store_webhook_batch(self, session, webhooks):
+        stored = await super().store_webhook_batch(session, webhooks)
+        if len(webhooks) > 1:
+            raise ConnectionError("connection lost after commit")
+        return stored
+
+class TestWriteBehindWriter(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.analyzer_service = SpeechAnalyzerService(executor_backend="inline")
+        self.segments = build_segments()
+        self.day = date(2024, 5, 1)
+
+    def build_writer(self, db_service=None, **kwargs):
+        options = dict(enabled=True, max_queue=100, batch_size=50, max_delay_seconds=0.05)
+        options.update(kwargs)
+        return WriteBehindWriter(db_service or self.db_service, self.session_factory, **options)
+
+    def webhook(self, external_id, session_id, segments=None):
+        segments = segments if segments is not None else self.segments
+        analysis_result, delta = self.analyzer_service.analyze_session_chunk_sync(segments)
+        return PendingWebhook(external_id, session_id, segments, analysis_result["metrics"],
+                              analysis_result["suggestions"], self.day, delta, chunk_fingerprint(segments))
+
+    async def count(self, model):
+        async with self.session_factory() as session:
+            return (await session.execute(select(func.count()).select_from(model))).scalar()
+
+    async def test_webhooks_are_written_in_batches(self):
+        writer = self.build_writer()
+        for index in range(10):
+            # Distinct chunks, three users
+            segments = [dict(s, start_time=s["start_time"] + 100 * index, end_time=s["end_time"] + 100 * index)
+                        for s in self.segments]
+            await writer.submit(self.webhook(f"omi-{index % 3}", f"s{index}", segments))
+        await writer.close()
+
+        stats = writer.stats()
+        self.assertEqual((stats["written"], stats["failed"], stats["batches"]), (10, 0, 1))
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["lag"]["count"], 10)
+        self.assertEqual(await self.count(User), 3)
+        self.assertEqual(await self.count(Conversation), 10)
+        self.assertEqual(await self.count(SpeechSegment), 10 * len(self.segments))
+        self.assertEqual(await self.count(AnalysisResult), 10)
+
+        async with self.session_factory() as session:
+            chunk_counts = (await session.execute(
+                select(func.count()).select_from(DailyMetricChunk).group_by(DailyMetricChunk.daily_metrics_id))).scalars().all()
+            last_activity = (await session.execute(select(User.last_activity_date))).scalars().all()
+        self.assertEqual(sorted(chunk_counts), [3, 3, 4])
+        self.assertTrue(all(last_activity))
+
+    async def test_batch_matches_synchronous_writes(self):
+        webhook = self.webhook("omi-1", "s1")
+        writer = self.build_writer()
+        await writer.submit(webhook)
+        await writer.close()
+
+        async with self.session_factory() as session:
+            user_pk = await self.db_service.get_or_create_user_id(session, "omi-2", "User-omi-2", "OMI-omi-2")
+            await self.db_service.store_conversation(session, user_pk, "s1", self.segments)
+            await self.db_service.store_analysis_results(session, user_pk, webhook.metrics, webhook.suggestions)
+
+            def rows(*columns):
+                return session.execute(select(*columns).order_by(*columns))
+
+            conversations = (await rows(Conversation.user_id, Conversation.start_timestamp,
+                                        Conversation.end_timestamp, Conversation.participants_count)).all()
+            segments = (await rows(SpeechSegment.user_id, SpeechSegment.start_time,
+                                   SpeechSegment.text_content, SpeechSegment.word_count)).all()
+            results = (await rows(AnalysisResult.user_id, AnalysisResult.date,
+                                  AnalysisResult.filler_word_count, AnalysisResult.clarity_score)).all()
+            suggestion_count = (await session.execute(select(func.count()).select_from(ImprovementSuggestion))).scalar()
+
+        for stored in (conversations, segments, results):
+            by_user = {}
+            for row in stored:
+                by_user.setdefault(row[0], []).append(tuple(row[1:]))
+            self.assertEqual(len(by_user), 2)
+            first, second = by_user.values()
+            self.assertEqual(first, second)
+        self.assertEqual(suggestion_count, 2 * len(webhook.suggestions))
+
+    async def test_retried_chunk_is_counted_once(self):
+        writer = self.build_writer()
+        await writer.submit(self.webhook("omi-1", "s1"))
+        await writer.submit(self.webhook("omi-1", "s1"))
+        await writer.close()
+
+        async with self.session_factory() as session:
+            rows = (await session.execute(select(DailyUserMetrics))).scalars().all()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(await self.count(Conversation), 1)
+        self.assertEqual(rows[0].segment_count, self.webhook("omi-1", "s1").delta.segment_count)
+
+    async def test_retried_batch_does_not_duplicate_rows(self):
+        db_service = FailingAfterCommitDatabaseService(user_cache=self.user_cache, read_cache=self.read_cache)
+        writer = self.build_writer(db_service)
+        for index in range(3):
+            segments = [dict(s, start_time=s["start_time"] + 100 * index, end_time=s["end_time"] + 100 * index)
+                        for s in self.segments]
+            await writer.submit(self.webhook("omi-1", f"s{index}", segments))
+        await writer.close()
+
+        self.assertEqual((writer.written, writer.failed), (3, 0))
+        self.assertEqual(await self.count(Conversation), 3)
+        self.assertEqual(await self.count(SpeechSegment), 3 * len(self.segments))
+        self.assertEqual(await self.count(AnalysisResult), 3)
+
+    async def test_bad_webhook_does_not_lose_the_batch(self):
+        writer = self.build_writer()
+        await writer.submit(self.webhook("omi-1", "s1"))
+        bad = self.webhook("omi-2", "s2")
+        bad.segments = [dict(self.segments[0], start_time="soon", end_time="later")]
+        await writer.submit(bad)
+        await writer.submit(self.webhook("omi-3", "s3"))
+        await writer.close()
+
+        self.assertEqual((writer.written, writer.failed), (2, 1))
+        self.assertEqual(await self.count(Conversation), 2)
+
+    async def test_full_queue_pushes_back(self):
+        db_service = StallingDatabaseService(self.user_cache, self.read_cache)
+        writer = self.build_writer(db_service, max_queue=1, batch_size=1)
+        await writer.submit(self.webhook("omi-1", "s1"))
+        await asyncio.sleep(0.01)  # The writer takes the first webhook and stalls
+        await writer.submit(self.webhook("omi-1", "s2"))
+
+        self.assertEqual(writer.stats()["queue_depth"], 1)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(writer.submit(self.webhook("omi-1", "s3")), 0.05)
+
+        db_service.release.set()
+        await writer.close()
+        self.assertEqual(writer.written, 2)
+
+    async def test_closed_writer_rejects_webhooks(self):
+        writer = self.build_writer()
+        await writer.close()
+
+        self.assertFalse(writer.accepting)
+        with self.assertRaises(RuntimeError):
+            await writer.submit(self.webhook("omi-1", "s1"))
+        self.assertFalse(self.build_writer(enabled=False).accepting)
+
+if __name__ == "__main__":
+    unittest.main()